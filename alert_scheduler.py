@@ -0,0 +1,158 @@
+import logging
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import winsound  # type: ignore
+    WINSOUND_AVAILABLE = True
+except ImportError:
+    winsound = None
+    WINSOUND_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# เล่นเสียงเตือนได้ไม่เกินหนึ่งครั้งต่อ 2 วินาที
+SOUND_INTERVAL = 2.0
+# แจ้งเตือนไม่เกินหนึ่งครั้งต่อ 5 วินาที (ที่เกิดระหว่างนั้นรวมเป็นข้อความสรุป)
+SUMMARY_WINDOW = 5.0
+
+# โปรแกรมเล่นไฟล์เสียงบนระบบที่ไม่มี winsound (macOS, PulseAudio, ALSA)
+SOUND_COMMANDS = ('afplay', 'paplay', 'aplay')
+
+
+def winsound_player(sound_file):
+    """เล่นเสียงด้วย winsound (Windows) แบบรอจนจบ ต้องเรียกนอก thread ของ GUI"""
+    if sound_file:
+        winsound.PlaySound(sound_file, winsound.SND_FILENAME)
+    else:
+        winsound.Beep(1000, 500)
+
+
+def bell_player(sound_file):
+    """เสียง bell ของ terminal (ใช้เมื่อไม่มีวิธีเล่นเสียงอื่น)"""
+    if sys.stdout is not None:
+        sys.stdout.write('\a')
+        sys.stdout.flush()
+
+
+class CommandPlayer:
+    """เล่นไฟล์เสียงด้วยโปรแกรมของระบบ เช่น afplay / paplay / aplay (ไม่มีไฟล์ใช้เสียง bell แทน)"""
+
+    def __init__(self, command, timeout=10):
+        self.command = command
+        self.timeout = timeout
+
+    def __call__(self, sound_file):
+        if not sound_file:
+            bell_player(sound_file)
+            return
+        subprocess.run([self.command, sound_file], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       timeout=self.timeout, check=False)
+
+
+def default_sound_player():
+    """เลือกวิธีเล่นเสียงที่ใช้ได้บนเครื่องนี้: winsound > โปรแกรมเล่นเสียงของระบบ > bell"""
+    if WINSOUND_AVAILABLE:
+        return winsound_player
+    for command in SOUND_COMMANDS:
+        path = shutil.which(command)
+        if path:
+            return CommandPlayer(path)
+    return bell_player
+
+
+class AlertScheduler:
+    """ตัวจัดการเสียงเตือนและการแจ้งเตือนเมื่อพบคำหยาบ
+
+    alert() ถูกเรียกจาก thread ของ GUI และคืนค่าทันทีเสมอ
+      - เสียงเล่นใน thread 'alert-sound' ไม่เกินหนึ่งครั้งต่อ sound_interval วินาที
+        ถ้ายังเล่นเสียงก่อนหน้าไม่จบก็ข้ามไป (ไม่ต่อคิวเสียงค้างไว้)
+      - การแจ้งเตือนครั้งแรกหลังจากเงียบไปส่งทันที ส่วนที่ตามมาภายใน summary_window วินาที
+        ถูกรวมเป็นข้อความสรุปเดียว เช่น "พบคำหยาบ 37 ครั้งใน 5 วินาที" ซึ่ง poll() ส่งเมื่อครบช่วง
+    notify(message) ถูกเรียกใน thread ที่เรียก alert()/poll() (คือ thread ของ GUI)
+    """
+
+    def __init__(self, notify=None, sound_player=None, sound_interval=SOUND_INTERVAL,
+                 summary_window=SUMMARY_WINDOW, clock=time.monotonic):
+        self.notify = notify
+        self.sound_player = sound_player or default_sound_player()
+        self.sound_interval = sound_interval
+        self.summary_window = summary_window
+        self.clock = clock
+
+        self._last_sound = None
+        self._window_start = None  # เวลาเริ่มช่วงรวมการแจ้งเตือน (None = ไม่มีช่วงที่เปิดอยู่)
+        self._pending = 0  # จำนวนที่รอส่งในข้อความสรุป
+        self._pending_detail = None
+
+        self.sounds_played = 0
+        self.sounds_skipped = 0
+        self.notifications = 0
+
+        self._sounds = queue.Queue()
+        self._sound_busy = False  # มีเสียงรอเล่นหรือกำลังเล่นอยู่
+        self._closed = False
+        self._sound_thread = threading.Thread(target=self._sound_loop, name='alert-sound', daemon=True)
+        self._sound_thread.start()
+
+    def alert(self, count=1, detail='', sound_file=None):
+        """แจ้งว่าพบคำหยาบ count ครั้ง (detail = รายละเอียดของครั้งล่าสุด)"""
+        now = self.clock()
+        if self._sound_busy or (self._last_sound is not None and now - self._last_sound < self.sound_interval):
+            self.sounds_skipped += 1
+        else:
+            self._sound_busy = True
+            self._last_sound = now
+            self._sounds.put(sound_file)
+
+        if self._window_start is None:
+            self._window_start = now
+            self._send(detail if count == 1 else f'พบ {count} ข้อความ ล่าสุด {detail}')
+        else:
+            self._pending += count
+            self._pending_detail = detail
+
+    def poll(self):
+        """ส่งข้อความสรุปเมื่อครบช่วง (เรียกเป็นระยะจาก timer ของ GUI)"""
+        if self._window_start is None:
+            return
+        now = self.clock()
+        elapsed = now - self._window_start
+        if elapsed < self.summary_window:
+            return
+        if self._pending:
+            # เริ่มช่วงใหม่ต่อทันที ถ้ายังมีคำหยาบเข้ามาอีกก็จะถูกสรุปรวมในรอบถัดไป
+            message = f'พบคำหยาบ {self._pending} ครั้งใน {elapsed:.0f} วินาที ล่าสุด {self._pending_detail}'
+            self._window_start = now
+            self._pending = 0
+            self._pending_detail = None
+            self._send(message)
+        else:
+            self._window_start = None
+
+    def _send(self, message):
+        self.notifications += 1
+        if self.notify is not None:
+            self.notify(message)
+
+    def _sound_loop(self):
+        while True:
+            sound_file = self._sounds.get()
+            if self._closed:
+                return
+            try:
+                self.sound_player(sound_file)
+            except Exception as e:
+                logger.warning(f"ไม่สามารถเล่นเสียง: {e}")
+            self._sound_busy = False
+            self.sounds_played += 1
+
+    def close(self, timeout=1.0):
+        """หยุด thread เล่นเสียง (เสียงที่กำลังเล่นอยู่ไม่ถูกตัด)"""
+        self._closed = True
+        self._sounds.put(None)
+        self._sound_thread.join(timeout)
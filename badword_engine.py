@@ -0,0 +1,1427 @@
+import copy
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import wordsegment  # type: ignore
+    WORDSEGMENT_AVAILABLE = True
+except ImportError:
+    wordsegment = None
+    WORDSEGMENT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# ไฟล์ compile แล้ว วางไว้ข้าง badwords.txt / badwords_en.txt
+COMPILED_WORDLIST_FILE = 'badwords.compiled'
+# เปลี่ยนเลขนี้เมื่อรูปแบบข้อมูลหรือการ normalize เปลี่ยน เพื่อให้ไฟล์เก่าถูกสร้างใหม่
+COMPILED_FORMAT_VERSION = 9
+_COMPILED_MAGIC = b'BWCOMPILED'
+# เลข generation ของ CompiledWordLists แต่ละชุด (ไม่ซ้ำกันภายใน process)
+_generation_counter = itertools.count(1)
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_REPEAT_RE = re.compile(r'(.)\1{2,}')
+# token ที่เป็นตัวเลขล้วน (อาจมีเครื่องหมายวรรคตอนปน) เช่น "5", "555555", "3:00" คือตัวเลขจริง ไม่ใช่ leetspeak
+# ลบทิ้งก่อนแปลง ไม่อย่างนั้น "5 hit combo" จะกลายเป็น "shitcombo" เมื่อต่อ token เข้าด้วยกัน
+_NUMBER_TOKEN_RE = re.compile(r'(?<!\S)(?:[^\w\s@$+]|[\d_])*\d(?:[^\w\s@$+]|[\d_])*(?!\S)')
+# ใช้คั่นข้อความตอน normalize ทีละหลายข้อความ (เป็น whitespace สำหรับ regex จึงเป็นขอบ token ด้วย)
+_BATCH_SEPARATOR = '\x1e'
+
+# ตัวเลข/สัญลักษณ์ที่มักใช้แทนตัวอักษร ("5h1t", "@$$")
+# ไม่รวม '!' เพราะใช้เป็นเครื่องหมายท้ายประโยคบ่อยกว่า ("fuck you!")
+LEET_MAP = {
+    '0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't',
+    '@': 'a', '$': 's', '+': 't',
+}
+
+# ช่วงอักษรไทยใน compact เป็นคู่ (start, end) ส่วนอักษรละตินเป็นคำที่ตัดออกมาแล้ว
+# (ตัวตรวจอังกฤษต้องใช้ string อยู่ดีสำหรับ lookup และ wordsegment)
+ScriptRuns = namedtuple('ScriptRuns', ['thai', 'latin'])
+_LATIN_RUN_RE = re.compile(r'[a-z]+')
+
+# ผลลัพธ์ของ TextNormalizer ที่ตัวตรวจไทยและอังกฤษใช้ร่วมกัน
+# text = ข้อความที่แปลงแล้ว (คั่นด้วย space เดียว), compact = ไม่มี space, tokens = แยกตาม space
+# squeezed = รูปที่ยุบตัวซ้ำเหลือตัวเดียว (NormalizedMessage) มีเฉพาะข้อความที่มีตัวซ้ำ 3 ตัวขึ้นไป ไม่อย่างนั้นเป็น None
+NormalizedMessage = namedtuple('NormalizedMessage', ['text', 'compact', 'tokens', 'squeezed'], defaults=(None,))
+
+
+def _normalized(text):
+    tokens = text.split()
+    return NormalizedMessage(' '.join(tokens), ''.join(tokens), tokens)
+
+
+def normalized_forms(normalized):
+    """รูปทั้งหมดของข้อความที่ต้องตรวจ (รูปหลัก และรูปที่ยุบตัวซ้ำเหลือตัวเดียวถ้ามี)"""
+    if normalized.squeezed is None:
+        return (normalized,)
+    return (normalized, normalized.squeezed)
+
+
+def tokenize(text):
+    """แยกข้อความเป็น token ภาษาอังกฤษ/ตัวเลข (ตัวพิมพ์เล็ก)"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def split_scripts(compact):
+    """แยกข้อความ compact เป็นช่วงภาษาไทยและภาษาอังกฤษ
+
+    หลัง normalize แล้ว compact มีแค่อักษรไทยกับ a-z จึงแบ่งได้ด้วยช่วงของ a-z อย่างเดียว
+    ข้อความ ASCII ล้วนตัดสินได้ทันทีด้วย str.isascii() ไม่ต้องเดิน regex
+    """
+    if compact.isascii():
+        return ScriptRuns((), (compact,) if compact else ())
+    thai, latin = [], []
+    position = 0
+    for match in _LATIN_RUN_RE.finditer(compact):
+        start, end = match.span()
+        if start > position:
+            thai.append((position, start))
+        latin.append(match.group())
+        position = end
+    if position < len(compact):
+        thai.append((position, len(compact)))
+    return ScriptRuns(thai, latin)
+
+
+class _TranslationTable(dict):
+    """ตาราง str.translate ที่เติม entry เองเมื่อเจอตัวอักษรใหม่ (คำนวณครั้งเดียวต่อตัวอักษร)"""
+
+    def __init__(self, leet_map):
+        super().__init__()
+        for char, replacement in leet_map.items():
+            self[ord(char)] = replacement
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if 'ก' <= char <= '๙':
+            result = char
+        elif char.isspace():
+            result = ' '
+        else:
+            lower = char.lower()
+            # เก็บเฉพาะ a-z เหมือน regex เดิม ตัวอื่น (ตัวคั่น, สัญลักษณ์, emoji) ลบทิ้ง
+            result = lower if len(lower) == 1 and 'a' <= lower <= 'z' else None
+        self[codepoint] = result
+        return result
+
+
+class TextNormalizer:
+    """แปลงข้อความให้อยู่ในรูปมาตรฐานครั้งเดียว ให้ตัวตรวจไทยและอังกฤษใช้ผลร่วมกัน
+
+    - ตัวพิมพ์เล็ก
+    - ลบตัวคั่นและสัญลักษณ์ ("ค-ว-า-ย", "s.h.i.t")
+    - แปลง leetspeak ("5h1t", "@$$") ยกเว้น token ที่เป็นตัวเลขล้วนซึ่งถูกลบทิ้ง ("5 hit", "555")
+    - ยุบตัวอักษรที่ซ้ำกันตั้งแต่ 3 ตัวขึ้นไปเหลือ 2 ตัว ("fuuuuck" -> "fuuck", "assss" -> "ass")
+      และเก็บรูปที่เหลือตัวเดียว ("fuck") ไว้ใน squeezed ให้ตัวตรวจลองทั้งสองรูป
+      (ยุบเหลือตัวเดียวอย่างเดียวจะทำให้ "ass" กลายเป็น "as" และ "booobs" กลายเป็น "bobs")
+
+    สามข้อแรกทำใน str.translate ครั้งเดียว ส่วนการยุบตัวซ้ำใช้ regex ที่ compile ไว้แล้ว
+    คำในไฟล์คำหยาบผ่าน normalizer ตัวเดียวกัน (ใช้แค่รูปหลัก) จึงเทียบกับข้อความได้ตรงกันเสมอ
+    """
+
+    def __init__(self, leet_map=LEET_MAP):
+        self._table = _TranslationTable(leet_map)
+        self._batch_table = _TranslationTable(leet_map)
+        self._batch_table[ord(_BATCH_SEPARATOR)] = _BATCH_SEPARATOR
+
+    def normalize_text(self, text):
+        """คืนค่าข้อความที่แปลงแล้ว (รูปหลัก ยังมี space)"""
+        return _REPEAT_RE.sub(r'\1\1', _NUMBER_TOKEN_RE.sub('', text).translate(self._table))
+
+    def normalize(self, message):
+        """คืนค่า NormalizedMessage ของข้อความ"""
+        return self._forms(_NUMBER_TOKEN_RE.sub('', message).translate(self._table))
+
+    @staticmethod
+    def _forms(translated):
+        if _REPEAT_RE.search(translated) is None:
+            return _normalized(translated)
+        return _normalized(_REPEAT_RE.sub(r'\1\1', translated))._replace(
+            squeezed=_normalized(_REPEAT_RE.sub(r'\1', translated)))
+
+    def normalize_many(self, messages):
+        """normalize หลายข้อความพร้อมกัน
+
+        ต่อข้อความทั้งหมดเป็น string เดียวแล้วลบ token ตัวเลขและ translate ครั้งเดียว
+        แทนการเรียกทีละข้อความ ผลลัพธ์เรียงตรงกับ messages
+        """
+        if not messages:
+            return []
+        if any(_BATCH_SEPARATOR in message for message in messages):
+            return [self.normalize(message) for message in messages]
+        joined = _NUMBER_TOKEN_RE.sub('', _BATCH_SEPARATOR.join(messages)).translate(self._batch_table)
+        texts = joined.split(_BATCH_SEPARATOR)
+        if _REPEAT_RE.search(joined) is None:
+            return [_normalized(text) for text in texts]
+        return [self._forms(text) for text in texts]
+
+
+class AhoCorasick:
+    """Automaton สำหรับค้นหาคำหลายคำพร้อมกันในรอบเดียว (Aho-Corasick)
+
+    สร้างครั้งเดียวตอนโหลดคำหยาบ แล้วสแกนข้อความได้ในเวลา O(ความยาวข้อความ)
+    โดยไม่ขึ้นกับจำนวนคำใน dictionary
+    pattern เป็นได้ทั้ง str (ทีละตัวอักษร) หรือ tuple (ทีละ token)
+    """
+
+    def __init__(self, patterns=()):
+        self._goto = [{}]     # transition ของแต่ละ state
+        self._fail = [0]      # failure link
+        self._output = [()]   # ค่าที่ match เมื่อมาถึง state นี้ (รวมตาม fail link แล้ว)
+        self._size = 0
+        for pattern in patterns:
+            self.add(pattern)
+        self.build()
+
+    def __len__(self):
+        return self._size
+
+    def add(self, pattern, value=None):
+        """เพิ่ม pattern (ต้องเรียก build() ใหม่หลังเพิ่มเสร็จ)"""
+        if not pattern:
+            return
+        state = 0
+        for symbol in pattern:
+            next_state = self._goto[state].get(symbol)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][symbol] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        if value is None:
+            value = pattern
+        if value not in self._output[state]:
+            self._output[state] = self._output[state] + (value,)
+            self._size += 1
+
+    def build(self):
+        """คำนวณ failure link ด้วย BFS"""
+        goto, fail, output = self._goto, self._fail, self._output
+        queue = deque()
+        for state in goto[0].values():
+            fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for symbol, next_state in goto[state].items():
+                queue.append(next_state)
+                f = fail[state]
+                while f and symbol not in goto[f]:
+                    f = fail[f]
+                fail[next_state] = goto[f].get(symbol, 0)
+                if output[fail[next_state]]:
+                    output[next_state] = output[next_state] + output[fail[next_state]]
+
+    def find_all(self, text, start=0, end=None):
+        """คืนค่า set ของทุก pattern ที่พบใน text (สแกนรอบเดียว)
+
+        start/end จำกัดช่วงที่สแกนได้ โดยไม่ต้อง slice text ออกมาเป็น string ใหม่
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        if start or end is not None:
+            text = itertools.islice(text, start, end)
+        for symbol in text:
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+    def to_data(self):
+        """ข้อมูลล้วนของ automaton ที่ build แล้ว (ค่าที่ match ต้องเป็น str) สำหรับบันทึกเป็น JSON"""
+        return {'goto': self._goto, 'fail': self._fail, 'output': self._output, 'size': self._size}
+
+    @classmethod
+    def from_data(cls, data):
+        automaton = cls.__new__(cls)
+        automaton._goto = [dict(transitions) for transitions in data['goto']]
+        automaton._fail = [int(state) for state in data['fail']]
+        automaton._output = [tuple(values) for values in data['output']]
+        automaton._size = int(data['size'])
+        if not len(automaton._goto) == len(automaton._fail) == len(automaton._output):
+            raise ValueError("Inconsistent automaton data")
+        return automaton
+
+    def find_first(self, text, start=0, end=None, exclude=frozenset()):
+        """คืนค่า pattern แรกที่พบ (ที่ไม่อยู่ใน exclude) หรือ None ถ้าไม่พบ หยุดสแกนทันทีที่เจอ"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        if start or end is not None:
+            text = itertools.islice(text, start, end)
+        for symbol in text:
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            for value in output[state]:
+                if value not in exclude:
+                    return value
+        return None
+
+
+class PhraseMatcher:
+    """จับคำหยาบที่มีหลายคำ เช่น "alabama hot pocket" หรือ "a s s"
+
+    ใช้ AhoCorasick ระดับ token เดินผ่าน token ของข้อความรอบเดียว
+    ไม่ต้องสแกนข้อความใหม่ทีละวลี
+    """
+
+    def __init__(self, phrases=(), tokenizer=tokenize):
+        self._automaton = AhoCorasick()
+        for phrase in phrases:
+            tokens = tuple(tokenizer(phrase))
+            if len(tokens) >= 2:
+                self._automaton.add(tokens, phrase)
+        self._automaton.build()
+
+    def __len__(self):
+        return len(self._automaton)
+
+    def find_all(self, tokens):
+        """คืนค่า set ของวลีต้นฉบับที่พบใน list ของ token"""
+        return self._automaton.find_all(tokens)
+
+    def to_data(self):
+        return self._automaton.to_data()
+
+    @classmethod
+    def from_data(cls, data):
+        matcher = cls.__new__(cls)
+        matcher._automaton = AhoCorasick.from_data(data)
+        return matcher
+
+
+def estimate_size(key, value):
+    """ประมาณขนาด (byte) ของ entry ใน cache รวม element ภายใน tuple/list"""
+    size = sys.getsizeof(key)
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        if isinstance(item, (tuple, list)):
+            stack.extend(item)
+    return size
+
+
+class LRUCache:
+    """Cache แบบ LRU จำกัดทั้งจำนวน entry และขนาดหน่วยความจำ (byte โดยประมาณ)
+
+    กำหนด ttl (วินาที) ได้ถ้าต้องการให้ entry หมดอายุ
+    นับ hit/miss/eviction ไว้ดูประสิทธิภาพ และ thread-safe
+    (worker thread อ่าน/เขียน ส่วน GUI thread อาจสั่ง clear ตอน reload)
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=4 * 1024 * 1024, ttl=None,
+                 size_of=estimate_size, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._size_of = size_of
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[2] is not None and entry[2] <= self._clock():
+                del self._data[key]
+                self.current_bytes -= entry[1]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self._size_of(key, value)
+        if size > self.max_bytes:
+            return  # ใหญ่เกินกว่าจะเก็บ
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._data[key] = (value, size, expires_at)
+            self.current_bytes += size
+            while len(self._data) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.current_bytes -= evicted[1]
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """สรุปสถิติของ cache"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self.current_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class LatencyHistogram:
+    """histogram ของเวลา (วินาที) แบบ bucket ลอการิทึม ใช้หน่วยความจำคงที่ไม่ว่าจะบันทึกกี่ครั้ง
+
+    bucket กว้างขึ้นทีละ 2^(1/8) (~9%) ตั้งแต่ 1 µs ถึง ~70 วินาที
+    percentile ที่อ่านได้จึงคลาดเคลื่อนไม่เกินความกว้างของ bucket นั้น
+    """
+
+    MIN_SECONDS = 1e-6
+    STEPS_PER_DOUBLING = 8
+    BUCKETS = 8 * 26
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds, count=1):
+        if seconds > self.MIN_SECONDS:
+            index = min(int(math.log2(seconds / self.MIN_SECONDS) * self.STEPS_PER_DOUBLING), self.BUCKETS - 1)
+        else:
+            index = 0
+        self.counts[index] += count
+        self.count += count
+        self.total += seconds * count
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """ค่าที่ percentile p (0-100) เป็นวินาที (ขอบบนของ bucket แต่ไม่เกินค่าสูงสุดที่เคยบันทึก)"""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100
+        running = 0
+        for index, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            if bucket_count and running >= rank:
+                upper = self.MIN_SECONDS * 2 ** ((index + 1) / self.STEPS_PER_DOUBLING)
+                return min(upper, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def state(self):
+        """ข้อมูลทั้งหมดในรูปที่ pickle ได้ (สำหรับส่งข้าม process)"""
+        return (list(self.counts), self.count, self.total, self.max)
+
+    def merge(self, state):
+        counts, count, total, maximum = state
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.count += count
+        self.total += total
+        self.max = max(self.max, maximum)
+
+
+class DetectionTimings:
+    """latency histogram ของแต่ละขั้นตอนในการตรวจจับ
+
+    normalize = แปลงข้อความ, thai = สแกน automaton คำไทย, segment = wordsegment,
+    english = lookup คำ/วลีอังกฤษ (ไม่รวม segment), total = ทั้งข้อความ
+    """
+
+    STAGES = ('normalize', 'thai', 'segment', 'english', 'total')
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+
+    def record(self, stage, seconds, count=1):
+        self.histograms[stage].record(seconds, count)
+
+    def summary(self):
+        """{stage: {'count', 'p50', 'p95', 'p99', 'mean'}} หน่วยเป็นวินาที"""
+        return {
+            stage: {
+                'count': histogram.count,
+                'p50': histogram.percentile(50),
+                'p95': histogram.percentile(95),
+                'p99': histogram.percentile(99),
+                'mean': histogram.mean(),
+            }
+            for stage, histogram in self.histograms.items()
+        }
+
+    def take(self):
+        """คืนค่าข้อมูลที่สะสมไว้แล้วเริ่มนับใหม่ (process ลูกส่งกลับมาให้ process หลัก merge)"""
+        states = {stage: histogram.state() for stage, histogram in self.histograms.items()}
+        self.reset()
+        return states
+
+    def merge(self, states):
+        for stage, state in states.items():
+            self.histograms[stage].merge(state)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+
+def levenshtein(a, b, max_distance=None):
+    """edit distance ระหว่าง a กับ b (หยุดเร็วถ้าเกิน max_distance แล้วคืน max_distance + 1)"""
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def _deletion_variants(word, max_distance):
+    """ทุกแบบที่ได้จากการลบตัวอักษรออกไม่เกิน max_distance ตัว (รวมคำเดิม)"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class FuzzyIndex:
+    """ค้นหาคำหยาบที่สะกดใกล้เคียง (edit distance ไม่เกิน max_distance)
+
+    ใช้ deletion-neighbourhood index (แบบ SymSpell): เก็บทุกแบบที่ลบตัวอักษรออกไม่เกิน k ตัว
+    ตอนค้นหาก็สร้างแบบลบของคำที่ค้น แล้วเทียบใน dict จึงไม่ต้องวนเทียบกับทุกคำใน dictionary
+    คำที่สั้นกว่า min_length ไม่ใส่ใน index เพราะคำสั้นๆ ใกล้เคียงกับคำปกติเยอะเกินไป
+    """
+
+    def __init__(self, words, max_distance=1, min_length=6):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self._index = {}      # แบบที่ลบตัวอักษรแล้ว -> [(รูปที่ normalize แล้ว, คำ)]
+        self.lengths = set()  # ความยาวคำทั้งหมดใน index (ใช้กำหนดขนาด window ตอนค้นแบบ substring)
+        for normalized, word in words:
+            if len(normalized) < min_length:
+                continue
+            self.lengths.add(len(normalized))
+            for variant in _deletion_variants(normalized, max_distance):
+                self._index.setdefault(variant, []).append((normalized, word))
+
+    def __len__(self):
+        return len(self._index)
+
+    def lookup(self, term):
+        """คืนค่า set ของคำที่ห่างจาก term ไม่เกิน max_distance"""
+        found = set()
+        if len(term) < self.min_length - self.max_distance:
+            return found
+        for variant in _deletion_variants(term, self.max_distance):
+            for normalized, word in self._index.get(variant, ()):
+                if word not in found and levenshtein(term, normalized, self.max_distance) <= self.max_distance:
+                    found.add(word)
+        return found
+
+    def find_in(self, text):
+        """ค้นหาแบบ substring (สำหรับภาษาไทยที่ไม่มี space) โดยเลื่อน window ตามความยาวคำใน index"""
+        found = set()
+        window_sizes = sorted({length + delta for length in self.lengths
+                               for delta in range(-self.max_distance, self.max_distance + 1)})
+        seen = set()
+        for size in window_sizes:
+            if size <= 0 or size > len(text):
+                continue
+            for start in range(len(text) - size + 1):
+                window = text[start:start + size]
+                if window not in seen:
+                    seen.add(window)
+                    found |= self.lookup(window)
+        return found
+
+
+class NgramPrefilter:
+    """กรองข้อความที่ไม่มีทางมีคำหยาบออกก่อนเข้าตัวตรวจ (fast reject)
+
+    เก็บ n-gram ตัวแรกของทุกคำหยาบ (รูปที่ normalize แล้ว) ไว้ใน set
+    ข้อความที่มีคำหยาบอยู่ ต้องมี n-gram ตัวแรกของคำนั้นอยู่ด้วยเสมอ
+    ถ้าไม่มี n-gram ไหนตรงเลยจึงข้ามทั้งตัวตรวจไทยและ wordsegment ได้อย่างปลอดภัย
+
+    คำที่สั้นกว่า n ตัวอักษรเก็บทั้งคำใน set เดียวกัน (เป็น gram ที่สั้นกว่า)
+    ข้อความจึงถูกดูไม่เกินหนึ่งรอบต่อความยาวของ gram ที่มี ไม่ขึ้นกับจำนวนคำใน dictionary
+    """
+
+    def __init__(self, words=(), n=4):
+        self.n = n
+        self._grams = set()
+        self._lengths = ()  # ความยาวของ gram ที่มีใน set (ยาวสุดก่อน)
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return len(self._grams)
+
+    def add(self, word):
+        gram = word[:self.n]
+        if gram:
+            self._grams.add(gram)
+            if len(gram) not in self._lengths:
+                self._lengths = tuple(sorted(set(self._lengths) | {len(gram)}, reverse=True))
+
+    def to_data(self):
+        return {'n': self.n, 'grams': sorted(self._grams)}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data['grams'], n=int(data['n']))
+
+    def with_words(self, words):
+        """คืน prefilter ใหม่ที่เพิ่มคำเข้าไป (ไม่แก้ตัวเดิม)"""
+        clone = NgramPrefilter(n=self.n)
+        clone._grams = set(self._grams)
+        clone._lengths = self._lengths
+        for word in words:
+            clone.add(word)
+        return clone
+
+    def may_contain(self, text):
+        """False = ไม่มีคำหยาบแน่นอน, True = อาจมี ต้องตรวจต่อ"""
+        grams = self._grams
+        for length in self._lengths:
+            for start in range(len(text) - length + 1):
+                if text[start:start + length] in grams:
+                    return True
+        return False
+
+
+def canonical_word(words, key):
+    """เลือกคำที่ใช้รายงานจากคำในไฟล์ที่ normalize แล้วได้ key เดียวกัน ("ass", "a55", "@$$" -> "ass")
+
+    คำที่เขียนตรงกับ key ก่อน แล้วจึงเป็นคำที่มีตัวที่ไม่ใช่ตัวอักษรน้อยที่สุด สั้นที่สุด และเรียงตามตัวอักษร
+    """
+    return min(words, key=lambda word: (word != key, sum(not char.isalpha() for char in word), len(word), word))
+
+
+class CompiledWordLists:
+    """คำหยาบไทย/อังกฤษที่ compile แล้ว พร้อมใช้ตรวจจับ
+
+    รวม normalizer, automaton คำไทย, lookup คำอังกฤษ และ phrase matcher ไว้ในก้อนเดียว
+    เพื่อ save ลงไฟล์และโหลดกลับมาได้โดยไม่ต้องสร้างใหม่
+
+    ถือเป็น snapshot ที่ไม่แก้ไขหลังสร้างเสร็จ การเพิ่ม/ลบคำใช้ with_changes()
+    ซึ่งคืน snapshot ใหม่ ให้ worker สลับ reference ทีเดียว (ตัวตรวจที่กำลังทำงานอยู่ยังใช้ชุดเดิมจนจบ)
+    """
+
+    def __init__(self, badwords_th, badwords_en):
+        self._set_words(badwords_th, badwords_en)
+        normalizer = self.normalizer
+
+        # automaton คำไทย (key เป็นรูปที่ normalize แล้ว, ค่าเป็นคำในไฟล์)
+        self.thai_automaton = AhoCorasick()
+        for word in self.badwords_th:
+            self.thai_automaton.add(normalizer.normalize(word).compact, word)
+        self.thai_automaton.build()
+
+        # คำอังกฤษคำเดียว: english_sources = รูปที่ normalize แล้ว -> คำในไฟล์ทุกคำที่ได้ key นี้ ("ass" -> {"ass", "a55", "@$$"})
+        # english_lookup = รูปที่ normalize แล้ว -> คำที่ใช้รายงาน (canonical_word ของคำเหล่านั้น)
+        sources = {}
+        for word in self.badwords_en:
+            if ' ' not in word:
+                sources.setdefault(normalizer.normalize(word).compact, set()).add(word)
+        self._set_english_sources({key: frozenset(words) for key, words in sources.items()})
+
+        # คำอังกฤษที่มีหลายคำ (มี space) ใช้ phrase matcher แยกต่างหาก
+        self.phrase_matcher = PhraseMatcher(self._phrase_base, tokenizer=self._phrase_tokens)
+
+        # prefilter จาก 4-gram ตัวแรกของทุกคำ (คำอังกฤษสั้นกว่า 3 ตัวไม่เคยถูกตรวจอยู่แล้ว)
+        self.prefilter = NgramPrefilter()
+        for word in self.badwords_th:
+            self.prefilter.add(normalizer.normalize(word).compact)
+        for key in self.english_lookup:
+            if len(key) >= 3:
+                self.prefilter.add(key)
+        for phrase in self._phrase_base:
+            self.prefilter.add(''.join(self._phrase_tokens(phrase)))
+
+        self._reset_overlay()
+
+    def _set_words(self, badwords_th, badwords_en):
+        self.badwords_th = set(badwords_th)
+        self.badwords_en = set(badwords_en)
+        self.generation = next(_generation_counter)
+        self.normalizer = TextNormalizer()
+        self._phrase_base = frozenset(word for word in self.badwords_en if ' ' in word)
+
+    def _set_english_sources(self, sources):
+        self.english_sources = sources
+        self.english_lookup = {key: canonical_word(words, key) for key, words in sources.items()}
+
+    def _reset_overlay(self):
+        # ส่วนที่เพิ่ม/ลบแบบ incremental (ยังไม่ได้รวมเข้า automaton หลัก)
+        self._thai_base = frozenset(self.badwords_th)
+        self.thai_extra = ()              # (รูปที่ normalize แล้ว, คำ) ที่เพิ่มทีหลัง
+        self.thai_removed = frozenset()
+        self.phrase_extra = frozenset()
+        self.extra_phrase_matcher = None
+        self.english_removed = frozenset()
+        self._fuzzy_indexes = None
+
+    def __getstate__(self):
+        # fuzzy index สร้างใหม่เมื่อต้องใช้ ไม่ต้องส่งข้าม process
+        state = self.__dict__.copy()
+        state['_fuzzy_indexes'] = None
+        return state
+
+    def to_data(self):
+        """ข้อมูลล้วน (dict/list/str/int) สำหรับบันทึกเป็นไฟล์ compile แบบ JSON
+
+        ไม่ใช้ pickle เพราะไฟล์ที่ใครก็เขียนทับได้จะกลายเป็นช่องทางรันโค้ด
+        เก็บเฉพาะชุดที่ compile ใหม่ทั้งหมด (ส่วนที่แก้แบบ incremental ไม่ถูกบันทึก)
+        """
+        return {
+            'badwords_th': sorted(self.badwords_th),
+            'badwords_en': sorted(self.badwords_en),
+            'thai_automaton': self.thai_automaton.to_data(),
+            'english_sources': {key: sorted(words) for key, words in self.english_sources.items()},
+            'phrase_matcher': self.phrase_matcher.to_data(),
+            'prefilter': self.prefilter.to_data(),
+        }
+
+    @classmethod
+    def from_data(cls, data):
+        """สร้างกลับจาก to_data() (ValueError/KeyError/TypeError ถ้าข้อมูลผิดรูปแบบ)"""
+        wordlists = cls.__new__(cls)
+        wordlists._set_words(data['badwords_th'], data['badwords_en'])
+        wordlists.thai_automaton = AhoCorasick.from_data(data['thai_automaton'])
+        wordlists._set_english_sources({str(key): frozenset(map(str, words))
+                                        for key, words in data['english_sources'].items() if words})
+        wordlists.phrase_matcher = PhraseMatcher.from_data(data['phrase_matcher'])
+        wordlists.prefilter = NgramPrefilter.from_data(data['prefilter'])
+        wordlists._reset_overlay()
+        return wordlists
+
+    def fuzzy_indexes(self, max_distance=1):
+        """(FuzzyIndex คำไทย, FuzzyIndex คำอังกฤษ) สร้างครั้งแรกที่เรียกใช้แล้วเก็บไว้"""
+        indexes = self._fuzzy_indexes
+        if indexes is None or indexes[0].max_distance != max_distance:
+            normalize = self.normalizer.normalize
+            thai_words = ((normalize(word).compact, word) for word in self.badwords_th)
+            english_words = self.english_lookup.items()
+            indexes = (FuzzyIndex(thai_words, max_distance), FuzzyIndex(english_words, max_distance))
+            self._fuzzy_indexes = indexes
+        return indexes
+
+    def _phrase_tokens(self, phrase):
+        return self.normalizer.normalize(phrase).tokens
+
+    def find_thai(self, compact, spans=None):
+        """คืนค่า set ของคำหยาบไทยที่พบในข้อความ (แบบไม่มี space)
+
+        spans = ช่วงอักษรไทยจาก split_scripts() ถ้าให้มาจะสแกนเฉพาะช่วงเหล่านั้น
+        (คำหยาบไทยเป็นอักษรไทยล้วน จึงไม่มีทางคร่อมช่วงภาษาอังกฤษ)
+        """
+        if spans is None:
+            found = self.thai_automaton.find_all(compact)
+        else:
+            found = set()
+            for start, end in spans:
+                found |= self.thai_automaton.find_all(compact, start, end)
+        for normalized_word, word in self.thai_extra:
+            if normalized_word in compact:
+                found.add(word)
+        if self.thai_removed:
+            found -= self.thai_removed
+        return found
+
+    def first_thai(self, compact, spans=None):
+        """คืนค่าคำหยาบไทยคำแรกที่พบ หรือ None (สำหรับตอบแค่ว่ามี/ไม่มี)"""
+        if spans is None:
+            spans = ((0, None),)
+        for start, end in spans:
+            word = self.thai_automaton.find_first(compact, start, end, self.thai_removed)
+            if word is not None:
+                return word
+        for normalized_word, word in self.thai_extra:
+            if normalized_word in compact:
+                return word
+        return None
+
+    def find_phrases(self, tokens):
+        """คืนค่า set ของวลีอังกฤษหลายคำที่พบใน token"""
+        found = self.phrase_matcher.find_all(tokens)
+        if self.extra_phrase_matcher is not None:
+            found |= self.extra_phrase_matcher.find_all(tokens)
+        if self.english_removed:
+            found -= self.english_removed
+        return found
+
+    def overlay_size(self):
+        """จำนวนคำที่แก้แบบ incremental ค้างอยู่ (มากไปควร compile ใหม่ทั้งชุด)"""
+        return (len(self.thai_extra) + len(self.thai_removed)
+                + len(self.phrase_extra) + len(self.english_removed))
+
+    def with_changes(self, language, added=(), removed=()):
+        """คืน snapshot ใหม่ที่เพิ่ม/ลบคำแบบ incremental
+
+        ใช้ automaton และ phrase matcher หลักร่วมกับชุดเดิม ไม่ต้อง compile ใหม่ทั้งหมด
+        language คือ 'th' หรือ 'en'
+        """
+        added = {word.strip().lower() for word in added if word.strip()}
+        removed = {word.strip().lower() for word in removed if word.strip()} - added
+        clone = copy.copy(self)
+        clone.generation = next(_generation_counter)
+        clone._fuzzy_indexes = None
+        normalizer = self.normalizer
+
+        if language == 'th':
+            clone.badwords_th = (self.badwords_th - removed) | added
+            extra = [(n, w) for n, w in self.thai_extra if w not in removed and w not in added]
+            extra += [(normalizer.normalize(w).compact, w) for w in sorted(added) if w not in self._thai_base]
+            clone.thai_extra = tuple(extra)
+            clone.thai_removed = (self.thai_removed - added) | (removed & self._thai_base)
+            clone.prefilter = self.prefilter.with_words(normalizer.normalize(w).compact for w in added)
+        elif language == 'en':
+            clone.badwords_en = (self.badwords_en - removed) | added
+            # key หายจาก lookup ก็ต่อเมื่อไม่เหลือคำในไฟล์ที่ได้ key นั้นแล้ว (ลบ "@$$" อย่างเดียว "ass" ยังต้องถูกตรวจ)
+            # set ของแต่ละ key ใช้ร่วมกับ snapshot เดิม จึงสร้าง frozenset ใหม่แทนการแก้ของเดิม
+            sources = dict(self.english_sources)
+            lookup = clone.english_lookup = dict(self.english_lookup)
+            touched = set()
+            for word in removed:
+                if ' ' not in word:
+                    key = normalizer.normalize(word).compact
+                    if word in sources.get(key, ()):
+                        sources[key] = sources[key] - {word}
+                        touched.add(key)
+            for word in added:
+                if ' ' not in word:
+                    key = normalizer.normalize(word).compact
+                    sources[key] = sources.get(key, frozenset()) | {word}
+                    touched.add(key)
+            for key in touched:
+                if sources[key]:
+                    lookup[key] = canonical_word(sources[key], key)
+                else:
+                    del sources[key]
+                    del lookup[key]
+            clone.english_sources = sources
+
+            added_phrases = {word for word in added if ' ' in word}
+            removed_phrases = {word for word in removed if ' ' in word}
+            clone.phrase_extra = (self.phrase_extra - removed_phrases) | (added_phrases - self._phrase_base)
+            clone.english_removed = (self.english_removed - added_phrases) | (removed_phrases & self._phrase_base)
+            clone.prefilter = self.prefilter.with_words(normalizer.normalize(w).compact for w in added)
+            if clone.phrase_extra != self.phrase_extra:
+                clone.extra_phrase_matcher = (
+                    PhraseMatcher(clone.phrase_extra, tokenizer=clone._phrase_tokens)
+                    if clone.phrase_extra else None
+                )
+        else:
+            raise ValueError(f"Unknown language: {language}")
+        return clone
+
+
+def read_word_file(path):
+    """อ่านไฟล์คำหยาบ คืนค่า (set ของคำ, bytes ดิบสำหรับทำ checksum)"""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        logger.warning(f"{path} not found.")
+        return set(), None
+    words = set()
+    for line in raw.decode('utf-8').splitlines():
+        if line.strip():
+            words.add(line.strip().lower())
+    return words, raw
+
+
+def wordlist_checksum(*raw_files):
+    """sha256 ของไฟล์คำหยาบทุกไฟล์ + เวอร์ชันรูปแบบไฟล์ compile"""
+    digest = hashlib.sha256(f'v{COMPILED_FORMAT_VERSION}'.encode('ascii'))
+    for raw in raw_files:
+        if raw is None:
+            digest.update(b'\x00missing')
+        else:
+            digest.update(len(raw).to_bytes(8, 'little'))
+            digest.update(raw)
+    return digest.hexdigest()
+
+
+def save_compiled_word_lists(compiled, path, checksum):
+    """บันทึกไฟล์ compile (header + JSON) แบบ atomic
+
+    เขียนลงไฟล์ชั่วคราวแล้ว os.replace เพื่อไม่ให้ process อื่นอ่านเจอไฟล์ที่เขียนไม่ครบ
+    """
+    header = _COMPILED_MAGIC + checksum.encode('ascii') + b'\n'
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(header)
+            f.write(json.dumps(compiled.to_data(), ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Cannot write compiled word lists to {path}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def load_compiled_word_lists(path, checksum):
+    """โหลดไฟล์ compile (cache ของผลการ compile ไม่ต้องอ่าน/normalize ไฟล์คำหยาบและสร้าง automaton ใหม่)
+
+    คืนค่า None ถ้าไม่มีไฟล์ ไฟล์เสีย หรือ checksum ไม่ตรง (ไฟล์เก่า)
+    เนื้อไฟล์เป็น JSON อ่านได้แค่ข้อมูล ไฟล์ที่ถูกแก้จึงทำได้อย่างมากแค่ให้โหลดไม่ผ่านแล้วสร้างใหม่
+    ข้อมูลถูก parse เป็น dict/list ของ Python ในแต่ละ process (ไม่ได้ map ใช้ร่วมกันระหว่าง process)
+    ที่ประหยัดคือเวลา compile ไม่ใช่หน่วยความจำ
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = _COMPILED_MAGIC + checksum.encode('ascii') + b'\n'
+            if f.read(len(header)) != header:
+                return None
+            return CompiledWordLists.from_data(json.loads(f.read()))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning(f"Cannot load compiled word lists from {path}: {e}")
+        return None
+
+
+def load_word_lists(thai_path='badwords.txt', english_path='badwords_en.txt', compiled_path=None):
+    """โหลดคำหยาบที่ compile แล้ว ถ้าไฟล์ compile เก่ากว่าไฟล์ข้อความจะสร้างใหม่อัตโนมัติ"""
+    badwords_th, raw_th = read_word_file(thai_path)
+    badwords_en, raw_en = read_word_file(english_path)
+    if compiled_path is None:
+        compiled_path = os.path.join(os.path.dirname(thai_path), COMPILED_WORDLIST_FILE)
+
+    checksum = wordlist_checksum(raw_th, raw_en)
+    compiled = load_compiled_word_lists(compiled_path, checksum)
+    if compiled is not None:
+        compiled.generation = next(_generation_counter)
+    else:
+        compiled = CompiledWordLists(badwords_th, badwords_en)
+        save_compiled_word_lists(compiled, compiled_path, checksum)
+    return compiled
+
+
+class WordSegmentModel:
+    """โหลด dictionary ของ wordsegment ครั้งเดียวต่อ process แล้วใช้ร่วมกันทุก worker
+
+    start_loading() โหลดใน background thread (เรียกซ้ำได้ จะโหลดแค่ครั้งแรก)
+    ระหว่างที่ยังโหลดไม่เสร็จ is_ready() เป็น False ให้ตัวตรวจจับข้ามการ segment ไปก่อน
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._done = threading.Event()  # โหลดจบแล้ว (สำเร็จหรือ error)
+        self._thread = None
+        self.error = None
+
+    def start_loading(self, background=True):
+        if not WORDSEGMENT_AVAILABLE:
+            return
+        with self._lock:
+            if self._thread is not None or self._ready.is_set():
+                return
+            self._thread = threading.Thread(target=self._load, name='wordsegment-loader', daemon=True)
+            self._thread.start()
+        if not background:
+            self.wait_until_ready()
+
+    def _load(self):
+        try:
+            started = time.perf_counter()
+            wordsegment.load()
+            logger.info(f"wordsegment dictionary loaded in {time.perf_counter() - started:.2f}s")
+            self._ready.set()
+        except Exception as e:
+            self.error = e
+            logger.error(f"Error loading wordsegment dictionary: {e}")
+        finally:
+            self._done.set()
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout=None):
+        """รอจนโหลดเสร็จ (ใช้ใน test/batch ที่ต้องการผล segment ครบ)"""
+        if not WORDSEGMENT_AVAILABLE:
+            return False
+        self.start_loading()
+        self._done.wait(timeout)
+        return self._ready.is_set()
+
+    def segment(self, text):
+        return wordsegment.segment(text)
+
+
+# instance เดียวที่ทุก worker ใน process ใช้ร่วมกัน
+wordsegment_model = WordSegmentModel()
+
+
+class BadWordDetector:
+    """ตัวตรวจจับคำหยาบ (ไม่ขึ้นกับ Qt) ใช้ได้ทั้งใน TwitchChatWorker และใน process ลูกของ DetectionPool
+
+    ถือชุดคำหยาบ (CompiledWordLists) ปัจจุบัน, cache ผล segment/ผลตรวจ และตั้งค่า fuzzy
+    on_error = callback(ข้อความ error) สำหรับแจ้ง error ออกไปนอกตัวตรวจ (เช่น signal ของ Qt)
+    """
+
+    def __init__(self, thai_path='badwords.txt', english_path='badwords_en.txt', wordlists=None, on_error=None):
+        self.thai_path = thai_path
+        self.english_path = english_path
+        self.on_error = on_error
+        # cache ผลของ wordsegment (ข้อความ spam/copypasta ซ้ำกันบ่อยมาก)
+        self.segment_cache = LRUCache(max_entries=5000, max_bytes=2 * 1024 * 1024)
+        # cache ผลตรวจทั้งข้อความ หมดอายุใน 60 วินาที
+        # ผลที่เก็บผูกกับ generation ของชุดคำหยาบ เพื่อให้ reload แล้วผลเก่าใช้ไม่ได้ทันที
+        self.verdict_cache = LRUCache(max_entries=10000, max_bytes=4 * 1024 * 1024, ttl=60)
+        # งาน reload/แก้คำหยาบทำใน background thread เดียว เรียงตามลำดับที่สั่ง
+        self.reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='wordlist-reload')
+        # Fuzzy matching (จับคำสะกดใกล้เคียง เช่น "ไอ้สัD") ปิดไว้เป็นค่าเริ่มต้น
+        self.fuzzy_matching = False
+        self.fuzzy_max_distance = 1
+        self._fuzzy_requested = False  # ค่าที่สั่งล่าสุด (อาจยังรอคิวใน reload_executor)
+        # สถิติของ n-gram prefilter (ข้อความที่ถูกคัดทิ้งก่อนเข้าตัวตรวจ)
+        # ตรวจได้จากหลาย thread พร้อมกัน (thread ตรวจจับ, detect_batch, is_offensive) จึงแก้ภายใต้ _stats_lock
+        self._stats_lock = threading.Lock()
+        self.prefilter_stats = {'checked': 0, 'rejected': 0, 'time_saved': 0.0}
+        self.avg_full_detection_time = 0.0  # เวลาเฉลี่ยของการตรวจเต็มรูปแบบ (วินาที)
+        # latency ของแต่ละขั้นตอน (None = ปิด ไม่มีการจับเวลาเลย)
+        self.timings = None
+        if wordlists is None:
+            self.load_bad_words()
+        else:
+            self.publish_wordlists(wordlists)
+
+    def _report_error(self, message):
+        if self.on_error is not None:
+            self.on_error(message)
+
+    def enable_timings(self, enabled=True):
+        """เปิด/ปิดการเก็บ latency histogram ของแต่ละขั้นตอน"""
+        if not enabled:
+            self.timings = None
+        elif self.timings is None:
+            self.timings = DetectionTimings()
+
+    # จำนวนคำที่แก้แบบ incremental ได้ก่อนจะ compile ใหม่ทั้งชุดใน background
+    MAX_WORDLIST_OVERLAY = 64
+
+    @property
+    def badwords_th(self):
+        return self.wordlists.badwords_th
+
+    @property
+    def badwords_en(self):
+        return self.wordlists.badwords_en
+
+    @property
+    def wordlist_generation(self):
+        return self.wordlists.generation
+
+    def load_bad_words(self):
+        # โหลดคำหยาบที่ compile แล้ว (normalizer + automaton) จากไฟล์ badwords.compiled
+        # ถ้าไฟล์ compile ไม่มีหรือเก่ากว่า badwords.txt / badwords_en.txt จะสร้างใหม่ให้อัตโนมัติ
+        self.publish_wordlists(load_word_lists(self.thai_path, self.english_path))
+
+        # ล้าง cache ทุกครั้งที่โหลดคำหยาบใหม่
+        self.segment_cache.clear()
+
+        return self.badwords_th, self.badwords_en
+
+    def publish_wordlists(self, wordlists):
+        """สลับชุดคำหยาบด้วยการเปลี่ยน reference ครั้งเดียว (atomic)
+
+        ตัวตรวจที่กำลังทำงานอยู่ถือ snapshot เดิมไว้จนจบข้อความ จึงไม่เห็นสถานะที่สร้างไม่เสร็จ
+        ผลใน verdict cache เดิมผูกกับ generation เก่า จึงใช้ไม่ได้ทันทีที่สลับ
+        """
+        if self.fuzzy_matching:
+            wordlists.fuzzy_indexes(self.fuzzy_max_distance)  # สร้าง index ให้เสร็จก่อนสลับ
+        self.wordlists = wordlists
+        self.verdict_cache.clear()
+
+    def reload_bad_words(self):
+        """โหลดคำหยาบใหม่จากไฟล์ใน background thread แล้วสลับเข้าไปทีเดียว (คืนค่า Future)"""
+        return self.reload_executor.submit(self.load_bad_words)
+
+    def apply_word_changes(self, language, added, removed):
+        """เพิ่ม/ลบคำจาก BadWordManagerDialog แบบ incremental ไม่ต้อง compile ใหม่ทั้งหมด (คืนค่า Future)"""
+        return self.reload_executor.submit(self._apply_word_changes, language, list(added), list(removed))
+
+    def _apply_word_changes(self, language, added, removed):
+        wordlists = self.wordlists.with_changes(language, added, removed)
+        self.publish_wordlists(wordlists)
+        logger.info(f"Applied word list changes ({language}): +{len(added)} -{len(removed)}")
+
+        # แก้แบบ incremental สะสมเยอะแล้ว compile ใหม่ทั้งชุด (ยังอยู่ใน background thread)
+        if wordlists.overlay_size() > self.MAX_WORDLIST_OVERLAY:
+            self.publish_wordlists(CompiledWordLists(wordlists.badwords_th, wordlists.badwords_en))
+
+    def set_fuzzy_matching(self, enabled):
+        """เปิด/ปิด fuzzy matching (คืนค่า Future)
+
+        ทั้งเปิดและปิดเข้าคิว reload_executor ตามลำดับที่สั่ง (เปิดต้องสร้าง index ใน background ก่อน)
+        ถ้าสลับเปิดแล้วปิดเร็วๆ งานเปิดที่ยังไม่ได้เริ่มจะถูกข้าม และไม่มีทางเปิดทับการปิดที่สั่งทีหลัง
+        """
+        self._fuzzy_requested = enabled
+
+        def apply():
+            if self._fuzzy_requested != enabled:
+                return  # มีคำสั่งใหม่กว่ารอคิวอยู่
+            if enabled:
+                self.wordlists.fuzzy_indexes(self.fuzzy_max_distance)
+            self.fuzzy_matching = enabled
+
+        return self.reload_executor.submit(apply)
+
+    def close(self):
+        """หยุด thread ของ reload_executor (งานที่เข้าคิวไว้แล้วยังทำจนเสร็จ แต่ไม่รอ)"""
+        self.reload_executor.shutdown(wait=False)
+
+    def segment_cached(self, text):
+        """เรียก wordsegment ผ่าน LRU cache (key คือข้อความที่ clean แล้ว)"""
+        words = self.segment_cache.get(text)
+        if words is None:
+            words = tuple(wordsegment_model.segment(text))
+            self.segment_cache.put(text, words)
+        return words
+
+    def detect_english_profanity(self, message, normalized=None, wordlists=None, runs=None):
+        """ตรวจจับคำหยาบภาษาอังกฤษด้วย wordsegment + badwords_en - ปรับปรุงแล้ว"""
+        try:
+            logger.debug(f"🔍 Debug: detect_english_profanity called with: '{message}'")
+            if wordlists is None:
+                wordlists = self.wordlists
+
+            # ขั้นตอนที่ 1: Normalize (ถ้า detect ทำมาให้แล้วก็ใช้ผลนั้นเลย)
+            if normalized is None:
+                normalized = wordlists.normalizer.normalize(message)
+            if runs is None:
+                runs = split_scripts(normalized.compact)
+
+            # ข้อความไทยล้วน ไม่มีอะไรให้ตรวจ
+            if not runs.latin:
+                return []
+            timings = self.timings
+            if timings is not None:
+                start_time = time.perf_counter()
+                segment_time = 0.0
+
+            # ขั้นตอนที่ 2: segment เฉพาะช่วงภาษาอังกฤษ ทีละช่วง
+            words_to_check = set(normalized.tokens)
+            words_to_check.update(runs.latin)
+            if wordsegment_model.is_ready():
+                try:
+                    if timings is not None:
+                        segment_start = time.perf_counter()
+                    # segment แต่ละช่วงที่ไม่มี space รวมกับคำที่แยกด้วย space
+                    for run in runs.latin:
+                        segmented_words = self.segment_cached(run)
+                        logger.debug(f"✂️ Segmented run: '{run}' -> {segmented_words}")
+                        words_to_check.update(segmented_words)
+                    if timings is not None:
+                        segment_time = time.perf_counter() - segment_start
+                        timings.record('segment', segment_time)
+
+                except Exception as e:
+                    logger.warning(f"⚠️ wordsegment error: {e}")
+            else:
+                logger.debug("❌ wordsegment not available (or still loading)")
+
+            # ขั้นตอนที่ 3: ตรวจสอบแต่ละคำ
+            found_words = []
+            for word in words_to_check:
+                if len(word) >= 3: 
+                    badword = wordlists.english_lookup.get(word)
+                    if badword is not None:
+                        found_words.append(badword)
+                        logger.info(f"🚨 Found English profanity: '{badword}'")
+
+            # ขั้นตอนที่ 4: ตรวจวลีหลายคำ เดินผ่าน token รอบเดียว
+            for phrase in wordlists.find_phrases(normalized.tokens):
+                found_words.append(phrase)
+                logger.info(f"🚨 Found English profanity phrase: '{phrase}'")
+
+            if timings is not None:
+                timings.record('english', time.perf_counter() - start_time - segment_time)
+            logger.debug(f"✅ Final result: {found_words}")
+            return found_words
+
+        except Exception as e:
+            logger.error(f"❌ Error in detect_english_profanity: {e}")
+            return []
+
+    def detect_thai_profanity(self, message, normalized=None, wordlists=None, runs=None):
+        """ตรวจจับคำหยาบภาษาไทย"""
+        try:
+            if wordlists is None:
+                wordlists = self.wordlists
+            if normalized is None:
+                normalized = wordlists.normalizer.normalize(message)
+            if runs is None:
+                runs = split_scripts(normalized.compact)
+
+            # ข้อความอังกฤษล้วน ไม่ต้องสแกนคำไทย
+            if not runs.thai:
+                return []
+
+            # ตรวจสอบคำหยาบไทยเฉพาะช่วงอักษรไทยของข้อความที่ลบสัญลักษณ์และ space แล้ว
+            found_words = wordlists.find_thai(normalized.compact, runs.thai)
+
+            return list(found_words)
+
+        except Exception as e:
+            logger.error(f"Error in Thai profanity detection: {e}")
+            return []
+
+    def detect_fuzzy_profanity(self, message, normalized=None, wordlists=None):
+        """ตรวจจับคำหยาบที่สะกดใกล้เคียง (edit distance ไม่เกิน fuzzy_max_distance)"""
+        try:
+            if wordlists is None:
+                wordlists = self.wordlists
+            if normalized is None:
+                normalized = wordlists.normalizer.normalize(message)
+
+            thai_index, english_index = wordlists.fuzzy_indexes(self.fuzzy_max_distance)
+            found_words = thai_index.find_in(normalized.compact)
+            for word in set(normalized.tokens) | {normalized.compact}:
+                found_words |= english_index.lookup(word)
+
+            if found_words:
+                logger.info(f"🚨 Found fuzzy profanity: {found_words}")
+            return list(found_words)
+
+        except Exception as e:
+            logger.error(f"Error in fuzzy profanity detection: {e}")
+            return []
+
+    def detect(self, message):
+        """ตรวจจับคำหยาบ"""
+        try:
+            # ใช้ชุดคำหยาบ snapshot เดียวตลอดทั้งข้อความ
+            wordlists = self.wordlists
+            timings = self.timings
+            if timings is None:
+                # normalize ครั้งเดียว แล้วส่งผลให้ทั้งตัวตรวจไทยและอังกฤษ
+                normalized = wordlists.normalizer.normalize(message)
+                return list(self.detect_normalized(message, normalized, wordlists))
+
+            start_time = time.perf_counter()
+            normalized = wordlists.normalizer.normalize(message)
+            normalized_time = time.perf_counter()
+            timings.record('normalize', normalized_time - start_time)
+            result = list(self.detect_normalized(message, normalized, wordlists))
+            timings.record('total', time.perf_counter() - start_time)
+            return result
+
+        except Exception as e:
+            logger.error(f"Error in bad word detection: {e}")
+            self._report_error(f"Detection error: {e}")
+            return []
+
+    def is_offensive(self, message):
+        """ตอบแค่ว่าข้อความมีคำหยาบหรือไม่ (สำหรับ auto-moderation)
+
+        หยุดทันทีที่เจอคำแรก และตรวจจากวิธีที่ถูกไปแพง:
+        automaton คำไทย -> lookup คำอังกฤษตรงตัว -> วลี -> wordsegment -> fuzzy
+        """
+        try:
+            wordlists = self.wordlists
+            normalized = wordlists.normalizer.normalize(message)
+            forms = normalized_forms(normalized)
+            fuzzy_matching = self.fuzzy_matching
+
+            if not fuzzy_matching and not any(wordlists.prefilter.may_contain(form.compact) for form in forms):
+                return False
+
+            cache_key = normalized.text
+            cache_tag = (wordlists.generation, fuzzy_matching)
+            cached = self.verdict_cache.get(cache_key)
+            if cached is not None and cached[0] == cache_tag:
+                return bool(cached[1])
+            segmentation_ready = wordsegment_model.is_ready() or not WORDSEGMENT_AVAILABLE
+
+            english_lookup = wordlists.english_lookup
+            for form in forms:
+                compact = form.compact
+                runs = split_scripts(compact)
+                if runs.thai and wordlists.first_thai(compact, runs.thai) is not None:
+                    return True
+
+                if runs.latin:
+                    for word in itertools.chain(form.tokens, runs.latin):
+                        if len(word) >= 3 and word in english_lookup:
+                            return True
+                    if wordlists.find_phrases(form.tokens):
+                        return True
+                    if wordsegment_model.is_ready():
+                        for run in runs.latin:
+                            for word in self.segment_cached(run):
+                                if len(word) >= 3 and word in english_lookup:
+                                    return True
+
+            if fuzzy_matching and self.detect_fuzzy_profanity(message, normalized, wordlists):
+                return True
+
+            # ผล "ไม่มีคำหยาบ" ครบถ้วนแล้ว เก็บลง cache ให้ตัวตรวจแบบเต็มใช้ร่วมได้
+            if segmentation_ready:
+                self.verdict_cache.put(cache_key, (cache_tag, ()))
+            return False
+
+        except Exception as e:
+            logger.error(f"Error in is_offensive: {e}")
+            self._report_error(f"Detection error: {e}")
+            return False
+
+    def detect_batch(self, messages):
+        """ตรวจจับคำหยาบทีละหลายข้อความ (สำหรับ backfill log / accuracy test)
+
+        normalize ทั้งชุดในครั้งเดียว และตรวจข้อความที่ซ้ำกันแค่ครั้งเดียว
+        คืนค่า list ของผลลัพธ์ เรียงตรงกับ messages
+        """
+        try:
+            messages = list(messages)
+            wordlists = self.wordlists
+            timings = self.timings
+            if timings is not None:
+                start_time = time.perf_counter()
+            normalized_list = wordlists.normalizer.normalize_many(messages)
+            if timings is not None and messages:
+                # normalize ทั้งชุดพร้อมกัน จึงเฉลี่ยเวลาให้แต่ละข้อความเท่าๆ กัน
+                normalize_share = (time.perf_counter() - start_time) / len(messages)
+                timings.record('normalize', normalize_share, len(messages))
+
+            results = []
+            results_by_text = {}
+            for message, normalized in zip(messages, normalized_list):
+                if timings is not None:
+                    message_start = time.perf_counter()
+                found_words = results_by_text.get(normalized.text)
+                if found_words is None:
+                    found_words = self.detect_normalized(message, normalized, wordlists)
+                    results_by_text[normalized.text] = found_words
+                results.append(list(found_words))
+                if timings is not None:
+                    timings.record('total', time.perf_counter() - message_start + normalize_share)
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in batch bad word detection: {e}")
+            self._report_error(f"Detection error: {e}")
+            return [[] for _ in messages]
+
+    def get_timing_summary(self):
+        """p50/p95/p99 ของแต่ละขั้นตอน (วินาที) หรือ None ถ้าไม่ได้เปิดการจับเวลา"""
+        return self.timings.summary() if self.timings is not None else None
+
+    def get_prefilter_stats(self):
+        """สถิติ prefilter: จำนวนที่ตรวจ, จำนวนที่คัดทิ้ง, อัตราคัดทิ้ง และเวลาที่ประหยัดได้ (ms)"""
+        with self._stats_lock:
+            stats = dict(self.prefilter_stats)
+        checked = stats['checked']
+        return {
+            'checked': checked,
+            'rejected': stats['rejected'],
+            'reject_rate': stats['rejected'] / checked if checked else 0.0,
+            'time_saved_ms': stats['time_saved'] * 1000,
+        }
+
+    def detect_normalized(self, message, normalized, wordlists):
+        """ตรวจจับคำหยาบจากข้อความที่ normalize แล้ว คืนค่าเป็น tuple"""
+        fuzzy_matching = self.fuzzy_matching
+        forms = normalized_forms(normalized)
+
+        # ข้อความที่ไม่มี n-gram ของคำหยาบเลย ข้ามตัวตรวจทั้งหมด (fuzzy ต้องตรวจทุกข้อความ)
+        if not fuzzy_matching:
+            rejected = not any(wordlists.prefilter.may_contain(form.compact) for form in forms)
+            with self._stats_lock:
+                stats = self.prefilter_stats
+                stats['checked'] += 1
+                if rejected:
+                    stats['rejected'] += 1
+                    stats['time_saved'] += self.avg_full_detection_time
+            if rejected:
+                return ()
+
+        # ข้อความซ้ำ (copypasta/raid) ใช้ผลจาก cache ได้เลย
+        # ผลผูกกับ generation ของชุดคำหยาบและโหมด fuzzy ที่ใช้ตอนตรวจ
+        cache_key = normalized.text
+        cache_tag = (wordlists.generation, fuzzy_matching)
+        cached = self.verdict_cache.get(cache_key)
+        if cached is not None and cached[0] == cache_tag:
+            return cached[1]
+        # ถ้า wordsegment ยังโหลดไม่เสร็จ ผลยังไม่ครบ จึงไม่เก็บลง cache
+        segmentation_ready = wordsegment_model.is_ready() or not WORDSEGMENT_AVAILABLE
+        start_time = time.perf_counter()
+
+        all_found_words = []
+        # ตรวจทั้งรูปหลักและรูปที่ยุบตัวซ้ำเหลือตัวเดียว ("fuuuuck" -> "fuuck" และ "fuck")
+        for form in forms:
+            # แยกช่วงไทย/อังกฤษครั้งเดียว แต่ละตัวตรวจดูเฉพาะช่วงของภาษาตัวเอง
+            runs = split_scripts(form.compact)
+
+            # ตรวจจับคำหยาบไทย
+            if runs.thai and self.timings is not None:
+                thai_start = time.perf_counter()
+                thai_words = self.detect_thai_profanity(message, form, wordlists, runs)
+                self.timings.record('thai', time.perf_counter() - thai_start)
+            else:
+                thai_words = self.detect_thai_profanity(message, form, wordlists, runs)
+            all_found_words.extend(thai_words)
+
+            # ตรวจจับคำหยาบอังกฤษ
+            english_words = self.detect_english_profanity(message, form, wordlists, runs)
+            all_found_words.extend(english_words)
+
+        # Fuzzy matching (ถ้าเปิด) ตรวจเฉพาะข้อความที่ยังไม่เจอคำหยาบแบบตรงตัว เพื่อประหยัดเวลา
+        if fuzzy_matching and not all_found_words:
+            all_found_words.extend(self.detect_fuzzy_profanity(message, normalized, wordlists))
+
+        # ลบคำซ้ำ
+        result = tuple(set(all_found_words))
+        # ค่าเฉลี่ยแบบ exponential ใช้ประมาณเวลาที่ prefilter ประหยัดได้
+        elapsed = time.perf_counter() - start_time
+        with self._stats_lock:
+            self.avg_full_detection_time += (elapsed - self.avg_full_detection_time) * 0.05
+        if segmentation_ready:
+            self.verdict_cache.put(cache_key, (cache_tag, result))
+        return result
@@ -0,0 +1,71 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+
+# ความถี่สูงสุดที่ view จะถูกอัพเดท (ประมาณ 60 fps)
+FRAME_INTERVAL_MS = 16
+
+
+class ChatLogModel(QAbstractListModel):
+    """รายการแชทขนาดคงที่ (ring buffer) สำหรับ QListView แถวที่ 0 คือบรรทัดใหม่ล่าสุด
+
+    add_lines() แค่เก็บบรรทัดไว้ก่อน แล้วรวมทุกบรรทัดที่มาในเฟรมเดียวกันเข้า model ทีเดียวด้วย QTimer
+    view จึงอัพเดทไม่เกินหนึ่งครั้งต่อเฟรม และวาดแค่แถวที่มองเห็น ไม่ต้องจัดวางข้อความทั้งหมดใหม่ทุกข้อความ
+    ต้องใช้ใน thread ของ GUI เท่านั้น
+    """
+
+    def __init__(self, capacity=1000, frame_interval_ms=FRAME_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self._lines = [None] * capacity
+        self._head = 0  # ตำแหน่งที่จะเขียนบรรทัดถัดไป
+        self._count = 0
+        self._pending = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(frame_interval_ms)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role not in (Qt.DisplayRole, Qt.ToolTipRole) or not index.isValid() or index.row() >= self._count:
+            return None
+        return self._lines[(self._head - 1 - index.row()) % self.capacity]
+
+    def lines(self):
+        """ทุกบรรทัดใน model เรียงจากใหม่ไปเก่า (ไม่รวมที่ยังรอเฟรมถัดไป)"""
+        return [self._lines[(self._head - 1 - row) % self.capacity] for row in range(self._count)]
+
+    def add_lines(self, lines):
+        """เพิ่มบรรทัด (เรียงจากเก่าไปใหม่) เข้าไปในเฟรมถัดไป"""
+        self._pending.extend(lines)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """นำบรรทัดที่รออยู่เข้า model ทันที (ปกติ timer เรียกให้ทุกเฟรม)"""
+        self._flush_timer.stop()
+        pending, self._pending = self._pending[-self.capacity:], []
+        if not pending:
+            return
+        # ลบแถวเก่าสุดท้ายรายการที่จะล้นออกไปก่อน แล้วแทรกแถวใหม่ที่ด้านบนทีเดียว
+        overflow = self._count + len(pending) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), self._count - overflow, self._count - 1)
+            self._count -= overflow
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), 0, len(pending) - 1)
+        for line in pending:
+            self._lines[self._head] = line
+            self._head = (self._head + 1) % self.capacity
+        self._count += len(pending)
+        self.endInsertRows()
+
+    def clear(self):
+        self._flush_timer.stop()
+        self._pending = []
+        self.beginResetModel()
+        self._lines = [None] * self.capacity
+        self._head = 0
+        self._count = 0
+        self.endResetModel()
@@ -0,0 +1,219 @@
+import functools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from badword_engine import BadWordDetector, DetectionTimings, load_word_lists, wordsegment_model
+
+logger = logging.getLogger(__name__)
+
+# ตัวตรวจจับของ process ลูก (สร้างครั้งเดียวตอนเริ่ม process)
+_process_detector = None
+
+
+def _init_process(thai_path, english_path, fuzzy_matching):
+    """initializer ของ process ลูก: โหลดชุดคำหยาบจาก badwords.compiled (ไม่ต้อง compile ใหม่) และ wordsegment ให้พร้อมก่อนรับงาน"""
+    global _process_detector
+    _process_detector = BadWordDetector(thai_path, english_path)
+    _process_detector.enable_timings()
+    if fuzzy_matching:
+        _process_detector.set_fuzzy_matching(True).result()
+    wordsegment_model.start_loading(background=False)
+
+
+def _detect_chunk(messages):
+    """ตรวจข้อความทั้งก้อนใน process ลูก
+
+    คืนค่า (list ของผลลัพธ์เรียงตรงกับ messages, latency ของก้อนนี้ให้ process หลัก merge)
+    """
+    results = [_process_detector.detect(message) for message in messages]
+    return results, _process_detector.timings.take()
+
+
+class _PendingVerdict:
+    __slots__ = ('channel', 'callback', 'result', 'done')
+
+    def __init__(self, channel, callback):
+        self.channel = channel
+        self.callback = callback
+        self.result = None
+        self.done = False
+
+
+class DetectionPool:
+    """ตรวจจับคำหยาบด้วยหลาย process (สำหรับช่องที่แชทเยอะจน thread เดียวไม่ทัน)
+
+    ข้อความที่ submit() เข้ามาจะถูกรวมเป็นก้อน (สูงสุด max_batch ข้อความ) แล้วกระจายไปยัง process ลูก
+    แต่ละ process โหลดชุดคำหยาบจาก badwords.compiled ที่ process หลักสร้างไว้ (ไม่ต้อง compile ซ้ำ แต่มีสำเนาของตัวเอง)
+    ผลลัพธ์ส่งกลับทาง callback ตามลำดับที่ submit ของแต่ละ channel เสมอ
+    แม้ก้อนหลังจะตรวจเสร็จก่อนก้อนแรกก็ตาม
+
+    callback ถูกเรียกจาก thread ภายในของ pool (ภายใต้ lock) จึงควรทำงานสั้นๆ เช่น emit signal
+    ถ้าส่งก้อนให้ process ลูกไม่ได้หรือ process ลูกพัง ก้อนนั้นถูกตรวจใน process หลักแทน (ไม่ส่งผลว่างออกไป)
+    submit() จะรอถ้ามีข้อความค้างอยู่ใน pool ครบ max_pending แล้ว (คิวข้างหน้าจัดการเรื่องล้นเอง)
+    """
+
+    def __init__(self, processes=None, thai_path='badwords.txt', english_path='badwords_en.txt',
+                 fuzzy_matching=False, max_batch=64, max_pending=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.thai_path = thai_path
+        self.english_path = english_path
+        self.fuzzy_matching = fuzzy_matching
+        self.max_batch = max_batch
+        self.max_pending = max_pending or self.processes * max_batch * 4
+        # latency ของทุกขั้นตอน รวมจากทุก process ลูก
+        self.timings = DetectionTimings()
+
+        self._lock = threading.Lock()
+        self._channels = {}  # channel -> deque ของ _PendingVerdict ที่ยังไม่ได้ส่งผล
+        self._pending = threading.BoundedSemaphore(self.max_pending)
+        self._queue = queue.SimpleQueue()
+        # จำกัดจำนวนก้อนที่ค้างใน process ลูก ระหว่างรอข้อความใหม่จะสะสมเป็นก้อนใหญ่ขึ้นเอง
+        self._slots = threading.BoundedSemaphore(self.processes * 2)
+        self._reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pool-reload')
+        # reload() สลับ executor ขณะที่ dispatcher ส่งงานอยู่ ต้องสลับและส่งงานภายใต้ lock เดียวกัน
+        self._executor_lock = threading.Lock()
+        self._executor = self._start_executor()
+        # ตัวตรวจใน process หลัก (สร้างเมื่อต้องใช้ครั้งแรก) สำหรับก้อนที่ process ลูกตรวจให้ไม่ได้
+        self._fallback_lock = threading.Lock()
+        self._fallback_detector = None
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='detection-pool', daemon=True)
+        self._dispatcher.start()
+
+    def _start_executor(self):
+        # สร้าง/อัปเดต badwords.compiled ใน process หลักก่อน process ลูกจะได้แค่โหลดไฟล์
+        load_word_lists(self.thai_path, self.english_path)
+        # ใช้ spawn ทุกระบบ (เหมือน Windows) ไม่ fork process ที่มี thread ทำงานอยู่
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_process,
+            initargs=(self.thai_path, self.english_path, self.fuzzy_matching),
+        )
+
+    def submit(self, channel, message, callback):
+        """ส่งข้อความเข้าคิวตรวจ callback(found_words) จะถูกเรียกตามลำดับของ channel"""
+        self._pending.acquire()
+        pending = _PendingVerdict(channel, callback)
+        with self._lock:
+            self._channels.setdefault(channel, deque()).append(pending)
+        self._queue.put((pending, message))
+
+    def detect_many(self, messages):
+        """ตรวจหลายข้อความพร้อมกันแบบรอผล (สำหรับ backfill log / benchmark)"""
+        messages = list(messages)
+        if not messages:
+            return []
+        chunk_size = max(1, min(self.max_batch, -(-len(messages) // (self.processes * 4))))
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        results = []
+        with self._executor_lock:
+            chunk_iter = self._executor.map(_detect_chunk, chunks)
+        for chunk_results, timings in chunk_iter:
+            results.extend(chunk_results)
+            self.timings.merge(timings)
+        return results
+
+    def _dispatch_loop(self):
+        while True:
+            self._slots.acquire()
+            item = self._queue.get()
+            if item is None:
+                self._slots.release()
+                return
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # ส่งงานก้อนสุดท้ายก่อนแล้วค่อยหยุด
+                    break
+                batch.append(item)
+
+            pendings = [pending for pending, _ in batch]
+            messages = [message for _, message in batch]
+            try:
+                with self._executor_lock:
+                    future = self._executor.submit(_detect_chunk, messages)
+            except Exception as e:
+                logger.error(f"Cannot submit detection batch, detecting in-process: {e}")
+                self._slots.release()
+                self._complete(pendings, self._detect_locally(messages))
+                continue
+            future.add_done_callback(functools.partial(self._on_batch_done, pendings, messages))
+
+    def _on_batch_done(self, pendings, messages, future):
+        self._slots.release()
+        try:
+            results, timings = future.result()
+            self.timings.merge(timings)
+        except Exception as e:
+            logger.error(f"Error in detection worker process, detecting in-process: {e}")
+            results = self._detect_locally(messages)
+        self._complete(pendings, results)
+
+    def _detect_locally(self, messages):
+        """ตรวจใน process หลัก (ใช้เมื่อ process ลูกตรวจให้ไม่ได้)"""
+        with self._fallback_lock:
+            if self._fallback_detector is None:
+                detector = BadWordDetector(self.thai_path, self.english_path)
+                if self.fuzzy_matching:
+                    detector.set_fuzzy_matching(True).result()
+                self._fallback_detector = detector
+            return [self._fallback_detector.detect(message) for message in messages]
+
+    def _drop_fallback_detector(self):
+        with self._fallback_lock:
+            if self._fallback_detector is not None:
+                self._fallback_detector.close()
+                self._fallback_detector = None
+
+    def _complete(self, pendings, results):
+        with self._lock:
+            for pending, result in zip(pendings, results):
+                pending.result = result
+                pending.done = True
+                self._pending.release()
+            # ส่งผลที่อยู่ต้นคิวของแต่ละ channel ออกไปจนกว่าจะเจอตัวที่ยังตรวจไม่เสร็จ
+            for channel in {pending.channel for pending in pendings}:
+                waiting = self._channels.get(channel)
+                while waiting and waiting[0].done:
+                    ready = waiting.popleft()
+                    try:
+                        ready.callback(ready.result)
+                    except Exception as e:
+                        logger.error(f"Error in detection callback ({channel}): {e}")
+                if waiting is not None and not waiting:
+                    del self._channels[channel]
+
+    def reload(self, fuzzy_matching=None):
+        """เริ่ม process ลูกชุดใหม่ด้วยไฟล์คำหยาบล่าสุด (หลังแก้ไขคำหยาบหรือสลับโหมด fuzzy) คืนค่า Future
+
+        ก้อนที่ส่งไปแล้วยังตรวจกับ process ชุดเดิมจนเสร็จ
+        """
+        def restart():
+            if fuzzy_matching is not None:
+                self.fuzzy_matching = fuzzy_matching
+            new_executor = self._start_executor()
+            with self._executor_lock:
+                old_executor, self._executor = self._executor, new_executor
+            # ก้อนที่ส่งให้ executor เดิมไปแล้วยังตรวจต่อจนเสร็จ (shutdown ไม่ยกเลิกงานที่รับไว้)
+            old_executor.shutdown(wait=False)
+            self._drop_fallback_detector()  # ชุดคำหยาบหรือโหมด fuzzy เปลี่ยน สร้างใหม่เมื่อต้องใช้
+            logger.info(f"Detection pool restarted ({self.processes} processes)")
+
+        return self._reload_executor.submit(restart)
+
+    def close(self):
+        """หยุด dispatcher และรอให้ process ลูกตรวจงานที่ค้างอยู่จนเสร็จ"""
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._reload_executor.shutdown(wait=True)
+        self._executor.shutdown(wait=True)
+        self._drop_fallback_detector()
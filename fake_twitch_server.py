@@ -0,0 +1,277 @@
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+from twitch_irc import parse_irc_message
+
+logger = logging.getLogger(__name__)
+
+# แชทสังเคราะห์ไทย/อังกฤษ (มีคำหยาบปนประมาณ 1 ใน 5) ใช้เมื่อไม่ได้ให้ไฟล์แชทที่บันทึกไว้
+SYNTHETIC_MESSAGES = [
+    "สวัสดีครับทุกคน",
+    "วันนี้อากาศดีมาก",
+    "hello everyone",
+    "nice stream today",
+    "เล่นเก่งมากเลยครับ",
+    "gg wp",
+    "ไอ้ควาย",
+    "มึงมัน stupid",
+    "555555555",
+    "what game is this",
+    "ขอเพลงหน่อยครับ",
+    "fuck you",
+    "lol that was close",
+    "สตรีมเมอร์น่ารักมาก",
+    "ไอ้เหี้ย เล่นห่วยจริง",
+    "first time here, love the vibe",
+    "PogChamp PogChamp",
+    "พรุ่งนี้ไลฟ์กี่โมงครับ",
+    "shit that hurts",
+    "ขอบคุณสำหรับสตรีมครับ",
+]
+
+
+def load_chat_lines(path):
+    """โหลดแชทที่บันทึกไว้ (หนึ่งข้อความต่อบรรทัด ข้ามบรรทัดว่าง)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class FakeTwitchServer:
+    """IRC server จำลองของ Twitch บนเครื่อง ใช้ทดสอบและวัด load โดยไม่ต้องต่อ Twitch จริง
+
+    รองรับคำสั่งที่ client ใช้: CAP REQ (ตอบ ACK), NICK, JOIN, PART, PING/PONG
+    PRIVMSG ถูกส่งเฉพาะ connection ที่ JOIN channel นั้นอยู่ บรรทัดอื่นส่งถึงทุก connection
+    (รวมถึงบรรทัดที่ parse ไม่ได้ ส่งไปตามที่ให้มา ใช้ทดสอบว่า client ทนข้อมูลเสียได้)
+
+    ถ้า rate > 0 จะส่งแชทสังเคราะห์ (หรือ messages ที่ให้มา) rate ข้อความต่อวินาที
+    กระจายไปทุก channel ที่มีคน JOIN อยู่ ทุกข้อความมี tag tmi-sent-ts (ms) เหมือน Twitch จริง ใช้วัด lag ได้
+      burst_every/burst_duration/burst_multiplier: ทุก burst_every วินาที เร่งเป็น rate * burst_multiplier นาน burst_duration วินาที
+      disconnect_every: ตัด connection แบบสุ่มหนึ่งอันทุก disconnect_every วินาที
+      ping_interval: ส่ง PING ทุก ping_interval วินาที (นับ PONG ที่ได้กลับไว้ใน pongs)
+    ถ้า client อ่านไม่ทัน การส่งจะช้าลงตาม (รอ drain) เหมือน TCP จริง
+
+    เรียก start()/close() ใน event loop ส่วน send()/drop_clients() เรียกจาก thread ไหนก็ได้
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, rate=0, messages=None,
+                 burst_every=None, burst_duration=1.0, burst_multiplier=5.0,
+                 disconnect_every=None, ping_interval=None, seed=None):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.messages = list(messages or SYNTHETIC_MESSAGES)
+        self.burst_every = burst_every
+        self.burst_duration = burst_duration
+        self.burst_multiplier = burst_multiplier
+        self.disconnect_every = disconnect_every
+        self.ping_interval = ping_interval
+        self.random = random.Random(seed)
+
+        self.received = []  # บรรทัดที่ client ส่งมา
+        self.writers = []
+        self.joined = {}  # writer -> set ของ channel ที่ JOIN อยู่ (ลบออกเมื่อ connection ปิด)
+        self.connections = 0
+        self.disconnects = 0  # จำนวน connection ที่ server เป็นฝ่ายตัด
+        self.sent = 0  # จำนวนข้อความแชทที่ stream ออกไปแล้ว
+        self.pongs = 0
+        self._server = None
+        self._loop = None
+        self._tasks = []
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.rate > 0:
+            self._tasks.append(self._loop.create_task(self._stream()))
+        if self.disconnect_every:
+            self._tasks.append(self._loop.create_task(self._inject_disconnects()))
+        if self.ping_interval:
+            self._tasks.append(self._loop.create_task(self._ping()))
+        logger.info(f"Fake Twitch IRC server listening on {self.host}:{self.port}")
+        return self
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._close_writers(self.writers)
+        self.writers = []
+        self.joined.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self.writers.append(writer)
+        joined = self.joined[writer] = set()
+        nick = 'justinfan'
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode('utf-8', errors='replace').rstrip('\r\n')
+                self.received.append(line)
+                command, _, argument = line.partition(' ')
+                if command == 'CAP':
+                    writer.write(f':tmi.twitch.tv CAP * ACK {argument[4:]}\r\n'.encode('utf-8'))
+                elif command == 'NICK':
+                    nick = argument
+                    writer.write(f':tmi.twitch.tv 001 {nick} :Welcome, GLHF!\r\n'.encode('utf-8'))
+                elif command in ('JOIN', 'PART'):
+                    for channel in argument.split(','):
+                        channel = channel.strip().lstrip('#')
+                        if command == 'JOIN':
+                            joined.add(channel)
+                        else:
+                            joined.discard(channel)
+                        writer.write(f':{nick}!{nick}@{nick}.tmi.twitch.tv {command} #{channel}\r\n'.encode('utf-8'))
+                elif command == 'PING':
+                    writer.write(f':tmi.twitch.tv PONG tmi.twitch.tv {argument}\r\n'.encode('utf-8'))
+                elif command == 'PONG':
+                    self.pongs += 1
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            self.joined.pop(writer, None)
+            if writer in self.writers:
+                self.writers.remove(writer)
+                self._close_writers([writer])
+
+    def send(self, *lines):
+        """ส่งบรรทัด IRC ไปหา client (PRIVMSG ส่งเฉพาะ connection ที่ JOIN channel นั้น)"""
+        def deliver():
+            for line in lines:
+                message = parse_irc_message(line)
+                if message is None:
+                    logger.debug(f"Forwarding unparseable line to every connection: {line!r}")
+                for writer in self.writers:
+                    if (message is None or message.command != 'PRIVMSG'
+                            or message.channel in self.joined.get(writer, ())):
+                        writer.write(f'{line}\r\n'.encode('utf-8'))
+        self._loop.call_soon_threadsafe(deliver)
+
+    def connection_of(self, channel):
+        """connection ที่ JOIN channel นี้อยู่ (None ถ้าไม่มี)"""
+        return next((writer for writer in self.writers if channel in self.joined.get(writer, ())), None)
+
+    def drop_clients(self, writers=None):
+        """ตัด connection (ค่าเริ่มต้นคือทุก connection)"""
+        if writers is None:
+            writers, self.writers = self.writers, []
+        else:
+            self.writers = [writer for writer in self.writers if writer not in writers]
+        self.disconnects += len(writers)
+        self._loop.call_soon_threadsafe(self._close_writers, writers)
+
+    @staticmethod
+    def _close_writers(writers):
+        for writer in writers:
+            writer.close()
+
+    def current_rate(self, elapsed):
+        """อัตราส่งข้อความ ณ เวลาที่ผ่านไป elapsed วินาที (รวมช่วง burst)"""
+        if self.burst_every and elapsed % self.burst_every >= self.burst_every - self.burst_duration:
+            return self.rate * self.burst_multiplier
+        return self.rate
+
+    def _chat_line(self, channel, text, sent_ms):
+        user = f'viewer{self.random.randrange(10000)}'
+        return (f'@id={self.sent:x};tmi-sent-ts={sent_ms};user-id={user[6:]} '
+                f':{user}!{user}@{user}.tmi.twitch.tv PRIVMSG #{channel} :{text}\r\n')
+
+    async def _stream(self, tick=0.01):
+        start_time = time.perf_counter()
+        last_time = start_time
+        due = 0.0
+        while True:
+            await asyncio.sleep(tick)
+            now = time.perf_counter()
+            due += self.current_rate(now - start_time) * (now - last_time)
+            last_time = now
+            # channel -> connection ที่ JOIN อยู่ (ยังไม่มีใคร JOIN ก็ไม่ส่ง)
+            targets = {}
+            for writer in self.writers:
+                for channel in self.joined.get(writer, ()):
+                    targets.setdefault(channel, []).append(writer)
+            if not targets:
+                due = 0.0
+                continue
+
+            count = int(due)
+            due -= count
+            channels = list(targets)
+            sent_ms = int(time.time() * 1000)
+            batches = {}
+            for _ in range(count):
+                channel = self.random.choice(channels)
+                line = self._chat_line(channel, self.random.choice(self.messages), sent_ms)
+                self.sent += 1
+                for writer in targets[channel]:
+                    batches.setdefault(writer, []).append(line)
+            for writer, lines in batches.items():
+                writer.write(''.join(lines).encode('utf-8'))
+            for writer in batches:
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+            # ถ้า client อ่านไม่ทันจนช้ากว่ากำหนด ไม่ต้องส่งย้อนหลังทีเดียว
+            last_time = max(last_time, time.perf_counter() - tick)
+
+    async def _inject_disconnects(self):
+        while True:
+            await asyncio.sleep(self.disconnect_every)
+            if self.writers:
+                writer = self.random.choice(self.writers)
+                logger.info("Injecting disconnect")
+                self.drop_clients([writer])
+
+    async def _ping(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            self.send('PING :tmi.twitch.tv')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Twitch IRC server สำหรับทดสอบ load แบบ offline')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6667)
+    parser.add_argument('--rate', type=float, default=100, help='ข้อความต่อวินาที (10 - 50000)')
+    parser.add_argument('--chat-file', help='ไฟล์แชทที่บันทึกไว้ หนึ่งข้อความต่อบรรทัด')
+    parser.add_argument('--burst-every', type=float, help='เกิด burst ทุกกี่วินาที')
+    parser.add_argument('--burst-duration', type=float, default=1.0)
+    parser.add_argument('--burst-multiplier', type=float, default=5.0)
+    parser.add_argument('--disconnect-every', type=float, help='ตัด connection ทุกกี่วินาที')
+    parser.add_argument('--ping-interval', type=float, default=60)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = FakeTwitchServer(
+        host=args.host, port=args.port, rate=args.rate,
+        messages=load_chat_lines(args.chat_file) if args.chat_file else None,
+        burst_every=args.burst_every, burst_duration=args.burst_duration,
+        burst_multiplier=args.burst_multiplier, disconnect_every=args.disconnect_every,
+        ping_interval=args.ping_interval,
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+from badword_engine import LatencyHistogram
+
+# นโยบายเมื่อคิวเต็ม
+#   block       = ผู้ส่งรอจนมีที่ว่าง (ไม่ทิ้งข้อความ แรงกดดันย้อนกลับไปที่ TCP ให้ server ส่งช้าลง)
+#                 บน event loop ใช้ put(block=False) + await wait_for_space() แทน ให้หยุดอ่านเฉพาะ connection นั้น
+#   drop_oldest = ทิ้งข้อความเก่าที่สุดในคิว (ตรวจแชทล่าสุดเสมอ)
+#   sample      = เมื่อคิวเกินครึ่ง รับข้อความใหม่ด้วยความน่าจะเป็นที่ลดลงตามที่ว่างที่เหลือ
+#                 ข้อความที่ได้ตรวจจึงเป็นตัวอย่างกระจายทั่วทั้งช่วงที่แชทท่วม แทนที่จะหายเป็นช่วงๆ
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'sample')
+
+
+def _set_done(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class IngestionQueue:
+    """คิวจำกัดขนาดระหว่างตัวอ่านแชท (event loop) กับ thread ที่ตรวจคำหยาบ
+
+    ตัวอ่านไม่ต้องรอการตรวจ (segment ช้าๆ ไม่ทำให้การอ่าน socket ค้าง) ยกเว้นนโยบาย block ตอนคิวเต็ม
+    ตัวอ่านบน event loop ห้ามรอแบบ block (ทุก connection, PING/PONG และ JOIN ค้างไปด้วย)
+    จึงใส่ด้วย put(block=False) แล้ว await wait_for_space() ก่อนอ่านจาก socket ต่อ
+    เก็บ metric ไว้ดูขนาดที่เหมาะสมของ pipeline: ความลึกของคิว, จำนวนที่ทิ้ง, เวลาที่ข้อความรอในคิว
+    """
+
+    def __init__(self, capacity=10000, policy='block'):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy} (expected one of {', '.join(OVERFLOW_POLICIES)})")
+        self.capacity = capacity
+        self.policy = policy
+        self.random = random.Random()
+        self._items = deque()  # (เวลาที่เข้าคิว, item)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+        self._space_waiters = []  # (loop, future) ของตัวอ่านบน event loop ที่รอคิวว่าง
+        self.lag = LatencyHistogram()
+        self.enqueued = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item, block=True):
+        """เพิ่ม item เข้าคิว คืนค่า False ถ้า item นี้ถูกทิ้ง (คิวเต็มหรือปิดแล้ว)
+
+        block=False (เรียกจาก event loop): นโยบาย block จะไม่รอ แต่รับเกินความจุไว้ก่อน
+        ผู้เรียกต้อง await wait_for_space() ก่อนอ่านข้อมูลเพิ่ม คิวจึงเกินได้ไม่เกินหนึ่งก้อนที่อ่านมาต่อ connection
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            depth = len(self._items)
+            if depth >= self.capacity:
+                if self.policy == 'block':
+                    while block and len(self._items) >= self.capacity and not self._closed:
+                        self._not_full.wait()
+                    if self._closed:
+                        return False
+                elif self.policy == 'drop_oldest':
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    self.dropped += 1
+                    return False
+            elif self.policy == 'sample' and depth * 2 > self.capacity:
+                if self.random.random() >= 2 * (1 - depth / self.capacity):
+                    self.dropped += 1
+                    return False
+
+            self._items.append((time.perf_counter(), item))
+            self.enqueued += 1
+            if len(self._items) > self.max_depth:
+                self.max_depth = len(self._items)
+            self._not_empty.notify()
+            return True
+
+    def get_batch(self, max_items=64, timeout=None):
+        """ดึง item ออกได้สูงสุด max_items (รอจนมีอย่างน้อยหนึ่งตัว)
+
+        คืนค่า [] เมื่อครบ timeout และ None เมื่อคิวปิดแล้ว
+        """
+        with self._lock:
+            if not self._items and not self._closed:
+                self._not_empty.wait(timeout)
+            if self._closed:
+                return None
+            now = time.perf_counter()
+            batch = []
+            while self._items and len(batch) < max_items:
+                enqueued_at, item = self._items.popleft()
+                self.lag.record(now - enqueued_at)
+                batch.append(item)
+            if batch:
+                self._not_full.notify_all()
+                if len(self._items) < self.capacity:
+                    self._wake_space_waiters()
+            return batch
+
+    async def wait_for_space(self):
+        """รอ (แบบ asyncio) จนคิวมีที่ว่างหรือถูกปิด คืนค่าทันทีถ้ายังไม่เต็ม"""
+        with self._lock:
+            if len(self._items) < self.capacity or self._closed:
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._space_waiters.append((loop, future))
+        await future
+
+    def _wake_space_waiters(self):
+        # เรียกขณะถือ lock อยู่ (จาก thread ตรวจจับหรือ close)
+        waiters, self._space_waiters = self._space_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_set_done, future)
+            except RuntimeError:
+                pass  # event loop ปิดไปแล้ว
+
+    def close(self):
+        """ปิดคิว ทิ้งที่ค้างอยู่ และปลุกทุกคนที่รออยู่"""
+        with self._lock:
+            self._closed = True
+            self._items.clear()
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+            self._wake_space_waiters()
+
+    def metrics(self):
+        """{'policy', 'capacity', 'depth', 'max_depth', 'enqueued', 'dropped', 'lag': {'count', 'p50', 'p95', 'p99', 'mean'}}
+        เวลา lag เป็นวินาที
+        """
+        with self._lock:
+            return {
+                'policy': self.policy,
+                'capacity': self.capacity,
+                'depth': len(self._items),
+                'max_depth': self.max_depth,
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'lag': {
+                    'count': self.lag.count,
+                    'p50': self.lag.percentile(50),
+                    'p95': self.lag.percentile(95),
+                    'p99': self.lag.percentile(99),
+                    'mean': self.lag.mean(),
+                },
+            }
+
+    def reset_metrics(self):
+        with self._lock:
+            self.lag.reset()
+            self.enqueued = 0
+            self.dropped = 0
+            self.max_depth = len(self._items)
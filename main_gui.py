@@ -1,26 +1,28 @@
 import sys
 import os
-import time
-import socket
 import logging
+import functools
+import threading
 from collections import deque
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QPushButton, QLabel, QTextEdit, QVBoxLayout, QHBoxLayout,
-    QFileDialog, QGroupBox, QGridLayout, QMessageBox, QFrame, QDialog, QListWidget, QLineEdit, QSystemTrayIcon, QStyle, QCheckBox, QTabWidget
+    QApplication, QWidget, QPushButton, QLabel, QListView, QVBoxLayout, QHBoxLayout,
+    QFileDialog, QGroupBox, QGridLayout, QMessageBox, QFrame, QDialog, QListWidget, QLineEdit, QSystemTrayIcon, QStyle, QCheckBox, QTabWidget, QComboBox
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread, QObject, QMutex
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QObject, QMutex, QCoreApplication
 from PyQt5.QtGui import QFont
-import winsound
 from datetime import datetime
 import re
 import pandas as pd
-
-try:
-    from wordsegment import load, segment # type: ignore
-    WORDSEGMENT_AVAILABLE = True
+from alert_scheduler import AlertScheduler
+from badword_engine import WORDSEGMENT_AVAILABLE, BadWordDetector, wordsegment_model
+from chat_view import ChatLogModel
+from detection_pool import DetectionPool
+from ingestion_queue import OVERFLOW_POLICIES, IngestionQueue
+from twitch_irc import TWITCH_IRC_HOST, TWITCH_IRC_PORT, TwitchConnectionManager, normalize_channel, shared_event_loop
+
+if WORDSEGMENT_AVAILABLE:
     print("wordsegment imported successfully")
-except ImportError:
-    WORDSEGMENT_AVAILABLE = False
+else:
     print("wordsegment not available, falling back to basic detection")    
 
 # Configure logging at the beginning of the script
@@ -30,21 +32,95 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# จำนวนบรรทัดที่แต่ละช่องแสดงผลเก็บไว้ (ring buffer ขนาดคงที่)
+CHAT_VIEW_CAPACITY = 1000
+BADWORD_VIEW_CAPACITY = 500
+
+# ส่งข้อความ/ผลตรวจให้ GUI เป็นก้อน ทุก 100 ms หรือเมื่อครบ 500 รายการ (แล้วแต่อย่างไหนถึงก่อน)
+SIGNAL_FLUSH_INTERVAL_MS = 100
+SIGNAL_FLUSH_MAX_ITEMS = 500
+
+
+class SignalBatch:
+    """บัฟเฟอร์ของ signal ที่ส่ง list ของรายการทีเดียว แทนการ emit ทีละรายการ
+
+    add() เรียกจาก thread ไหนก็ได้ ครบ max_items จะ emit ทันที ส่วนที่เหลือรอ flush()
+    emit ภายใต้ lock เพื่อให้ก้อนออกไปตามลำดับ (ฝั่งรับควรต่อแบบ Qt.QueuedConnection)
+    """
+
+    def __init__(self, signal, max_items=SIGNAL_FLUSH_MAX_ITEMS):
+        self.signal = signal
+        self.max_items = max_items
+        self._items = []
+        self._lock = threading.Lock()
+
+    def add(self, item):
+        with self._lock:
+            self._items.append(item)
+            if len(self._items) >= self.max_items:
+                self._emit()
+
+    def flush(self):
+        with self._lock:
+            if self._items:
+                self._emit()
+
+    def _emit(self):
+        items, self._items = self._items, []
+        self.signal.emit(items)
+
+
 class TwitchChatWorker(QObject):
-    """Worker class สำหรับจัดการ Twitch chat connection"""
-    message_received = pyqtSignal(str, str)  # username, message
-    bad_word_detected = pyqtSignal(str, str, list)  # username, message, bad_words
-    connection_status = pyqtSignal(bool, str)  # connected, status_message
+    """Worker class สำหรับจัดการ Twitch chat connection
+
+    ข้อความและผลตรวจส่งให้ GUI เป็นก้อน (messages_received, bad_words_detected) ไม่ใช่ทีละข้อความ
+    แชทหลายพันข้อความต่อวินาทีจึงไม่ทำให้ event loop ของ GUI มี event ล้น
+    """
+    messages_received = pyqtSignal(list)  # [(username, message), ...]
+    bad_words_detected = pyqtSignal(list)  # [(username, message, bad_words), ...]
+    connection_status = pyqtSignal(bool, str)  # connected, status_message (ของ connection ที่ส่งข้อความนั้น)
+    listening_stopped = pyqtSignal()  # IRC client ทุก connection หยุดแล้ว (สั่งหยุดหรือเลิกพยายามต่อใหม่)
     chat_stats = pyqtSignal(int, int)  # total_messages, bad_word_count
     error_occurred = pyqtSignal(str)  # error message
     
-    def __init__(self, channel_name):
+    def __init__(self, channel_names, detection_pool=None, event_loop=None,
+                 queue_capacity=10000, overflow_policy='block'):
         super().__init__()
+        self.message_batch = SignalBatch(self.messages_received)
+        self.bad_word_batch = SignalBatch(self.bad_words_detected)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(SIGNAL_FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush_signals)
+        self.last_stats = None
         self.logger = logging.getLogger(__name__) 
-        self.channel_name = channel_name.lower()
+        # รับชื่อเดียว ("ninja") หรือหลายชื่อ (["ninja", "shroud"]) ทุก channel ใช้ connection และตัวตรวจร่วมกัน
+        if isinstance(channel_names, str):
+            channel_names = [channel_names]
+        self.channels = []
+        for channel in channel_names:
+            channel = normalize_channel(channel)
+            if channel and channel not in self.channels:
+                self.channels.append(channel)
+        # สถิติแยกตาม channel: {channel: {'total_messages': int, 'bad_word_count': int}}
+        self.channel_stats = {channel: self._empty_channel_stats() for channel in self.channels}
+        # DetectionPool (ถ้ามี) ตรวจคำหยาบใน process อื่น ไม่ให้ GIL จำกัดไว้ที่ core เดียว
+        self.detection_pool = detection_pool
+        # IRC connection ทำงานบน asyncio event loop ร่วม (ไม่มี thread ต่อ channel)
+        # channel จำนวนมากถูกกระจายไปหลาย connection และ JOIN ตามอัตราที่ Twitch กำหนด
+        self.event_loop = event_loop or shared_event_loop
+        self.irc_client = None
         self.running = False
-        self.socket = None
-        self.badwords_th, self.badwords_en = self.load_bad_words()
+        # ตัวอ่านแชทส่งข้อความเข้าคิวจำกัดขนาด แล้ว thread แยกดึงไปตรวจ (segment ช้าไม่ทำให้การอ่าน socket ค้าง)
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.queue_capacity = queue_capacity
+        self.overflow_policy = overflow_policy
+        self.ingestion_queue = None
+        self.detection_thread = None
+        # ตัวตรวจจับคำหยาบ (ไม่ขึ้นกับ Qt) error ระหว่างตรวจส่งออกทาง signal error_occurred
+        self.detector = BadWordDetector(on_error=self.error_occurred.emit)
+        # เก็บ latency ของแต่ละขั้นตอนทุกข้อความ ให้ Dashboard แสดง p50/p95/p99
+        self.detector.enable_timings()
         self.total_messages = 0
         self.bad_word_count = 0
         
@@ -56,318 +132,266 @@ class TwitchChatWorker(QObject):
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 5
     
-        # โหลด wordsegment dictionary
-        if WORDSEGMENT_AVAILABLE:
-            try:
-                load()  # โหลด dictionary ครั้งแรก
-                print("wordsegment dictionary loaded successfully")
-            except Exception as e:
-                print(f"Error loading wordsegment dictionary: {e}")
+        # โหลด wordsegment dictionary ครั้งเดียวต่อ process ใน background thread
+        # ระหว่างรอ ตัวตรวจจับอังกฤษจะใช้แค่คำที่แยกด้วย space ไปก่อน (ไม่ block การเชื่อมต่อ)
+        wordsegment_model.start_loading()
         
+    @property
+    def wordlists(self):
+        return self.detector.wordlists
+    
+    @property
+    def badwords_th(self):
+        return self.detector.badwords_th
+    
+    @property
+    def badwords_en(self):
+        return self.detector.badwords_en
+    
+    @property
+    def wordlist_generation(self):
+        return self.detector.wordlist_generation
+    
+    @property
+    def segment_cache(self):
+        return self.detector.segment_cache
+    
+    @property
+    def verdict_cache(self):
+        return self.detector.verdict_cache
+    
     def load_bad_words(self):
-        # โหลดแยก
-        badwords_th = set()
-        badwords_en = set()
-        
-        # โหลดคำไทย
-        try:
-            with open('badwords.txt', 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        badwords_th.add(line.strip().lower())
-        except FileNotFoundError:
-            self.logger.warning("Thai badwords.txt not found.")
-        
-        # โหลดคำอังกฤษ
-        try:
-            with open('badwords_en.txt', 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        badwords_en.add(line.strip().lower())
-        except FileNotFoundError:
-            self.logger.warning("English badwords_en.txt not found.")
-        
-        return badwords_th, badwords_en
+        return self.detector.load_bad_words()
+    
+    def reload_bad_words(self):
+        """โหลดคำหยาบใหม่จากไฟล์ใน background thread แล้วสลับเข้าไปทีเดียว (คืนค่า Future)"""
+        return self.detector.reload_bad_words()
+    
+    def apply_word_changes(self, language, added, removed):
+        """เพิ่ม/ลบคำจาก BadWordManagerDialog แบบ incremental (คืนค่า Future)"""
+        return self.detector.apply_word_changes(language, added, removed)
+    
+    def set_fuzzy_matching(self, enabled):
+        """เปิด/ปิด fuzzy matching (สร้าง index ใน background ก่อนเปิดใช้)"""
+        return self.detector.set_fuzzy_matching(enabled)
     
     def detect_english_profanity(self, message):
-        """ตรวจจับคำหยาบภาษาอังกฤษด้วย wordsegment + badwords_en - ปรับปรุงแล้ว"""
-        try:
-            self.logger.debug(f"🔍 Debug: detect_english_profanity called with: '{message}'")
-            
-            # ขั้นตอนที่ 1: Clean message
-            cleaned_message = re.sub(r'[^a-zA-Z\s]', '', message.lower())
-            self.logger.debug(f"🧹 Cleaned message: '{cleaned_message}'")
-            
-            # ขั้นตอนที่ 2: วิธีใหม่ - ใช้ wordsegment กับข้อความทั้งหมดเลย
-            if WORDSEGMENT_AVAILABLE:
-                try:
-                    # ลบ space ออกแล้ว segment ทั้งหมด
-                    message_no_space = cleaned_message.replace(' ', '')
-                    segmented_words = segment(message_no_space)
-                    self.logger.debug(f"✂️ Segmented entire message: '{message_no_space}' -> {segmented_words}")
-                    
-                    # รวมกับคำที่แยกด้วย space ด้วย (เผื่อคำปกติ)
-                    normal_words = cleaned_message.split()
-                    words_to_check = list(set(segmented_words + normal_words))  # ลบคำซ้ำ
-                    self.logger.debug(f"🎯 Final words to check: {words_to_check}")
-                    
-                except Exception as e:
-                    self.logger.warning(f"⚠️ wordsegment error: {e}")
-                    words_to_check = cleaned_message.split()
-            else:
-                self.logger.debug("❌ wordsegment not available")
-                words_to_check = cleaned_message.split()
-            
-            # ขั้นตอนที่ 3: ตรวจสอบแต่ละคำ
-            found_words = []
-            for word in words_to_check:
-                if len(word) >= 3: 
-                    if word in self.badwords_en:
-                        found_words.append(word)
-                        self.logger.info(f"🚨 Found English profanity: '{word}'")
-            
-            self.logger.debug(f"✅ Final result: {found_words}")
-            return found_words
-            
-        except Exception as e:
-            self.logger.error(f"❌ Error in detect_english_profanity: {e}")
-            return []
-                  
+        return self.detector.detect_english_profanity(message)
+    
     def detect_thai_profanity(self, message):
-        """ตรวจจับคำหยาบภาษาไทย"""
-        try:
-            found_words = set()
-            message_lower = message.lower()
-            message_clean = re.sub(r'[^a-zA-Zก-๙\s]', '', message_lower)
-            message_clean_no_space = message_clean.replace(' ', '')
-            
-            # ตรวจสอบคำหยาบไทยกับข้อความที่ลบสัญลักษณ์และ space แล้ว
-            for badword in self.badwords_th:
-                if badword in message_clean_no_space:
-                    found_words.add(badword)
-            
-            return list(found_words)
-            
-        except Exception as e:
-            self.logger.error(f"Error in Thai profanity detection: {e}")
-            return []
-        
+        return self.detector.detect_thai_profanity(message)
+    
     def optimized_detect_bad_words(self, message):
-        """ตรวจจับคำหยาบ"""
-        try:
-            all_found_words = []
-            
-            # ตรวจจับคำหยาบไทย
-            thai_words = self.detect_thai_profanity(message)
-            all_found_words.extend(thai_words)
-            
-            # ตรวจจับคำหยาบอังกฤษ
-            english_words = self.detect_english_profanity(message)
-            all_found_words.extend(english_words)
-            
-            # ลบคำซ้ำ
-            return list(set(all_found_words))
-            
-        except Exception as e:
-            self.logger.error(f"Error in optimized bad word detection: {e}")
-            self.error_occurred.emit(f"Detection error: {e}")
-            return []
+        """ตรวจจับคำหยาบ คืนค่า list ของคำที่พบ"""
+        return self.detector.detect(message)
+    
+    def is_offensive(self, message):
+        """ตอบแค่ว่าข้อความมีคำหยาบหรือไม่ (หยุดทันทีที่เจอคำแรก)"""
+        return self.detector.is_offensive(message)
+    
+    def detect_batch(self, messages):
+        """ตรวจจับคำหยาบทีละหลายข้อความ คืนค่า list ของผลลัพธ์เรียงตรงกับ messages"""
+        return self.detector.detect_batch(messages)
+    
+    def get_prefilter_stats(self):
+        return self.detector.get_prefilter_stats()
+    
+    def reset_timings(self):
+        timings = self.detection_pool.timings if self.detection_pool is not None else self.detector.timings
+        if timings is not None:
+            timings.reset()
+        if self.ingestion_queue is not None:
+            self.ingestion_queue.reset_metrics()
+    
+    def get_queue_metrics(self):
+        """ความลึกของคิว จำนวนที่ทิ้ง และเวลารอในคิว (None ถ้ายังไม่ได้เริ่มฟัง)"""
+        if self.ingestion_queue is None:
+            return None
+        return self.ingestion_queue.metrics()
+    
+    def get_timing_summary(self):
+        """p50/p95/p99 ของแต่ละขั้นตอนการตรวจจับ (ถ้าใช้ process pool จะรวมจากทุก process)"""
+        if self.detection_pool is not None:
+            return self.detection_pool.timings.summary()
+        return self.detector.get_timing_summary()
            
-    def connect_to_twitch(self):
-        """เชื่อมต่อกับ Twitch IRC"""
+    def on_irc_status(self, connected, status_message):
+        """สถานะการเชื่อมต่อจาก IRC client (เรียกจาก thread ของ event loop)"""
+        self.connection_status.emit(connected, status_message)
+    
+    @staticmethod
+    def _empty_channel_stats():
+        return {'total_messages': 0, 'bad_word_count': 0}
+    
+    def add_channels(self, channel_names):
+        """JOIN channel เพิ่ม (ลง connection ที่ว่างที่สุด)"""
+        channels = [normalize_channel(channel) for channel in channel_names]
+        channels = [channel for channel in channels if channel and channel not in self.channels]
+        self.chat_mutex.lock()
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(10)  # ตั้งค่า timeout
-            self.socket.connect(('irc.chat.twitch.tv', 6667))
-            
-            # ส่งข้อมูล authentication
-            # ใช้ anonymous user (justinfan + random number)
-            self.socket.send(f'NICK justinfan{int(time.time())}\n'.encode('utf-8'))
-            self.socket.send(f'JOIN #{self.channel_name}\n'.encode('utf-8'))
-            
-            # รอการตอบสนอง
-            time.sleep(1)
-            
-            self.connection_status.emit(True, f"เชื่อมต่อกับ {self.channel_name} สำเร็จ")
-            self.reconnect_attempts = 0
-            self.logger.info(f"Successfully connected to {self.channel_name}")
-            return True
-            
-        except socket.timeout:
-            error_msg = "Connection timeout"
-            self.logger.error(error_msg)
-            self.connection_status.emit(False, error_msg)
-            self.error_occurred.emit(error_msg)
-            return False
-        except socket.gaierror:
-            error_msg = "DNS resolution failed"
-            self.logger.error(error_msg)
-            self.connection_status.emit(False, error_msg)
-            self.error_occurred.emit(error_msg)
-            return False
-        except ConnectionRefusedError:
-            error_msg = "Connection refused by server"
-            self.logger.error(error_msg)
-            self.connection_status.emit(False, error_msg)
-            self.error_occurred.emit(error_msg)
-            return False
-        except Exception as e:
-            error_msg = f"Connection error: {e}"
-            self.logger.error(error_msg)
-            self.connection_status.emit(False, error_msg)
-            self.error_occurred.emit(error_msg)
-            # Cleanup ในกรณีที่เกิด error
-            if self.socket:
-                try:
-                    self.socket.close()
-                    self.socket = None
-                except:
-                    pass
-            return False
+            for channel in channels:
+                self.channels.append(channel)
+                self.channel_stats.setdefault(channel, self._empty_channel_stats())
+        finally:
+            self.chat_mutex.unlock()
+        if self.irc_client is not None and channels:
+            self.irc_client.join(channels)
     
-    def listen_to_chat(self):
-        """ฟังข้อความจาก chat"""
-        buffer = ""  # เพิ่ม buffer สำหรับข้อมูลที่ไม่สมบูรณ์
-        
-        while self.running:
+    def remove_channels(self, channel_names):
+        """ออกจาก channel (สถิติเดิมของ channel นั้นยังเก็บไว้)"""
+        channels = [channel for channel in map(normalize_channel, channel_names) if channel in self.channels]
+        for channel in channels:
+            self.channels.remove(channel)
+        if self.irc_client is not None and channels:
+            self.irc_client.part(channels)
+    
+    def get_channel_stats(self):
+        """สถิติแยกตาม channel แบบ thread-safe"""
+        self.chat_mutex.lock()
+        try:
+            return {channel: dict(stats) for channel, stats in self.channel_stats.items()}
+        finally:
+            self.chat_mutex.unlock()
+    
+    def on_chat_message(self, user_part, channel, message, irc_message=None):
+        """ข้อความแชทจาก IRC client (เรียกจาก thread ของ event loop) irc_message มี IRCv3 tags ของข้อความ"""
+        try:
+            # clear_memory_messages (thread GUI) สลับตัวนับชุดนี้ภายใต้ chat_mutex จึงต้องแก้ภายใต้ mutex เดียวกัน
+            self.chat_mutex.lock()
             try:
-                # ตรวจสอบว่า socket ยังใช้งานได้หรือไม่
-                if not self.socket:
-                    self.logger.error("Socket is None, cannot receive data")
-                    break
-                
-                self.socket.settimeout(0.5) # Set a small timeout for graceful shutdown
-                data = self.socket.recv(1024).decode('utf-8', errors='ignore')  # เพิ่ม error handling สำหรับ encoding
-                if not data:
-                    self.logger.debug("No data received, continuing loop.")
-                    continue
-                
-                # เพิ่มข้อมูลใหม่เข้า buffer
-                buffer += data
-                
-                # แยกข้อความที่สมบูรณ์ (ลงท้ายด้วย \n)
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    line = line.rstrip('\r')
-                    
-                    if not line:
-                        continue
-                    
-                    # จัดการ PING/PONG
-                    if line.startswith('PING'):
-                        if self.socket:  # ตรวจสอบอีกครั้งก่อนส่ง
-                            pong_response = 'PONG :tmi.twitch.tv\r\n'
-                            self.socket.send(pong_response.encode('utf-8'))
-                        continue
-                    
-                    # แยกข้อความ chat
-                    if 'PRIVMSG' in line:
-                        self.process_chat_message(line)
-                    
-            except socket.timeout:
-                continue # This is expected behavior, just continue the loop
-            except socket.error as e:
-                if self.running:
-                    self.logger.error(f"Socket error: {e}")
-                    self.handle_connection_error(f"Socket error: {e}")
-                    continue
-            except UnicodeDecodeError as e:
-                self.logger.warning(f"Unicode decode error: {e}")
-                continue
-            except Exception as e:
-                if self.running:
-                    error_msg = f"Chat listening error: {e}"
-                    self.logger.error(error_msg)
-                    self.error_occurred.emit(error_msg)
-                    self.handle_connection_error(error_msg)
-                    break
-
-    def handle_connection_error(self, error_message):
-        """จัดการ connection error แบบรวมศูนย์"""
-        self.connection_status.emit(False, f"การเชื่อมต่อขาด: {error_message}")
-        
-        # ลองเชื่อมต่อใหม่
-        while self.reconnect_attempts < self.max_reconnect_attempts and self.running:
-            self.reconnect_attempts += 1
-            retry_msg = f"กำลังลองเชื่อมต่อใหม่... ({self.reconnect_attempts}/{self.max_reconnect_attempts})"
-            self.logger.info(retry_msg)
-            self.connection_status.emit(False, retry_msg)
+                self.total_messages += 1
+                self.channel_stats.setdefault(channel, self._empty_channel_stats())['total_messages'] += 1
+            finally:
+                self.chat_mutex.unlock()
             
-            # รอก่อนลองใหม่ (exponential backoff)
-            wait_time = min(5 * (2 ** (self.reconnect_attempts - 1)), 30)  # 5, 10, 20, 30 วินาที
-            time.sleep(wait_time)
+            # ส่งข้อความทั่วไป (รวมเป็นก้อนก่อนส่งให้ GUI)
+            self.message_batch.add((user_part, message))
             
-            if self.connect_to_twitch():
-                return True
+            # ส่งเข้าคิวให้ thread ตรวจจับ (ถ้ายังไม่ได้เริ่มฟังก็ตรวจเลย)
+            # ห้ามรอบน thread ของ event loop คิวเต็มแล้ว connection นี้จะรอใน backpressure ก่อนอ่านต่อแทน
+            ingestion_queue = self.ingestion_queue
+            if ingestion_queue is not None:
+                ingestion_queue.put((user_part, channel, message, irc_message), block=False)
+            else:
+                self.detect_message(user_part, channel, message, irc_message)
                 
-        self.logger.error("Max reconnection attempts reached")
-        return False
-        
-    def process_chat_message(self, line):
-        """แยกการประมวลผลข้อความ chat เป็นฟังก์ชันแยก"""
+        except Exception as e:
+            self.logger.error(f"Error processing chat message: {e}")
+    
+    def detection_loop(self, ingestion_queue):
+        """thread ตรวจจับ: ดึงข้อความจากคิวทีละก้อนจนกว่าคิวจะถูกปิด"""
+        while True:
+            batch = ingestion_queue.get_batch()
+            if batch is None:
+                return
+            for user_part, channel, message, irc_message in batch:
+                self.detect_message(user_part, channel, message, irc_message)
+    
+    def detect_message(self, user_part, channel, message, irc_message=None):
+        """ตรวจคำหยาบของข้อความหนึ่ง (ถ้ามี process pool ส่งไปตรวจที่นั่น ผลกลับมาตามลำดับข้อความของ channel)"""
         try:
-            # ตัวอย่าง: :username!username@username.tmi.twitch.tv PRIVMSG #channel :message
-            parts = line.split('PRIVMSG')
-            if len(parts) >= 2:
-                user_part = parts[0].split('!')[0][1:]  # เอา username
-                message_part = parts[1].split(':', 1)
-                if len(message_part) < 2:
-                    return
-                    
-                message = message_part[1].strip()
-                
-                self.total_messages += 1
+            if self.detection_pool is not None:
+                self.detection_pool.submit(
+                    channel, message, functools.partial(self.handle_verdict, user_part, channel, message, irc_message=irc_message)
+                )
+            else:
+                self.handle_verdict(user_part, channel, message, self.optimized_detect_bad_words(message), irc_message)
+        except Exception as e:
+            self.logger.error(f"Error detecting chat message: {e}")
+    
+    def handle_verdict(self, user_part, channel, message, found_words, irc_message=None):
+        """จัดการผลตรวจของข้อความหนึ่ง (เก็บประวัติและส่ง signal เมื่อพบคำหยาบ)"""
+        try:
+            if found_words:
+                chat_info = {
+                    'timestamp': datetime.now(),
+                    'username': user_part,
+                    'message': message,
+                    'bad_words': found_words,
+                    'channel': channel,
+                    # id ของข้อความ/ผู้ใช้จาก Twitch ใช้ลบข้อความหรือ timeout ผู้ใช้ภายหลังได้
+                    'message_id': irc_message.message_id if irc_message else None,
+                    'user_id': irc_message.user_id if irc_message else None,
+                }
                 
-                # ส่งข้อความทั่วไป
-                self.message_received.emit(user_part, message)
+                # ใช้ mutex เพื่อ thread safety (ประวัติและตัวนับแก้พร้อมกัน ไม่ให้ clear_memory_messages แทรกกลาง)
+                self.chat_mutex.lock()
+                try:
+                    self.chat_messages.append(chat_info)
+                    self.bad_word_count += 1
+                    self.channel_stats.setdefault(channel, self._empty_channel_stats())['bad_word_count'] += 1
+                finally:
+                    self.chat_mutex.unlock()
                 
-                # ตรวจจับคำหยาบ
-                found_words = self.optimized_detect_bad_words(message)
+                # ส่งสัญญาณพบคำหยาบ (รวมเป็นก้อน สถิติส่งตอน flush)
+                self.bad_word_batch.add((user_part, message, found_words))
                 
-                if found_words:
-                    self.bad_word_count += 1
-                    
-                    chat_info = {
-                        'timestamp': datetime.now(),
-                        'username': user_part,
-                        'message': message,
-                        'bad_words': found_words,
-                        'channel': self.channel_name
-                    }
-                    
-                    # ใช้ mutex เพื่อ thread safety
-                    self.chat_mutex.lock()
-                    try:
-                        self.chat_messages.append(chat_info)
-                    finally:
-                        self.chat_mutex.unlock()
-                    
-                    # ส่งสัญญาณพบคำหยาบ
-                    self.bad_word_detected.emit(user_part, message, found_words)
-                    
-                    # อัพเดทสถิติ
-                    self.chat_stats.emit(self.total_messages, self.bad_word_count)
-                    
         except Exception as e:
-            self.logger.error(f"Error processing chat message: {e}")            
+            self.logger.error(f"Error handling detection result: {e}")
     
-    def start_listening(self):
-        """เริ่มการฟัง chat"""
-        if self.connect_to_twitch():
-            self.running = True
-            self.listen_to_chat()
+    def flush_signals(self):
+        """ส่งข้อความ/ผลตรวจที่ค้างในบัฟเฟอร์ และสถิติล่าสุด (ถ้าเปลี่ยน) ให้ GUI"""
+        self.message_batch.flush()
+        self.bad_word_batch.flush()
+        self.chat_mutex.lock()
+        try:
+            stats = (self.total_messages, self.bad_word_count)
+        finally:
+            self.chat_mutex.unlock()
+        if stats != self.last_stats:
+            self.last_stats = stats
+            self.chat_stats.emit(*stats)
+    
+    def start_listening(self, host=TWITCH_IRC_HOST, port=TWITCH_IRC_PORT, **options):
+        """เริ่มการฟัง chat (ไม่ block คืนค่าทันที การเชื่อมต่อทำบน event loop)
+
+        options ส่งต่อให้ TwitchConnectionManager เช่น channels_per_connection, join_rate
+        """
+        if self.running:
+            return
+        self.running = True
+        if QCoreApplication.instance() is not None:  # ไม่มี GUI (เช่นใน test) ให้เรียก flush_signals() เอง
+            self.flush_timer.start()
+        self.ingestion_queue = IngestionQueue(self.queue_capacity, self.overflow_policy)
+        self.detection_thread = threading.Thread(
+            target=self.detection_loop, args=(self.ingestion_queue,), name='chat-detection', daemon=True
+        )
+        self.detection_thread.start()
+        # นโยบาย block: connection ที่อ่านจนคิวเต็มหยุดอ่านจนกว่าคิวจะว่าง (ไม่ block ทั้ง event loop)
+        if self.overflow_policy == 'block':
+            options.setdefault('backpressure', self.ingestion_queue.wait_for_space)
+        self.irc_client = TwitchConnectionManager(
+            self.channels, self.on_chat_message,
+            on_status=self.on_irc_status, on_error=self.error_occurred.emit,
+            host=host, port=port, **options,
+        )
+        future = self.irc_client.start(self.event_loop)
+        future.add_done_callback(self._on_listening_finished)
+
+    def _on_listening_finished(self, _future):
+        self.running = False
+        self.listening_stopped.emit()
     
     def stop_listening(self):
         """หยุดการฟัง chat"""
         self.running = False
-        if self.socket:
-            try:
-                self.socket.close()
-                self.socket = None  # ตั้งค่าเป็น None หลังจากปิด
-                self.logger.info("Socket closed successfully")
-            except Exception as e:
-                self.logger.error(f"Error closing socket: {e}")
-                self.socket = None  # ตั้งค่าเป็น None แม้จะ error
+        if self.irc_client is not None:
+            self.irc_client.stop()
+            self.irc_client = None
+            self.logger.info("IRC client stopped")
+        # ปิดคิว (ทิ้งข้อความที่ยังไม่ได้ตรวจ) metric ของคิวยังอ่านได้จนกว่าจะเริ่มฟังใหม่
+        if self.ingestion_queue is not None:
+            self.ingestion_queue.close()
+        if self.detection_thread is not None:
+            self.detection_thread.join(timeout=2)
+            self.detection_thread = None
+        self.flush_timer.stop()
+        self.flush_signals()
+
+    def close(self):
+        """หยุดฟังแล้วปิด thread ของตัวตรวจ (เรียกเมื่อจะทิ้ง worker นี้ เช่นก่อนเชื่อมต่อใหม่)"""
+        self.stop_listening()
+        self.detector.close()
     
     def get_chat_messages(self):
         """ดึงข้อความแชทแบบ thread-safe"""
@@ -384,27 +408,13 @@ class TwitchChatWorker(QObject):
             self.chat_messages.clear()
             self.total_messages = 0
             self.bad_word_count = 0
+            self.channel_stats = {channel: self._empty_channel_stats() for channel in self.channels}
         finally:
             self.chat_mutex.unlock()
 
-class TwitchChatThread(QThread):
-    """Thread สำหรับจัดการ Twitch chat"""
-    
-    def __init__(self, channel_name):
-        super().__init__()
-        self.worker = TwitchChatWorker(channel_name)
-        self.worker.moveToThread(self)
-        
-        # เชื่อมต่อ thread signals
-        self.started.connect(self.worker.start_listening)
-        self.finished.connect(self.worker.stop_listening)
-    
-    def run(self):
-        """เริ่มการทำงานของ thread"""
-        # ใช้ event loop ภายใน QThread เพื่อให้ signal/slot ทำงานถูกต้อง
-        self.exec_()
-
 class BadWordManagerDialog(QDialog):
+    words_saved = pyqtSignal(list, list)  # added_words, removed_words
+    
     def __init__(self, badwords_file, parent=None):
         super().__init__(parent)
         self.setWindowTitle('จัดการคำหยาบ')
@@ -454,6 +464,7 @@ class BadWordManagerDialog(QDialog):
                         self.list_widget.addItem(word)
         except FileNotFoundError:
             pass
+        self.saved_words = set(self.all_words)  # คำที่อยู่ในไฟล์ล่าสุด ใช้หาส่วนที่เปลี่ยนตอนบันทึก
 
     def filter_words(self):
         search = self.search_line.text().strip().lower()
@@ -481,6 +492,14 @@ class BadWordManagerDialog(QDialog):
             with open(self.badwords_file, 'w', encoding='utf-8') as f:
                 for word in self.all_words:
                     f.write(word + '\n')
+            
+            # ส่งเฉพาะคำที่เพิ่ม/ลบ ให้ worker อัพเดทแบบ incremental
+            current_words = set(self.all_words)
+            added = sorted(current_words - self.saved_words)
+            removed = sorted(self.saved_words - current_words)
+            self.saved_words = current_words
+            if added or removed:
+                self.words_saved.emit(added, removed)
             QMessageBox.information(self, 'บันทึกสำเร็จ', 'บันทึกคำหยาบเรียบร้อยแล้ว')
         except Exception as e:
             QMessageBox.warning(self, 'ผิดพลาด', f'ไม่สามารถบันทึกได้: {e}')
@@ -560,14 +579,27 @@ class DashboardWindow(QWidget):
         perf_group = QGroupBox('⚡ สถิติประสิทธิภาพ')
         perf_layout = QGridLayout()
         
-        # เวลาการตรวจจับเฉลี่ย
-        avg_detection_label = QLabel('เวลาตรวจจับเฉลี่ย:')
+        # เวลาตรวจจับแต่ละขั้นตอน (p50 / p95 / p99) วัดใน worker ทุกข้อความ
+        avg_detection_label = QLabel('เวลาตรวจจับ (p50 / p95 / p99):')
         avg_detection_label.setStyleSheet('font-weight: bold; color: #607D8B; font-size: 14px;')
-        self.avg_detection_label = QLabel('0.000 วินาที')
+        self.avg_detection_label = QLabel('-')
         self.avg_detection_label.setStyleSheet('font-size: 18px; font-weight: bold; color: #607D8B;')
         perf_layout.addWidget(avg_detection_label, 0, 0)
         perf_layout.addWidget(self.avg_detection_label, 0, 1)
         
+        stage_names = [('normalize', 'Normalize'), ('thai', 'สแกนคำไทย'),
+                       ('segment', 'Segmentation'), ('english', 'Lookup อังกฤษ')]
+        self.stage_labels = {}
+        stage_layout = QGridLayout()
+        for row, (stage, title) in enumerate(stage_names):
+            stage_title = QLabel(f'{title}:')
+            stage_title.setStyleSheet('color: #607D8B; font-size: 12px;')
+            self.stage_labels[stage] = QLabel('-')
+            self.stage_labels[stage].setStyleSheet('font-size: 12px; color: #607D8B;')
+            stage_layout.addWidget(stage_title, row, 0)
+            stage_layout.addWidget(self.stage_labels[stage], row, 1)
+        perf_layout.addLayout(stage_layout, 4, 0, 1, 2)
+        
         # การใช้ Memory
         memory_usage_label = QLabel('การใช้ Memory:')
         memory_usage_label.setStyleSheet('font-weight: bold; color: #795548; font-size: 14px;')
@@ -592,6 +624,14 @@ class DashboardWindow(QWidget):
         perf_layout.addWidget(connection_status_label, 3, 0)
         perf_layout.addWidget(self.connection_status_label, 3, 1)
         
+        # คิวรอตรวจ (ความลึก / ที่ทิ้ง / เวลารอ) ใช้ดูว่า pipeline ตรวจทันแชทหรือไม่
+        queue_title = QLabel('คิวรอตรวจ:')
+        queue_title.setStyleSheet('font-weight: bold; color: #3F51B5; font-size: 14px;')
+        self.queue_label = QLabel('-')
+        self.queue_label.setStyleSheet('font-size: 12px; color: #3F51B5;')
+        perf_layout.addWidget(queue_title, 5, 0)
+        perf_layout.addWidget(self.queue_label, 5, 1)
+        
         perf_group.setLayout(perf_layout)
         layout.addWidget(perf_group)
 
@@ -649,9 +689,20 @@ class DashboardWindow(QWidget):
                 
                 # อัพเดทสถิติประสิทธิภาพ
                 if hasattr(self.parent, 'performance_stats'):
-                    # เวลาการตรวจจับเฉลี่ย
-                    avg_time_ms = self.parent.performance_stats.get('avg_detection_time', 0) * 1000
-                    self.avg_detection_label.setText(f'{avg_time_ms:.2f} ms')
+                    # เวลาตรวจจับจริงจาก worker (ทั้งข้อความ + แยกตามขั้นตอน)
+                    timings = None
+                    if self.parent.twitch_worker:
+                        timings = self.parent.twitch_worker.get_timing_summary()
+                    if timings:
+                        self.avg_detection_label.setText(self.format_timing(timings['total']))
+                        for stage, label in self.stage_labels.items():
+                            label.setText(self.format_timing(timings[stage]))
+                    
+                    queue_metrics = None
+                    if self.parent.twitch_worker:
+                        queue_metrics = self.parent.twitch_worker.get_queue_metrics()
+                    if queue_metrics:
+                        self.queue_label.setText(self.format_queue(queue_metrics))
                     
                     # การใช้ Memory
                     memory_usage = self.parent.performance_stats.get('memory_usage', 0)
@@ -662,7 +713,7 @@ class DashboardWindow(QWidget):
                     self.error_count_label.setText(str(error_count))
                     
                     # สถานะการเชื่อมต่อ
-                    if self.parent.twitch_thread and self.parent.twitch_thread.isRunning():
+                    if self.parent.twitch_worker and self.parent.twitch_worker.running:
                         self.connection_status_label.setText('เชื่อมต่อแล้ว')
                         self.connection_status_label.setStyleSheet('font-size: 18px; font-weight: bold; color: #4CAF50;')
                     else:
@@ -672,6 +723,21 @@ class DashboardWindow(QWidget):
             except Exception as e:
                 print(f"Error updating dashboard stats: {e}")
 
+    @staticmethod
+    def format_timing(stats):
+        """แสดง p50 / p95 / p99 เป็น ms"""
+        if not stats['count']:
+            return '-'
+        return (f"{stats['p50'] * 1000:.2f} / {stats['p95'] * 1000:.2f} / "
+                f"{stats['p99'] * 1000:.2f} ms  ({stats['count']:,} ครั้ง)")
+
+    @staticmethod
+    def format_queue(metrics):
+        """แสดงความลึกของคิว จำนวนที่ทิ้ง และเวลารอในคิว (p50 / p99)"""
+        lag = metrics['lag']
+        return (f"{metrics['depth']:,} / {metrics['capacity']:,} (สูงสุด {metrics['max_depth']:,})  "
+                f"ทิ้ง {metrics['dropped']:,}  รอ {lag['p50'] * 1000:.1f} / {lag['p99'] * 1000:.1f} ms")
+
     def clear_stats(self):
         """ล้างสถิติทั้งหมด"""
         try:
@@ -687,11 +753,10 @@ class DashboardWindow(QWidget):
                 # รีเซ็ต performance stats
                 if hasattr(self.parent, 'performance_stats'):
                     self.parent.performance_stats = {
-                        'avg_detection_time': 0,
-                        'total_detection_time': 0,
-                        'detection_count': 0,
                         'memory_usage': 0
                     }
+                if self.parent.twitch_worker:
+                    self.parent.twitch_worker.reset_timings()
                 
                 QMessageBox.information(self, 'ล้างสถิติ', 'ล้างสถิติทั้งหมดเรียบร้อยแล้ว')
                 
@@ -738,21 +803,25 @@ class BadWordDetectorApp(QWidget):
         self.bad_words = self.load_all_bad_words()
         self.sound_file = None
         
+        # เริ่มโหลด wordsegment ตั้งแต่เปิดโปรแกรม จะได้พร้อมก่อนเชื่อมต่อ channel
+        wordsegment_model.start_loading()
+        # process pool สำหรับตรวจจับ (สร้างเมื่อเปิดใช้ตอนเชื่อมต่อครั้งแรก)
+        self.detection_pool = None
+        
         # เพิ่มตัวแปรสำหรับ Dashboard
         self.detection_count = 0
         self.start_time = None
         self.detection_times = []
         
         # เพิ่มตัวแปรสำหรับ Twitch mode
-        self.twitch_thread = None
+        self.twitch_worker = None
         self.twitch_total_messages = 0
         self.twitch_bad_word_count = 0
+        # มี shard ไหนเชื่อมต่อสำเร็จแล้วหรือยังในการเชื่อมต่อรอบนี้ (ล้างช่องแชทครั้งแรกครั้งเดียว)
+        self.twitch_session_connected = False
         
         # เพิ่ม Performance Monitoring
         self.performance_stats = {
-            'avg_detection_time': 0,
-            'total_detection_time': 0,
-            'detection_count': 0,
             'memory_usage': 0
         }
         
@@ -766,6 +835,12 @@ class BadWordDetectorApp(QWidget):
         self.tray_icon.setIcon(icon)
         self.tray_icon.setVisible(True)
         
+        # เสียงเตือนเล่นนอก thread ของ GUI, แจ้งเตือนถี่ๆ ถูกรวมเป็นข้อความสรุป (poll ทุกวินาที)
+        self.alert_scheduler = AlertScheduler(notify=self.show_detection_notification)
+        self.alert_timer = QTimer(self)
+        self.alert_timer.timeout.connect(self.alert_scheduler.poll)
+        self.alert_timer.start(1000)
+        
         # เพิ่ม Performance Timer
         self.performance_timer = QTimer()
         self.performance_timer.timeout.connect(self.update_performance_stats)
@@ -777,9 +852,9 @@ class BadWordDetectorApp(QWidget):
     def update_performance_stats(self):
         """อัพเดทสถิติประสิทธิภาพ"""
         try:
-            if self.twitch_thread and self.twitch_thread.worker:
+            if self.twitch_worker:
                 # คำนวณ memory usage 
-                message_count = len(self.twitch_thread.worker.get_chat_messages())
+                message_count = len(self.twitch_worker.get_chat_messages())
                 memory_usage = message_count * 0.1  # KB per message
                 self.performance_stats['memory_usage'] = memory_usage
                 
@@ -861,7 +936,7 @@ class BadWordDetectorApp(QWidget):
                 left: 10px;
                 padding: 0 5px;
             }
-            QTextEdit {
+            QListView {
                 border: 1px solid #cccccc;
                 border-radius: 4px;
                 padding: 5px;
@@ -882,6 +957,16 @@ class BadWordDetectorApp(QWidget):
             }
         """)
 
+    @staticmethod
+    def create_log_view(model, tooltip):
+        """QListView สำหรับ ChatLogModel (ทุกแถวสูงเท่ากัน view จึงไม่ต้องวัดขนาดทุกบรรทัด)"""
+        view = QListView()
+        view.setModel(model)
+        view.setUniformItemSizes(True)
+        view.setWordWrap(False)
+        view.setToolTip(tooltip)
+        return view
+
     def init_ui(self):
         layout = QVBoxLayout() # จัดเรียง widget แบบแนวตั้ง
         layout.setSpacing(15) # ระยะห่างระหว่าง widget
@@ -936,7 +1021,7 @@ class BadWordDetectorApp(QWidget):
         # แถวที่ 0: ใส่ label "Channel Name:" และกล่อง input สำหรับกรอกชื่อแชนแนล
         twitch_layout.addWidget(QLabel('Channel Name:'), 0, 0)
         self.channel_input = QLineEdit()   # สร้างช่องกรอกข้อความ
-        self.channel_input.setPlaceholderText('ใส่ชื่อ channel (เช่น: ninja)')  
+        self.channel_input.setPlaceholderText('ใส่ชื่อ channel (เช่น: ninja หรือหลาย channel: ninja, shroud)')  
         # -> placeholder = ตัวอย่างข้อความที่โผล่มาจาง ๆ
         twitch_layout.addWidget(self.channel_input, 0, 1)
 
@@ -1009,6 +1094,28 @@ class BadWordDetectorApp(QWidget):
         self.sound_btn.clicked.connect(self.select_sound)
         settings_layout.addWidget(self.sound_btn, 0, 1)
 
+        # ---- ตรวจคำสะกดใกล้เคียง (Fuzzy matching) ----
+        self.fuzzy_checkbox = QCheckBox('ตรวจคำสะกดใกล้เคียง (Fuzzy)')
+        self.fuzzy_checkbox.setToolTip('จับคำที่สะกดต่างจากคำหยาบ 1 ตัวอักษร เช่น "ไอ้สัD" (ช้ากว่าปกติเล็กน้อย)')
+        self.fuzzy_checkbox.clicked.connect(self.toggle_fuzzy_matching)
+        settings_layout.addWidget(self.fuzzy_checkbox, 1, 0, 1, 2)
+
+        # ---- ตรวจจับด้วยหลาย process (แชทที่ข้อความเยอะมาก) ----
+        self.multiprocess_checkbox = QCheckBox(f'ตรวจจับด้วยหลาย process ({os.cpu_count() or 1} cores)')
+        self.multiprocess_checkbox.setToolTip('กระจายการตรวจคำหยาบไปหลาย process สำหรับช่องที่แชทเยอะ (มีผลตอนเชื่อมต่อครั้งถัดไป)')
+        settings_layout.addWidget(self.multiprocess_checkbox, 2, 0, 1, 2)
+
+        # ---- เมื่อคิวรอตรวจเต็ม (แชทเข้าเร็วกว่าที่ตรวจทัน) ----
+        overflow_label = QLabel('เมื่อคิวรอตรวจเต็ม:')
+        overflow_label.setStyleSheet('font-weight: bold;')
+        settings_layout.addWidget(overflow_label, 3, 0)
+        self.overflow_combo = QComboBox()
+        self.overflow_combo.addItem('รอจนตรวจทัน (ไม่ทิ้งข้อความ)', 'block')
+        self.overflow_combo.addItem('ทิ้งข้อความเก่าสุด', 'drop_oldest')
+        self.overflow_combo.addItem('สุ่มตรวจบางข้อความ', 'sample')
+        self.overflow_combo.setToolTip('มีผลตอนเชื่อมต่อครั้งถัดไป')
+        settings_layout.addWidget(self.overflow_combo, 3, 1)
+
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
 
@@ -1028,10 +1135,11 @@ class BadWordDetectorApp(QWidget):
         badword_label.setStyleSheet('font-weight: bold; color: #d32f2f;')  # สีแดง
         badword_layout.addWidget(badword_label)
 
-        self.badword_text = QTextEdit()   # กล่องข้อความโชว์คำหยาบ
-        self.badword_text.setMaximumHeight(100)
-        self.badword_text.setPlaceholderText('คำหยาบที่พบจะแสดงที่นี่...')
-        badword_layout.addWidget(self.badword_text)
+        # รายการคำหยาบที่พบ (ใหม่สุดอยู่บน) เก็บใน ring buffer ขนาดคงที่ วาดเฉพาะแถวที่มองเห็น
+        self.badword_model = ChatLogModel(BADWORD_VIEW_CAPACITY, parent=self)
+        self.badword_view = self.create_log_view(self.badword_model, 'คำหยาบที่พบจะแสดงที่นี่')
+        self.badword_view.setMaximumHeight(100)
+        badword_layout.addWidget(self.badword_view)
 
         badword_tab.setLayout(badword_layout)
         self.results_tab.addTab(badword_tab, 'คำหยาบที่พบ')
@@ -1044,10 +1152,10 @@ class BadWordDetectorApp(QWidget):
         chat_label.setStyleSheet('font-weight: bold; color: #2196F3;')  # สีน้ำเงิน
         chat_layout.addWidget(chat_label)
 
-        self.chat_text = QTextEdit()  # กล่องข้อความโชว์แชท
-        self.chat_text.setMaximumHeight(150)
-        self.chat_text.setPlaceholderText('ข้อความแชทจะแสดงที่นี่ (Twitch mode)...')
-        chat_layout.addWidget(self.chat_text)
+        self.chat_model = ChatLogModel(CHAT_VIEW_CAPACITY, parent=self)
+        self.chat_view = self.create_log_view(self.chat_model, 'ข้อความแชทจะแสดงที่นี่ (Twitch mode)')
+        self.chat_view.setMaximumHeight(150)
+        chat_layout.addWidget(self.chat_view)
 
         # ปุ่มล้างข้อความแชท
         clear_chat_btn = QPushButton('🗑️ ล้างข้อมูลทั้งหมด')
@@ -1092,26 +1200,47 @@ class BadWordDetectorApp(QWidget):
     def connect_twitch(self):
         """เชื่อมต่อ Twitch"""
         try:
-            channel = self.channel_input.text().strip()
-            if not channel:
+            # ใส่ได้หลาย channel คั่นด้วย comma หรือ space ทุก channel ใช้ connection เดียวกัน
+            channels = [normalize_channel(c) for c in re.split(r'[,\s]+', self.channel_input.text().strip()) if c.lstrip('#')]
+            if not channels:
                 QMessageBox.warning(self, 'ข้อผิดพลาด', 'กรุณาใส่ชื่อ channel')
                 return
             
             # Validate channel name
-            if not re.match(r'^[a-zA-Z0-9_]{4,25}$', channel):
-                QMessageBox.warning(self, 'ข้อผิดพลาด', 'ชื่อ channel ไม่ถูกต้อง (4-25 ตัวอักษร, ตัวอักษรและตัวเลขเท่านั้น)')
-                return
+            for channel in channels:
+                if not re.match(r'^[a-zA-Z0-9_]{4,25}$', channel):
+                    QMessageBox.warning(self, 'ข้อผิดพลาด', f'ชื่อ channel ไม่ถูกต้อง: {channel} (4-25 ตัวอักษร, ตัวอักษรและตัวเลขเท่านั้น)')
+                    return
             
-            self.twitch_thread = TwitchChatThread(channel) 
+            detection_pool = None
+            if self.multiprocess_checkbox.isChecked():
+                if self.detection_pool is None:
+                    self.detection_pool = DetectionPool(fuzzy_matching=self.fuzzy_checkbox.isChecked())
+                detection_pool = self.detection_pool
+            
+            # worker เดิมที่ยังค้างอยู่ (เช่นกำลังลองต่อใหม่) ต้องปิดก่อน ไม่อย่างนั้น connection และ thread จะค้าง
+            if self.twitch_worker is not None:
+                self.twitch_worker.close()
+                self.twitch_worker = None
+            
+            self.twitch_worker = TwitchChatWorker(
+                channels, detection_pool, overflow_policy=self.overflow_combo.currentData()
+            )
             
             # เชื่อมต่อ signals
-            self.twitch_thread.worker.message_received.connect(self.on_twitch_message)
-            self.twitch_thread.worker.bad_word_detected.connect(self.on_twitch_bad_word)
-            self.twitch_thread.worker.connection_status.connect(self.on_twitch_connection_status)
-            self.twitch_thread.worker.chat_stats.connect(self.on_twitch_stats)
-            self.twitch_thread.worker.error_occurred.connect(self.on_twitch_error)
+            # ต่อแบบ queued เสมอ ก้อนที่ flush จาก timer (thread GUI) จะได้ไม่แซงก้อนที่ส่งมาจาก thread อื่น
+            self.twitch_worker.messages_received.connect(self.on_twitch_messages, Qt.QueuedConnection)
+            self.twitch_worker.bad_words_detected.connect(self.on_twitch_bad_words, Qt.QueuedConnection)
+            self.twitch_worker.connection_status.connect(self.on_twitch_connection_status)
+            self.twitch_worker.listening_stopped.connect(self.on_twitch_listening_stopped)
+            self.twitch_worker.chat_stats.connect(self.on_twitch_stats, Qt.QueuedConnection)
+            self.twitch_worker.error_occurred.connect(self.on_twitch_error)
             
-            self.twitch_thread.start()
+            if self.fuzzy_checkbox.isChecked():
+                self.twitch_worker.set_fuzzy_matching(True)
+            
+            self.twitch_session_connected = False
+            self.twitch_worker.start_listening()
             
             # อัพเดทสถานะปุ่ม
             self.twitch_connect_btn.setEnabled(False)
@@ -1137,18 +1266,14 @@ class BadWordDetectorApp(QWidget):
     def disconnect_twitch(self):
         """ยกเลิกการเชื่อมต่อ Twitch"""
         try:
-            if self.twitch_thread:
-                # สั่งให้ worker หยุด loop และปิด socket อย่างปลอดภัยก่อน
+            if self.twitch_worker:
+                # สั่งให้ IRC client หยุดและปิด connection (ทำบน event loop ไม่ต้องรอ thread)
+                # แล้วปิด thread ของตัวตรวจ เชื่อมต่อใหม่จะสร้าง worker ใหม่ thread เก่าจะได้ไม่ค้าง
                 try:
-                    self.twitch_thread.worker.stop_listening()
+                    self.twitch_worker.close()
                 except Exception:
                     pass
-                # จากนั้นปิด event loop ของ QThread
-                self.twitch_thread.quit()
-                self.twitch_thread.wait(5000)  # รอสูงสุด 5 วินาที
-                if self.twitch_thread.isRunning():
-                    self.twitch_thread.terminate()  # Force terminate
-                self.twitch_thread = None
+                self.twitch_worker = None
             
             # อัพเดทสถานะปุ่ม
             self.twitch_connect_btn.setEnabled(True)
@@ -1162,111 +1287,88 @@ class BadWordDetectorApp(QWidget):
             self.log_error(error_msg)
             self.show_user_friendly_error('connection', error_msg)
 
-    def on_twitch_message(self, username, message):
-        """เมื่อได้รับข้อความจาก Twitch"""
+    def on_twitch_messages(self, batch):
+        """เมื่อได้รับข้อความจาก Twitch (ทั้งก้อน [(username, message), ...] อัพเดท UI ครั้งเดียว)"""
         try:
-            self.twitch_total_messages += 1
-            self.twitch_total_label.setText(str(self.twitch_total_messages))
-            
+            # จำนวนข้อความ/คำหยาบทั้งหมดมาจาก chat_stats ที่ worker ส่งตามหลังทุกรอบ flush
             # แสดงข้อความใน chat tab
+            # model รวมทุกก้อนที่มาในเฟรมเดียวกันแล้วอัพเดท view ครั้งเดียว
             timestamp = datetime.now().strftime('%H:%M:%S')
-            chat_line = f'[{timestamp}] {username}: {message}'
-            
-            # เพิ่มข้อความใหม่ที่ด้านบน
-            current_text = self.chat_text.toPlainText()
-            if current_text:
-                chat_line = chat_line + '\n' + current_text
-            
-            # จำกัดจำนวนบรรทัด (เก็บ 50 บรรทัดล่าสุด)
-            lines = chat_line.split('\n')
-            if len(lines) > 50:
-                lines = lines[:50]
-                chat_line = '\n'.join(lines)
-            
-            self.chat_text.setPlainText(chat_line)
+            self.chat_model.add_lines([f'[{timestamp}] {username}: {message}' for username, message in batch])
             
         except Exception as e:
             self.log_error(f"Error processing Twitch message: {e}")
 
-    def on_twitch_bad_word(self, username, message, bad_words):
-        """เมื่อพบคำหยาบใน Twitch"""
+    def on_twitch_bad_words(self, batch):
+        """เมื่อพบคำหยาบใน Twitch (ทั้งก้อน [(username, message, bad_words), ...] อัพเดท UI ครั้งเดียว)"""
         try:
-            start_time = time.perf_counter()
-            
-            timestamp = datetime.now().strftime('%H:%M:%S')
+            now = datetime.now()
+            timestamp = now.strftime('%H:%M:%S')
             
             # แสดงใน badword tab
-            current_badword_text = self.badword_text.toPlainText()
-            new_line = f'[{timestamp}] {username}: {message} -> พบคำหยาบ: {", ".join(bad_words)}'
-            
-            if current_badword_text:
-                new_line = new_line + '\n' + current_badword_text
-            
-            # จำกัดจำนวนบรรทัด (เก็บ 20 บรรทัดล่าสุด)
-            lines = new_line.split('\n')
-            if len(lines) > 20:
-                lines = lines[:20]
-                new_line = '\n'.join(lines)
-            
-            self.badword_text.setPlainText(new_line)
+            self.badword_model.add_lines([f'[{timestamp}] {username}: {message} -> พบคำหยาบ: {", ".join(bad_words)}'
+                                          for username, message, bad_words in batch])
             
             # อัพเดทสถิติ
-            self.detection_count += 1
-            self.detection_times.append(datetime.now())
-            self.twitch_bad_word_count += 1
-            self.twitch_bad_label.setText(str(self.twitch_bad_word_count))
+            self.detection_count += len(batch)
+            self.detection_times.extend([now] * len(batch))
             
-            # คำนวณเวลาการตรวจจับ
-            detection_time = time.perf_counter() - start_time
-            self.performance_stats['total_detection_time'] += detection_time
-            self.performance_stats['detection_count'] += 1
-            self.performance_stats['avg_detection_time'] = (
-                self.performance_stats['total_detection_time'] / 
-                self.performance_stats['detection_count']
-            )
-            
-            # เล่นเสียงเตือน
-            self.play_alert()
-            
-            # แสดง notification
-            self.tray_icon.showMessage(
-                'พบคำหยาบใน Twitch',
-                f'{username}: {", ".join(bad_words)}',
-                QSystemTrayIcon.Warning,
-                3000
-            )
+            # เสียงเตือนและ notification (scheduler จำกัดความถี่และรวมช่วงที่คำหยาบเข้ามาถี่ๆ ให้เอง)
+            username, _, bad_words = batch[-1]
+            self.alert_scheduler.alert(len(batch), f'{username}: {", ".join(bad_words)}', sound_file=self.sound_file)
             
         except Exception as e:
             self.log_error(f"Error processing bad word detection: {e}")
 
+    def _is_stale_twitch_signal(self):
+        # signal ที่ค้างในคิวของ worker ที่ถูกปิดไปแล้ว (ก่อนกดเชื่อมต่อใหม่) ไม่ต้องแสดง
+        sender = self.sender()
+        return sender is not None and sender is not self.twitch_worker
+
     def on_twitch_connection_status(self, connected, message):
-        """เมื่อสถานะการเชื่อมต่อ Twitch เปลี่ยน"""
+        """เมื่อสถานะของ connection หนึ่งเปลี่ยน (connection อื่นอาจยังต่ออยู่หรือกำลังลองใหม่)
+
+        ปุ่มเชื่อมต่อ/ยกเลิกไม่เปลี่ยนตรงนี้ จะเปลี่ยนเมื่อ worker หยุดทั้งหมดแล้ว (on_twitch_listening_stopped)
+        """
         try:
+            if self._is_stale_twitch_signal():
+                return
             if connected:
                 self.status_label.setText(f'สถานะ: {message}')
                 self.status_label.setStyleSheet('color: #4CAF50; font-weight: bold; font-size: 12px;')
-                # อัพเดทสถานะปุ่มเมื่อเชื่อมต่อสำเร็จ
-                self.twitch_connect_btn.setEnabled(False)
-                self.twitch_disconnect_btn.setEnabled(True)
                 
                 # แสดงข้อความใน chat tab
+                # ล้างแชทเก่าเฉพาะ connection แรกของรอบ shard อื่นหรือการ reconnect ระหว่างรอบต้องไม่ลบแชทที่เข้ามาแล้ว
                 timestamp = datetime.now().strftime('%H:%M:%S')
-                self.chat_text.setPlainText(f'[{timestamp}] ✅ {message}\n')
+                if not self.twitch_session_connected:
+                    self.twitch_session_connected = True
+                    self.chat_model.clear()
+                self.chat_model.add_lines([f'[{timestamp}] ✅ {message}'])
             else:
                 self.status_label.setText(f'สถานะ: {message}')
                 self.status_label.setStyleSheet('color: #FF0000; font-weight: bold; font-size: 12px;')
-                # อัพเดทสถานะปุ่มเมื่อการเชื่อมต่อขาด
-                self.twitch_connect_btn.setEnabled(True)
-                self.twitch_disconnect_btn.setEnabled(False)
                 
                 # แสดงข้อความใน chat tab
                 timestamp = datetime.now().strftime('%H:%M:%S')
-                current_text = self.chat_text.toPlainText()
-                self.chat_text.setPlainText(f'[{timestamp}] ❌ {message}\n' + current_text)
+                self.chat_model.add_lines([f'[{timestamp}] ❌ {message}'])
                 
         except Exception as e:
             self.log_error(f"Error handling connection status: {e}")
 
+    def on_twitch_listening_stopped(self):
+        """IRC client ของ worker หยุดทุก connection แล้ว (เลิกพยายามต่อใหม่) เปิดให้กดเชื่อมต่อใหม่ได้"""
+        try:
+            if self._is_stale_twitch_signal() or self.twitch_worker is None:
+                return
+            self.twitch_worker.close()
+            self.twitch_worker = None
+            self.twitch_connect_btn.setEnabled(True)
+            self.twitch_disconnect_btn.setEnabled(False)
+            self.status_label.setText('สถานะ: การเชื่อมต่อ Twitch สิ้นสุด')
+            self.status_label.setStyleSheet('color: #FF0000; font-weight: bold; font-size: 12px;')
+        except Exception as e:
+            self.log_error(f"Error handling Twitch stop: {e}")
+
     def on_twitch_stats(self, total_messages, bad_word_count):
         """อัพเดทสถิติ Twitch"""
         try:
@@ -1297,17 +1399,14 @@ class BadWordDetectorApp(QWidget):
     def clear_chat_messages(self):
         """ล้างข้อความแชท"""
         try:
-            self.chat_text.clear()
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            self.chat_text.setPlaceholderText('ข้อความแชทจะแสดงที่นี่ (Twitch mode)...')
+            self.chat_model.clear()
             
             # ล้างข้อความใน worker ด้วย
-            if self.twitch_thread and self.twitch_thread.worker:
-                self.twitch_thread.worker.clear_memory_messages()
+            if self.twitch_worker:
+                self.twitch_worker.clear_memory_messages()
                 
             # ล้างคำหยาบที่แสดงใน UI ด้วย
-            self.badword_text.clear()
-            self.badword_text.setPlaceholderText('คำหยาบที่พบจะแสดงที่นี่...')
+            self.badword_model.clear()
             
             # รีเซ็ตสถิติการตรวจจับ
             self.detection_count = 0
@@ -1340,28 +1439,34 @@ class BadWordDetectorApp(QWidget):
                 continue
         return badwords
 
-    def play_alert(self):
-        if self.sound_file:
-            try:
-                winsound.PlaySound(self.sound_file, winsound.SND_FILENAME | winsound.SND_ASYNC)
-            except Exception as e:
-                print(f'ไม่สามารถเล่นเสียง: {e}')
-        else:
-            winsound.Beep(1000, 500)
+    def show_detection_notification(self, message):
+        self.tray_icon.showMessage(
+            'พบคำหยาบใน Twitch',
+            message,
+            QSystemTrayIcon.Warning,
+            3000
+        )
 
     def open_badword_manager(self, filename):
         dlg = BadWordManagerDialog(filename, self)
+        # อัพเดท bad_words ใน worker แบบ incremental ทุกครั้งที่กดบันทึก (ทำใน background ไม่ block GUI)
+        language = 'th' if filename == 'badwords.txt' else 'en'
+        dlg.words_saved.connect(lambda added, removed: self.on_badwords_saved(language, added, removed))
         dlg.exec_()
         # reload badwords after editing
         self.bad_words = self.load_all_bad_words()
-        # อัพเดท bad_words ใน worker ด้วย
-        if self.twitch_thread and self.twitch_thread.worker:
-            self.twitch_thread.worker.badwords_th, self.twitch_thread.worker.badwords_en = self.twitch_thread.worker.load_bad_words()
+    
+    def on_badwords_saved(self, language, added, removed):
+        """ส่งคำที่เพิ่ม/ลบจาก BadWordManagerDialog ไปให้ worker"""
+        if self.twitch_worker:
+            self.twitch_worker.apply_word_changes(language, added, removed)
+        if self.detection_pool is not None:
+            self.detection_pool.reload()
 
     def export_log(self):
         """Export log พร้อม error handling"""
         try:
-            if not hasattr(self, 'twitch_thread') or not self.twitch_thread or not hasattr(self.twitch_thread.worker, 'get_chat_messages'):
+            if not self.twitch_worker:
                 QMessageBox.information(self, 'Export Log', 'ยังไม่มีข้อมูลประวัติการตรวจจับจาก Twitch')
                 return
             
@@ -1370,7 +1475,7 @@ class BadWordDetectorApp(QWidget):
                 export_data = []
                 
                 # Export ข้อมูล Twitch mode
-                for chat_msg in self.twitch_thread.worker.get_chat_messages():
+                for chat_msg in self.twitch_worker.get_chat_messages():
                     export_data.append({
                         'วันที่': chat_msg['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
                         'Channel': chat_msg['channel'],
@@ -1405,18 +1510,17 @@ class BadWordDetectorApp(QWidget):
             if hasattr(self, 'performance_timer'):
                 self.performance_timer.stop()
             
-            # ปิดการเชื่อมต่อ Twitch และรอ thread จบ
-            if self.twitch_thread:
-                # เก็บ reference เดิมไว้ก่อน เพราะ disconnect_twitch จะเซ็ตเป็น None
-                thread = self.twitch_thread
+            self.alert_timer.stop()
+            self.alert_scheduler.close()
+            
+            # ปิดการเชื่อมต่อ Twitch แล้วหยุด event loop ของ IRC client
+            if self.twitch_worker:
                 self.disconnect_twitch()
-                # รอ thread จบก่อนปิดโปรแกรม
-                if thread and thread.isRunning():
-                    thread.wait(3000)  # รอ 3 วินาที
-                    if thread.isRunning():
-                        thread.terminate()  # Force terminate
-                        thread.wait(1000)  # รออีก 1 วินาที
+            shared_event_loop.stop()
             
+            if self.detection_pool is not None:
+                self.detection_pool.close()
+                self.detection_pool = None
             
             event.accept()
             
@@ -1424,6 +1528,13 @@ class BadWordDetectorApp(QWidget):
             self.log_error(f"Error during application shutdown: {e}")
             event.accept()
 
+    def toggle_fuzzy_matching(self):
+        """เปิด/ปิด Fuzzy matching ใน worker"""
+        if self.twitch_worker:
+            self.twitch_worker.set_fuzzy_matching(self.fuzzy_checkbox.isChecked())
+        if self.detection_pool is not None:
+            self.detection_pool.reload(fuzzy_matching=self.fuzzy_checkbox.isChecked())
+
     def toggle_dark_mode(self):
         """สลับ Dark Mode"""
         if self.dark_mode_checkbox.isChecked():
@@ -1455,7 +1566,7 @@ class BadWordDetectorApp(QWidget):
                     padding-top: 10px;
                     background-color: #3d3d3d;
                 }
-                QTextEdit {
+                QListView {
                     border: 1px solid #555555;
                     border-radius: 4px;
                     padding: 5px;
@@ -0,0 +1,115 @@
+import threading
+import time
+import pytest
+from alert_scheduler import AlertScheduler, default_sound_player
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingPlayer:
+    def __init__(self, duration=0.0):
+        self.duration = duration
+        self.played = []
+        self.threads = set()
+
+    def __call__(self, sound_file):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.duration)
+        self.played.append(sound_file)
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    return condition()
+
+
+class TestAlertScheduler:
+    """ทดสอบการจำกัดความถี่เสียงเตือนและการรวม notification"""
+
+    def test_sound_is_rate_limited_and_off_thread(self):
+        clock = FakeClock()
+        player = RecordingPlayer()
+        scheduler = AlertScheduler(sound_player=player, sound_interval=2.0, clock=clock)
+        for i in range(100):
+            clock.now = i * 0.01
+            scheduler.alert(1, 'viewer: ควาย', sound_file='alert.wav')
+        assert wait_for(lambda: scheduler.sounds_played == 1)
+        clock.now = 2.5
+        scheduler.alert(1, 'viewer: ควาย')
+        assert wait_for(lambda: scheduler.sounds_played == 2)
+        scheduler.close()
+
+        assert player.played == ['alert.wav', None]
+        assert player.threads == {'alert-sound'}
+        assert scheduler.sounds_played == 2
+        assert scheduler.sounds_skipped == 99
+
+    def test_burst_is_summarized(self):
+        clock = FakeClock()
+        notifications = []
+        scheduler = AlertScheduler(notify=notifications.append, sound_player=RecordingPlayer(),
+                                   summary_window=5.0, clock=clock)
+        # ครั้งแรกแจ้งทันที
+        scheduler.alert(1, 'viewer1: fuck')
+        assert notifications == ['viewer1: fuck']
+        # ที่ตามมาใน 5 วินาทีรวมเป็นข้อความสรุปเดียว
+        for i in range(37):
+            clock.now = 0.1 * (i + 1)
+            scheduler.alert(1, f'viewer{i + 2}: ควาย')
+        scheduler.poll()
+        assert len(notifications) == 1
+        clock.now = 5.0
+        scheduler.poll()
+        assert notifications[1] == 'พบคำหยาบ 37 ครั้งใน 5 วินาที ล่าสุด viewer38: ควาย'
+        # ช่วงต่อไปเงียบ ไม่มีสรุป และครั้งถัดไปแจ้งทันทีอีกครั้ง
+        clock.now = 10.0
+        scheduler.poll()
+        assert len(notifications) == 2
+        clock.now = 11.0
+        scheduler.alert(3, 'viewer99: shit')
+        assert notifications[2] == 'พบ 3 ข้อความ ล่าสุด viewer99: shit'
+        scheduler.close()
+
+    def test_spam_wave_does_not_block(self):
+        """คำหยาบ 10,000 ครั้ง (ก้อนละ 10) ขณะเสียงเตือนใช้เวลาเล่น 500 ms"""
+        notifications = []
+        player = RecordingPlayer(duration=0.5)
+        scheduler = AlertScheduler(notify=notifications.append, sound_player=player,
+                                   sound_interval=0.0, summary_window=0.05)
+        start = time.perf_counter()
+        for i in range(1000):
+            scheduler.alert(10, f'viewer{i}: ควาย')
+            scheduler.poll()
+        elapsed = time.perf_counter() - start
+        scheduler.close(timeout=0)
+
+        print(f"\n{'='*50}")
+        print("Alert scheduler under a spam wave")
+        print(f"{'='*50}")
+        print("Detections:    10000 in 1000 batches")
+        print(f"alert() total: {elapsed * 1000:.1f} ms ({elapsed / 1000 * 1e6:.1f} µs/call)")
+        print(f"Sounds:        {1000 - scheduler.sounds_skipped} started, {scheduler.sounds_skipped} skipped")
+        print(f"Notifications: {len(notifications)}")
+        print(f"{'='*50}")
+
+        # เดิม Beep(1000, 500) บน thread ของ GUI จะค้าง 500 ms ต่อก้อน
+        assert elapsed < 0.5
+        # เสียงแรกยังเล่นไม่จบ ที่เหลือถูกข้ามทั้งหมด
+        assert scheduler.sounds_skipped == 999
+        # notification ไม่เกินหนึ่งครั้งต่อ summary_window (บวกครั้งแรก)
+        assert len(notifications) <= elapsed / 0.05 + 2
+
+    def test_default_player(self):
+        assert callable(default_sound_player())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s", "--tb=short"])
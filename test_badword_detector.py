@@ -4,6 +4,7 @@ import sys
 from datetime import datetime
 import pandas as pd
 from main_gui import TwitchChatWorker
+from badword_engine import wordsegment_model
 
 # ================== 1. ACCURACY TESTING (50 Cases) ==================
 
@@ -12,7 +13,9 @@ class TestAccuracy:
     
     @pytest.fixture
     def worker(self):
-        return TwitchChatWorker("test_channel")
+        worker = TwitchChatWorker("test_channel")
+        wordsegment_model.wait_until_ready()  # test ต้องการผล segment ครบ
+        return worker
     
     @pytest.fixture
     def test_dataset(self):
@@ -165,6 +168,37 @@ class TestAccuracy:
         # Assert (ปรับลดลงหน่อยเผื่อมีหลุด จะได้ไม่ Error จนตกใจ)
         assert accuracy >= 90, f"Accuracy ต่ำเกินไป: {accuracy:.2f}%"
 
+    def test_is_offensive_agrees_with_full_detection(self, worker, test_dataset):
+        """is_offensive ต้องตอบตรงกับ optimized_detect_bad_words ทุกข้อความ"""
+        for fuzzy in (False, True):
+            worker.set_fuzzy_matching(fuzzy).result()
+            assert worker.detector.fuzzy_matching is fuzzy
+            for message, _ in test_dataset:
+                worker.verdict_cache.clear()
+                expected = len(worker.optimized_detect_bad_words(message)) > 0
+                worker.verdict_cache.clear()
+                assert worker.is_offensive(message) == expected, message
+
+    @pytest.mark.parametrize("message, expected", [
+        # ยุบตัวซ้ำเหลือตัวเดียวเคยทำให้ "booobs" ในไฟล์กลายเป็น "bobs"
+        ("booobs", ["booobs"]),
+        ("bobs burgers", []),
+        ("hi bob s", []),
+        # ตัวเลขที่อยู่เดี่ยวๆ ไม่ใช่ leetspeak
+        ("5 hit combo", []),
+        # "assss" เคยถูกยุบเป็น "as"
+        ("assss", ["ass"]),
+        ("you asssss", ["ass"]),
+        ("fuuuuck", ["fuck", "fuuck"]),
+        # รายงานคำในไฟล์ที่เขียนตรงกับรูป normalize ไม่ใช่คำ leetspeak ที่ได้ key เดียวกัน
+        ("ass", ["ass"]),
+        ("@$$", ["ass"]),
+        ("s h i t", ["s h i t", "shit"]),
+    ])
+    def test_normalization_regressions(self, worker, message, expected):
+        assert sorted(worker.optimized_detect_bad_words(message)) == expected
+        assert worker.is_offensive(message) == bool(expected)
+
 # ================== 2. PERFORMANCE & MEMORY TESTING ==================
 
 class TestPerformance:
@@ -172,7 +206,9 @@ class TestPerformance:
     
     @pytest.fixture
     def worker(self):
-        return TwitchChatWorker("test_channel")
+        worker = TwitchChatWorker("test_channel")
+        wordsegment_model.wait_until_ready()  # test ต้องการผล segment ครบ
+        return worker
     
     def test_detection_speed(self, worker):
         """ทดสอบความเร็วในการตรวจจับ (Speed)"""
@@ -202,9 +238,179 @@ class TestPerformance:
         
         assert avg_time < 100, f"ช้าเกินไป: {avg_time:.3f} ms"
     
+    def test_batch_detection_throughput(self, worker):
+        """เทียบ throughput (ข้อความ/วินาที) ของ detect_batch กับการตรวจทีละข้อความ"""
+        test_messages = [
+            "สวัสดีครับ",
+            "hello everyone",
+            "ไอ้สัสว์",
+            "you stupid",
+            "วันนี้อากาศดีมาก hello nice stream"
+        ] * 200 + [f"message number {i}" for i in range(1000)]
+        
+        worker.verdict_cache.clear()
+        worker.segment_cache.clear()
+        start_time = time.perf_counter()
+        single_results = [worker.optimized_detect_bad_words(message) for message in test_messages]
+        single_time = time.perf_counter() - start_time
+        
+        worker.verdict_cache.clear()
+        worker.segment_cache.clear()
+        start_time = time.perf_counter()
+        batch_results = worker.detect_batch(test_messages)
+        batch_time = time.perf_counter() - start_time
+        
+        print("\n" + "="*50)
+        print("📦 BATCH DETECTION THROUGHPUT")
+        print("="*50)
+        print(f"Total Messages: {len(test_messages)}")
+        print(f"Per-message: {len(test_messages) / single_time:,.0f} msgs/s")
+        print(f"Batch:       {len(test_messages) / batch_time:,.0f} msgs/s")
+        print("="*50)
+        
+        assert len(batch_results) == len(test_messages)
+        assert [sorted(r) for r in batch_results] == [sorted(r) for r in single_results]
+        
+        stats = worker.get_prefilter_stats()
+        print(f"Prefilter reject rate: {stats['reject_rate'] * 100:.1f}% "
+              f"(saved ~{stats['time_saved_ms']:.1f} ms)")
+    
+    def test_prefilter_stats_are_thread_safe(self, worker):
+        """หลาย thread ตรวจพร้อมกัน สถิติ prefilter ต้องนับครบทุกข้อความ"""
+        import threading
+        detector = worker.detector
+        messages = ["hello everyone", "nice stream", "gg wp", "fuck you", "ไอ้ควาย"]
+        per_thread = 2000
+        # จำนวนที่ถูกคัดทิ้งต่อหนึ่งรอบของ messages (ตรวจ thread เดียวก่อน)
+        for message in messages:
+            detector.detect(message)
+        rejected_per_round = worker.get_prefilter_stats()['rejected']
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # สลับ thread บ่อยๆ ให้ read-modify-write ชนกันได้ง่าย
+        try:
+            threads = [threading.Thread(target=lambda: [detector.detect(messages[i % len(messages)])
+                                                        for i in range(per_thread)])
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        stats = worker.get_prefilter_stats()
+        assert stats['checked'] == len(messages) + 4 * per_thread
+        assert stats['rejected'] == rejected_per_round * (1 + 4 * per_thread // len(messages))
+
+    def test_is_offensive_speedup(self, worker):
+        """เทียบเวลา is_offensive กับ optimized_detect_bad_words บน traffic ที่หยาบเยอะ/สะอาดเยอะ"""
+        offensive = ["ไอ้ควาย", "fuck you", "มึงมัน stupid", "สัส", "you are a bitch"]
+        clean = ["สวัสดีครับ", "hello everyone", "nice stream", "วันนี้อากาศดีมาก", "gg wp"]
+        workloads = {
+            'offensive-heavy': (offensive * 9 + clean) * 20,
+            'clean-heavy': (clean * 9 + offensive) * 20,
+        }
+        
+        print("\n" + "="*50)
+        print("🚦 IS_OFFENSIVE EARLY-EXIT")
+        print("="*50)
+        for name, messages in workloads.items():
+            # ใช้ข้อความไม่ซ้ำกันเพื่อไม่ให้ verdict cache ช่วย
+            messages = [f"{message} {i}" for i, message in enumerate(messages)]
+            worker.verdict_cache.clear()
+            worker.segment_cache.clear()
+            start_time = time.perf_counter()
+            full = [len(worker.optimized_detect_bad_words(message)) > 0 for message in messages]
+            full_time = time.perf_counter() - start_time
+            
+            worker.verdict_cache.clear()
+            worker.segment_cache.clear()
+            start_time = time.perf_counter()
+            early = [worker.is_offensive(message) for message in messages]
+            early_time = time.perf_counter() - start_time
+            
+            print(f"{name:16} full: {full_time * 1000:7.1f} ms   "
+                  f"is_offensive: {early_time * 1000:7.1f} ms   ({full_time / early_time:.1f}x)")
+            assert early == full
+        print("="*50)
+    
+    def test_stage_timings(self, worker):
+        """worker ต้องเก็บ latency ของทุกขั้นตอน และการจับเวลาต้องไม่ทำให้ช้าลงมาก"""
+        messages = [f"{message} {i}" for i in range(200) for message in
+                    ["ไอ้ควาย", "hello everyone", "มึงมัน stupid", "วันนี้อากาศดีมาก"]]
+        worker.detector.timings.reset()
+        for message in messages:
+            worker.optimized_detect_bad_words(message)
+        
+        summary = worker.get_timing_summary()
+        assert summary['total']['count'] == len(messages)
+        assert summary['normalize']['count'] == len(messages)
+        for stage in ('thai', 'segment', 'english'):
+            assert 0 < summary[stage]['count'] <= len(messages)
+            assert summary[stage]['p50'] <= summary[stage]['p95'] <= summary[stage]['p99']
+        
+        elapsed = {}
+        for enabled in (False, True):
+            worker.detector.enable_timings(enabled)
+            worker.verdict_cache.clear()
+            worker.segment_cache.clear()
+            start_time = time.perf_counter()
+            for message in messages:
+                worker.optimized_detect_bad_words(message)
+            elapsed[enabled] = time.perf_counter() - start_time
+        
+        print("\n" + "="*50)
+        print("⏱️ STAGE LATENCY (p50 / p95 / p99)")
+        print("="*50)
+        for stage, stats in summary.items():
+            print(f"{stage:10} {stats['p50'] * 1e6:8.1f} / {stats['p95'] * 1e6:8.1f} / {stats['p99'] * 1e6:8.1f} µs")
+        print(f"Instrumentation overhead: {(elapsed[True] / elapsed[False] - 1) * 100:+.1f}%")
+        print("="*50)
+    
+    def test_fuzzy_matching_latency(self, worker):
+        """วัดเวลาที่เพิ่มขึ้นเมื่อเปิด Fuzzy matching และต้องจับ "ไอ้สัD" ได้"""
+        test_messages = [
+            "สวัสดีครับ",
+            "hello everyone",
+            "ไอ้สัสว์",
+            "you stupid",
+            "วันนี้อากาศดีมาก hello nice stream"
+        ] + [f"ข้อความทดสอบที่ {i} hello stream" for i in range(200)]
+        
+        timings = {}
+        for fuzzy in (False, True):
+            if fuzzy:
+                worker.set_fuzzy_matching(True).result()
+            worker.verdict_cache.clear()
+            start_time = time.perf_counter()
+            for message in test_messages:
+                worker.optimized_detect_bad_words(message)
+            timings[fuzzy] = (time.perf_counter() - start_time) / len(test_messages) * 1000
+        
+        print("\n" + "="*50)
+        print("🔎 FUZZY MATCHING LATENCY")
+        print("="*50)
+        print(f"Exact only:  {timings[False]:.4f} ms/message")
+        print(f"With fuzzy:  {timings[True]:.4f} ms/message")
+        print(f"Overhead:    {timings[True] - timings[False]:.4f} ms/message")
+        print("="*50)
+        
+        assert "ไอ้สัส" in worker.optimized_detect_bad_words("ไอ้สัD")
+        assert timings[True] < 100, f"ช้าเกินไป: {timings[True]:.3f} ms"
+    
+    def test_fuzzy_toggle_keeps_last_request(self, worker):
+        """เปิดแล้วปิด fuzzy ทันที งานเปิดที่ค้างคิวต้องไม่มาเปิดทับทีหลัง"""
+        enabled = worker.set_fuzzy_matching(True)
+        disabled = worker.set_fuzzy_matching(False)
+        enabled.result()
+        disabled.result()
+        assert worker.detector.fuzzy_matching is False
+        
+        worker.set_fuzzy_matching(False)
+        worker.set_fuzzy_matching(True).result()
+        assert worker.detector.fuzzy_matching is True
+    
     def test_memory_usage(self, worker):
         """ทดสอบการใช้หน่วยความจำ (Memory)"""
-        import sys
         for i in range(200):
             chat_info = {
                 'timestamp': datetime.now(),
@@ -230,6 +436,40 @@ class TestPerformance:
         
         assert memory_kb < 500, f"ใช้หน่วยความจำมากเกินไป: {memory_kb:.2f} KB"
 
+    def test_verdict_cache(self, worker):
+        """ข้อความซ้ำต้องใช้ผลจาก cache และ reload ต้องล้างผลเดิม"""
+        first = worker.optimized_detect_bad_words("ไอ้ควาย")
+        hits_before = worker.verdict_cache.hits
+        assert worker.optimized_detect_bad_words("ไอ้ควาย  ") == first
+        assert worker.verdict_cache.hits == hits_before + 1
+        
+        generation = worker.wordlist_generation
+        worker.reload_bad_words().result()
+        assert worker.wordlist_generation > generation
+        assert len(worker.verdict_cache) == 0
+    
+    def test_incremental_word_changes(self, worker):
+        """เพิ่ม/ลบคำแบบ incremental ต้องมีผลทันทีโดยไม่ต้อง compile ใหม่"""
+        automaton = worker.wordlists.thai_automaton
+        assert worker.optimized_detect_bad_words("เจ้าบื้อ") == []
+        assert worker.optimized_detect_bad_words("พวกสวะ") == ["สวะ"]
+        
+        worker.apply_word_changes('th', ['บื้อ'], ['สวะ']).result()
+        assert worker.optimized_detect_bad_words("เจ้าบื้อ") == ["บื้อ"]
+        assert worker.optimized_detect_bad_words("พวกสวะ") == []
+        assert worker.wordlists.thai_automaton is automaton  # ใช้ automaton เดิมร่วมกัน
+        
+        worker.apply_word_changes('en', ['hot potato'], ['alabama hot pocket']).result()
+        assert worker.optimized_detect_bad_words("hot potato") == ["hot potato"]
+        assert worker.optimized_detect_bad_words("alabama hot pocket") == []
+
+    def test_mixed_script_routing(self, worker):
+        """ข้อความผสมไทย/อังกฤษ แต่ละช่วงต้องถูกส่งไปตัวตรวจของภาษานั้น"""
+        assert sorted(worker.optimized_detect_bad_words("มึงมัน stupid ควาย")) == ["stupid", "ควาย"]
+        assert sorted(worker.optimized_detect_bad_words("ควายstupidควาย")) == ["stupid", "ควาย"]
+        assert worker.detect_thai_profanity("you stupid") == []
+        assert worker.detect_english_profanity("ไอ้ควาย") == []
+
 if __name__ == "__main__":
     print("\n" + "="*70)
     print("🚀 STARTING DEBUG MODE TEST")
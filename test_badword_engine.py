@@ -0,0 +1,366 @@
+import os
+import pickle
+import random
+import pytest
+from badword_engine import (
+    AhoCorasick, CompiledWordLists, DetectionTimings, FuzzyIndex, LatencyHistogram, LRUCache, NgramPrefilter, PhraseMatcher, TextNormalizer, levenshtein,
+    load_compiled_word_lists, load_word_lists, read_word_file, split_scripts, tokenize, wordlist_checksum
+)
+
+# ================== 1. AHO-CORASICK AUTOMATON ==================
+
+class TestAhoCorasick:
+    """ทดสอบ automaton ว่าให้ผลตรงกับการวนลูปเช็คทีละคำแบบเดิม"""
+
+    def test_matches_naive_substring_search(self):
+        badwords = {'ควย', 'ควาย', 'อีควาย', 'สัส', 'ไอ้สัส', 'เหี้ย', 'ไอเหี้ย', 'he', 'she', 'his', 'hers'}
+        automaton = AhoCorasick(badwords)
+        alphabet = 'ควายอีสัไ้เหี้ยhers '
+
+        random.seed(0)
+        for _ in range(500):
+            message = ''.join(random.choices(alphabet, k=random.randint(0, 20)))
+            expected = {word for word in badwords if word in message}
+            assert automaton.find_all(message) == expected, message
+
+    def test_token_patterns(self):
+        """pattern แบบ tuple ใช้ match เป็นรายคำได้"""
+        automaton = AhoCorasick([('alabama', 'hot', 'pocket'), ('hot', 'dog')])
+        assert automaton.find_all('i ate an alabama hot pocket'.split()) == {('alabama', 'hot', 'pocket')}
+        assert automaton.find_all('alabama hot dog'.split()) == {('hot', 'dog')}
+        assert automaton.find_all('hot alabama pocket'.split()) == set()
+
+    def test_bounded_scan(self):
+        automaton = AhoCorasick(['ควาย', 'สัส'])
+        text = 'ควายfuckสัส'
+        assert automaton.find_all(text, 0, 4) == {'ควาย'}
+        assert automaton.find_all(text, 8) == {'สัส'}
+        assert automaton.find_all(text, 1, 10) == set()
+
+    def test_empty_dictionary(self):
+        assert AhoCorasick().find_all('อะไรก็ได้') == set()
+        assert len(AhoCorasick(['', 'abc'])) == 1
+
+
+# ================== 2. MULTI-WORD PHRASES ==================
+
+class TestPhraseMatcher:
+    """ทดสอบการจับวลีหลายคำจาก badwords_en.txt"""
+
+    @pytest.fixture
+    def matcher(self):
+        with open('badwords_en.txt', 'r', encoding='utf-8') as f:
+            return PhraseMatcher(line.strip().lower() for line in f if ' ' in line.strip())
+
+    def test_phrases_are_loaded(self, matcher):
+        assert len(matcher) > 200
+
+    def test_detect_phrases(self, matcher):
+        assert matcher.find_all(tokenize('lol 2 girls 1 cup!!')) == {'2 girls 1 cup'}
+        assert matcher.find_all(tokenize('Alabama Hot Pocket')) == {'alabama hot pocket'}
+        assert matcher.find_all(tokenize('you are a s s')) == {'a s s'}
+
+    def test_single_words_are_ignored(self, matcher):
+        assert matcher.find_all(tokenize('fuck hot pocket girls cup')) == set()
+
+
+# ================== 3. LRU CACHE ==================
+
+class TestLRUCache:
+    """ทดสอบ cache ของผล segmentation"""
+
+    def test_hit_miss_and_eviction_counters(self):
+        cache = LRUCache(max_entries=2)
+        cache.put('a', ('a',))
+        cache.put('b', ('b',))
+        assert cache.get('a') == ('a',)      # hit -> 'a' กลายเป็นตัวล่าสุด
+        cache.put('c', ('c',))               # ต้องไล่ 'b' ออก
+        assert cache.get('b') is None
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 1, 1)
+        assert len(cache) == 2
+
+    def test_byte_limit(self):
+        cache = LRUCache(max_entries=1000, max_bytes=2000)
+        for i in range(100):
+            cache.put(f'message {i}', ('message', str(i)))
+        assert cache.current_bytes <= 2000
+        assert cache.evictions > 0
+        cache.clear()
+        assert len(cache) == 0 and cache.current_bytes == 0
+
+    def test_ttl_expiry(self):
+        now = [100.0]
+        cache = LRUCache(ttl=60, clock=lambda: now[0])
+        cache.put('copypasta', (0, ('fuck',)))
+        now[0] += 59
+        assert cache.get('copypasta') == (0, ('fuck',))
+        now[0] += 2
+        assert cache.get('copypasta') is None
+        assert cache.stats()['expirations'] == 1
+        assert cache.current_bytes == 0
+
+
+# ================== 4. TEXT NORMALIZER ==================
+
+class TestTextNormalizer:
+    """ทดสอบการแปลงข้อความก่อนตรวจจับ"""
+
+    @pytest.fixture
+    def normalizer(self):
+        return TextNormalizer()
+
+    @pytest.mark.parametrize("message, expected", [
+        ("ค-ว-า-ย", "ควาย"),
+        ("You are s.h.i.t", "you are shit"),
+        ("5h1t", "shit"),
+        ("@$$", "ass"),
+        ("FUUUUCK   you!", "fuuck you"),
+        ("ไอ้ควายยยยย", "ไอ้ควายย"),
+        ("you asssss", "you ass"),
+        ("5 hit combo 555", "hit combo"),
+        ("bullshit", "bullshit"),
+        ("มึงมัน stupid 😀", "มึงมัน stupid"),
+    ])
+    def test_normalize_text(self, normalizer, message, expected):
+        assert normalizer.normalize(message).text == expected
+
+    def test_shared_forms(self, normalizer):
+        normalized = normalizer.normalize("Hello  ไอ้ ควาย")
+        assert normalized.compact == "helloไอ้ควาย"
+        assert normalized.tokens == ["hello", "ไอ้", "ควาย"]
+        assert normalized.squeezed is None
+
+    def test_squeezed_form(self, normalizer):
+        # ตัวซ้ำ 3 ตัวขึ้นไปได้ทั้งรูป 2 ตัว (รูปหลัก) และรูปตัวเดียว
+        normalized = normalizer.normalize("booobs fuuuuck")
+        assert normalized.text == "boobs fuuck"
+        assert normalized.squeezed.text == "bobs fuck"
+        assert normalized.squeezed.squeezed is None
+
+    @pytest.mark.parametrize("compact, thai, latin", [
+        ("", [], []),
+        ("youstupid", [], ["youstupid"]),
+        ("มึงมัน", [(0, 6)], []),
+        ("มึงมันstupid", [(0, 6)], ["stupid"]),
+        ("aไอ้bc", [(1, 4)], ["a", "bc"]),
+    ])
+    def test_split_scripts(self, compact, thai, latin):
+        runs = split_scripts(compact)
+        assert list(runs.thai) == thai
+        assert list(runs.latin) == latin
+
+    def test_normalize_many_matches_single(self, normalizer):
+        messages = ["", "", "", "ค-ว-า-ย", "aaaa", "", "5h1t!!!", "สวัสดี\nครับ", "a\x1eb"]
+        assert normalizer.normalize_many(messages[:-1]) == [normalizer.normalize(m) for m in messages[:-1]]
+        assert normalizer.normalize_many(messages) == [normalizer.normalize(m) for m in messages]
+        assert normalizer.normalize_many([]) == []
+
+
+# ================== 5. COMPILED WORD-LIST ARTIFACT ==================
+
+class TestCompiledArtifact:
+    """ทดสอบไฟล์ badwords.compiled (ใช้ซ้ำได้ และสร้างใหม่เมื่อไฟล์คำหยาบเปลี่ยน)"""
+
+    @pytest.fixture
+    def word_files(self, tmp_path):
+        thai_path = tmp_path / 'badwords.txt'
+        english_path = tmp_path / 'badwords_en.txt'
+        thai_path.write_text('ควาย\nสัส\n', encoding='utf-8')
+        english_path.write_text('fuck\nalabama hot pocket\n', encoding='utf-8')
+        return thai_path, english_path
+
+    def test_artifact_is_created_and_reused(self, word_files):
+        thai_path, english_path = word_files
+        compiled_path = thai_path.parent / 'badwords.compiled'
+
+        compiled = load_word_lists(str(thai_path), str(english_path))
+        assert compiled_path.exists()
+        assert compiled.thai_automaton.find_all('ไอ้ควาย') == {'ควาย'}
+
+        checksum = wordlist_checksum(thai_path.read_bytes(), english_path.read_bytes())
+        reloaded = load_compiled_word_lists(str(compiled_path), checksum)
+        assert reloaded is not None
+        assert reloaded.badwords_en == {'fuck', 'alabama hot pocket'}
+        assert reloaded.thai_automaton.find_all('ไอ้ควาย') == {'ควาย'}
+        assert reloaded.english_lookup == compiled.english_lookup
+        assert reloaded.find_phrases(['an', 'alabama', 'hot', 'pocket']) == {'alabama hot pocket'}
+        assert reloaded.prefilter.may_contain('alabamahotpocket')
+
+    def test_stale_artifact_is_rebuilt(self, word_files):
+        thai_path, english_path = word_files
+        load_word_lists(str(thai_path), str(english_path))
+
+        thai_path.write_text('ควาย\nเหี้ย\n', encoding='utf-8')
+        old_checksum = wordlist_checksum(b'\xe0', english_path.read_bytes())
+        assert load_compiled_word_lists(str(thai_path.parent / 'badwords.compiled'), old_checksum) is None
+
+        compiled = load_word_lists(str(thai_path), str(english_path))
+        assert compiled.badwords_th == {'ควาย', 'เหี้ย'}
+
+    def test_pickle_payload_is_never_loaded(self, word_files, tmp_path):
+        """ไฟล์ compile ที่ถูกแก้ให้เป็น pickle ต้องไม่ถูกรันแม้ header/checksum ถูกต้อง"""
+        thai_path, english_path = word_files
+        marker = tmp_path / 'pwned'
+
+        class Exploit:
+            def __reduce__(self):
+                return (os.system, (f'touch {marker}',))
+
+        checksum = wordlist_checksum(thai_path.read_bytes(), english_path.read_bytes())
+        (thai_path.parent / 'badwords.compiled').write_bytes(
+            b'BWCOMPILED' + checksum.encode('ascii') + b'\n' + pickle.dumps(Exploit()))
+        compiled = load_word_lists(str(thai_path), str(english_path))
+        assert not marker.exists()
+        assert compiled.badwords_th == {'ควาย', 'สัส'}
+
+    def test_corrupted_artifact(self, word_files):
+        thai_path, english_path = word_files
+        (thai_path.parent / 'badwords.compiled').write_bytes(b'garbage')
+        compiled = load_word_lists(str(thai_path), str(english_path))
+        assert compiled.badwords_th == {'ควาย', 'สัส'}
+
+
+@pytest.fixture(scope="module")
+def wordlists():
+    return CompiledWordLists(read_word_file('badwords.txt')[0], read_word_file('badwords_en.txt')[0])
+
+
+class TestWordListChanges:
+    """เพิ่ม/ลบคำแบบ incremental ต้องได้ผลเหมือน compile ใหม่ทั้งชุด"""
+
+    @staticmethod
+    def assert_same_as_rebuild(changed):
+        rebuilt = CompiledWordLists(changed.badwords_th, changed.badwords_en)
+        assert changed.english_sources == rebuilt.english_sources
+        assert changed.english_lookup == rebuilt.english_lookup
+        messages = ["ass", "you a55", "shit", "booobs", "alabama hot pocket", "ไอ้ควาย", "สวะ", "hot potato"]
+        for message in messages:
+            tokens = changed.normalizer.normalize(message).tokens
+            compact = ''.join(tokens)
+            assert changed.find_thai(compact) == rebuilt.find_thai(compact), message
+            assert changed.find_phrases(tokens) == rebuilt.find_phrases(tokens), message
+
+    @pytest.mark.parametrize("removed", [
+        ['@$$'], ['ass'], ['@$$', 'a55', 'a_s_s', 'ass'], ['5h1t', 'booobs'], ['alabama hot pocket'],
+    ])
+    def test_remove_matches_rebuild(self, wordlists, removed):
+        changed = wordlists.with_changes('en', removed=removed)
+        self.assert_same_as_rebuild(changed)
+
+    def test_remove_one_variant_keeps_the_key(self, wordlists):
+        changed = wordlists.with_changes('en', removed=['@$$'])
+        assert changed.english_lookup['ass'] == 'ass'
+        changed = changed.with_changes('en', removed=['ass'])
+        assert changed.english_lookup['ass'] in {'a55', 'a_s_s'}
+        changed = changed.with_changes('en', removed=['a55', 'a_s_s'])
+        assert 'ass' not in changed.english_lookup
+        changed = changed.with_changes('en', added=['@$$'])
+        assert changed.english_lookup['ass'] == '@$$'
+        self.assert_same_as_rebuild(changed)
+        # snapshot เดิมต้องไม่ถูกแก้
+        assert wordlists.english_sources['ass'] == {'@$$', 'a55', 'a_s_s', 'ass'}
+
+    def test_add_and_remove_both_languages(self, wordlists):
+        changed = wordlists.with_changes('en', added=['hot potato', 'b00bies'], removed=['shit'])
+        changed = changed.with_changes('th', added=['บื้อ'], removed=['สวะ'])
+        self.assert_same_as_rebuild(changed)
+
+
+# ================== 6. FUZZY MATCHING ==================
+
+class TestFuzzyIndex:
+    """ทดสอบการค้นหาคำสะกดใกล้เคียง"""
+
+    def test_levenshtein(self):
+        assert levenshtein('ไอ้สัส', 'ไอ้สัd') == 1
+        assert levenshtein('kitten', 'sitting') == 3
+        assert levenshtein('kitten', 'sitting', max_distance=1) == 2
+
+    def test_matches_brute_force(self):
+        words = ['bastard', 'bullshit', 'asshole', 'dickhead', 'motherfucker', 'wanker']
+        index = FuzzyIndex(((w, w) for w in words), max_distance=1)
+        for term in ['bastart', 'bulshit', 'assholes', 'dikhead', 'motherfuker', 'banker', 'hello', 'bast']:
+            expected = {w for w in words if levenshtein(term, w) <= 1}
+            assert index.lookup(term) == expected, term
+
+    def test_substring_search(self):
+        index = FuzzyIndex([('ไอ้สัส', 'ไอ้สัส'), ('ไอ้ควาย', 'ไอ้ควาย')], max_distance=1)
+        assert index.find_in('ไอ้สัd') == {'ไอ้สัส'}
+        assert index.find_in('เฮ้ยไอ้ควยยนี่') == {'ไอ้ควาย'}
+        assert index.find_in('สวัสดีครับ') == set()
+
+
+# ================== 7. N-GRAM PREFILTER ==================
+
+class TestNgramPrefilter:
+    """prefilter ต้องไม่คัดทิ้งข้อความที่มีคำหยาบเด็ดขาด"""
+
+    def test_never_rejects_messages_with_badwords(self):
+        badwords = ['ควาย', 'สัส', 'เหี้ย', 'fuck', 'ass', 'bitch', 'xx']
+        prefilter = NgramPrefilter(badwords)
+        alphabet = 'ควายสัเหี้ยfuckasbith x'
+
+        random.seed(1)
+        for _ in range(2000):
+            text = ''.join(random.choices(alphabet, k=random.randint(0, 15)))
+            if any(word in text for word in badwords):
+                assert prefilter.may_contain(text), text
+
+    def test_rejects_clean_text(self):
+        prefilter = NgramPrefilter(['ควาย', 'fuck', 'ass'])
+        assert not prefilter.may_contain('สวัสดีครับ')
+        assert not prefilter.may_contain('helloworld')
+        assert prefilter.may_contain('youareanass')
+        assert prefilter.with_words(['hello']).may_contain('helloworld')
+        assert not prefilter.may_contain('helloworld')
+
+    def test_short_words_do_not_grow_the_scan(self):
+        """คำสั้นกว่า n อยู่ใน set เดียวกับ n-gram ข้อความจึงถูกดูไม่เกิน n รอบไม่ว่า dictionary ใหญ่แค่ไหน"""
+        letters = 'bcdfghjklmnpqrstvwxz'
+        short_words = [a + b + c for a in letters for b in letters for c in 'aeiou']
+        prefilter = NgramPrefilter(short_words + ['ควาย', 'xy'])
+        assert len(prefilter._lengths) <= prefilter.n
+        assert prefilter.may_contain('aeiouaeiou') is False
+        assert prefilter.may_contain('bazinga')
+        assert prefilter.may_contain('foxyz')
+        assert prefilter.may_contain('ไอ้ควาย')
+        # ไฟล์ compile เก็บทั้ง n-gram และคำสั้นไว้ด้วยกัน โหลดกลับมาแล้วต้องได้ผลเหมือนเดิม
+        reloaded = NgramPrefilter.from_data(prefilter.to_data())
+        assert len(reloaded) == len(prefilter)
+        assert reloaded.may_contain('foxyz') and not reloaded.may_contain('aeiouaeiou')
+
+
+# ================== 8. LATENCY HISTOGRAM ==================
+
+class TestLatencyHistogram:
+    """ทดสอบ histogram ที่ใช้วัดเวลาของแต่ละขั้นตอน"""
+
+    def test_percentiles_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        values = [i * 1e-5 for i in range(1, 1001)]  # 10 µs - 10 ms
+        random.seed(2)
+        random.shuffle(values)
+        for value in values:
+            histogram.record(value)
+
+        values.sort()
+        for p in (50, 95, 99):
+            exact = values[int(len(values) * p / 100) - 1]
+            assert exact <= histogram.percentile(p) <= exact * 1.1, p
+        assert histogram.percentile(100) == pytest.approx(0.01)
+        assert histogram.mean() == pytest.approx(sum(values) / len(values))
+
+    def test_merge_and_take(self):
+        timings = DetectionTimings()
+        timings.record('thai', 0.001, count=3)
+        other = DetectionTimings()
+        other.merge(timings.take())
+        assert timings.summary()['thai']['count'] == 0
+        assert other.summary()['thai']['count'] == 3
+        assert other.summary()['thai']['p99'] == pytest.approx(0.001)
+        assert LatencyHistogram().percentile(50) == 0.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s", "--tb=short"])
@@ -1,6 +1,7 @@
 import time
 import random
 import string
+from badword_engine import AhoCorasick
 
 def generate_random_word(length=5):
     """สร้างคำมั่วๆ ยาว 5 ตัวอักษร"""
@@ -18,11 +19,16 @@ def mock_detect_thai(message, badwords_set):
             found_words.append(badword)
     return found_words
 
+def mock_detect_thai_automaton(message, automaton):
+    """Algorithm ใหม่ (Aho-Corasick) สแกนข้อความรอบเดียว ไม่ขึ้นกับขนาด set"""
+    message_clean = message.replace(' ', '')
+    return list(automaton.find_all(message_clean))
+
 def run_big_o_test():
     print("\n" + "="*70)
     print("🚀 เริ่มต้นการทดสอบ Big O Complexity (Thai Algorithm)")
     print("="*70)
-    print(f"{'Dict Size (N)':<15} | {'Time (ms)':<15} | {'Growth Rate'}")
+    print(f"{'Dict Size (N)':<15} | {'Time (ms)':<15} | {'Growth Rate':<12} | {'Automaton (ms)':<15} | {'Growth Rate'}")
     print("-" * 70)
 
     # ขนาดฐานข้อมูลที่จะทดสอบ (เพิ่มขึ้นเรื่อยๆ)
@@ -33,6 +39,7 @@ def run_big_o_test():
     
     base_time = 0
     execution_times = []
+    automaton_times = []
 
     for size in dictionary_sizes:
         # 1. สร้างฐานข้อมูลจำลองตามขนาด
@@ -53,13 +60,25 @@ def run_big_o_test():
         # เพื่อดูว่าถ้าข้อมูลเพิ่ม เวลาเพิ่มกี่เท่า
         growth = f"{avg_time_ms / execution_times[0]:.1f}x" if execution_times else "1.0x"
         
-        print(f"{size:<15} | {avg_time_ms:.4f} ms      | {growth}")
+        # 3. จับเวลา Aho-Corasick (สร้าง automaton ครั้งเดียว ไม่นับรวมในเวลา)
+        automaton = AhoCorasick(badwords_set)
+        start_time = time.time()
+        for _ in range(100):
+            mock_detect_thai_automaton(test_message, automaton)
+        end_time = time.time()
+        
+        automaton_ms = ((end_time - start_time) / 100) * 1000
+        automaton_times.append(automaton_ms)
+        automaton_growth = f"{automaton_ms / automaton_times[0]:.1f}x"
+        
+        print(f"{size:<15} | {avg_time_ms:.4f} ms      | {growth:<12} | {automaton_ms:.4f} ms      | {automaton_growth}")
 
     print("="*70)
     print("สรุปผลการทดสอบ:")
     print("1. เมื่อจำนวนคำหยาบ (N) เพิ่มขึ้น -> เวลาที่ใช้ (Time) เพิ่มขึ้นตาม")
     print("2. อัตราการเพิ่มเป็นแบบ 'เชิงเส้น' (Linear Growth) หรือ O(N)")
-    print("3. ยืนยันว่า Algorithm ปัจจุบันแปรผันตรงกับขนาดฐานข้อมูล")
+    print("3. ยืนยันว่า Algorithm เดิมแปรผันตรงกับขนาดฐานข้อมูล")
+    print("4. Aho-Corasick ใช้เวลาคงที่ตามความยาวข้อความ ไม่ขึ้นกับ N")
     print("="*70)
 
 if __name__ == "__main__":
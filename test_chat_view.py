@@ -0,0 +1,105 @@
+import os
+import time
+import pytest
+
+# เครื่องที่ไม่มีจอ (CI) สร้าง QApplication ไม่ได้ ใช้ platform offscreen แทน (ตั้งค่าเองไว้ก่อนก็ได้)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QListView
+from chat_view import ChatLogModel
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+class TestChatLogModel:
+    """ทดสอบ ring buffer ของช่องแสดงแชท"""
+
+    def test_newest_first_and_overflow(self, qapp):
+        model = ChatLogModel(capacity=5)
+        model.add_lines(['a', 'b', 'c'])
+        model.flush()
+        assert model.lines() == ['c', 'b', 'a']
+        model.add_lines(['d', 'e', 'f', 'g'])
+        model.flush()
+        assert model.rowCount() == 5
+        assert model.lines() == ['g', 'f', 'e', 'd', 'c']
+        assert model.data(model.index(0)) == 'g'
+        assert model.data(model.index(4)) == 'c'
+        # ก้อนที่ใหญ่กว่าความจุ เก็บเฉพาะท้ายก้อน
+        model.add_lines([str(i) for i in range(12)])
+        model.flush()
+        assert model.lines() == ['11', '10', '9', '8', '7']
+
+    def test_one_update_per_frame(self, qapp):
+        model = ChatLogModel(capacity=100, frame_interval_ms=10)
+        inserts = []
+        model.rowsInserted.connect(lambda parent, first, last: inserts.append((first, last)))
+        for i in range(30):
+            model.add_lines([f'line {i}'])
+        assert model.rowCount() == 0
+        deadline = time.perf_counter() + 1
+        while not inserts and time.perf_counter() < deadline:
+            qapp.processEvents()
+            time.sleep(0.005)
+        assert inserts == [(0, 29)]
+        assert model.lines()[0] == 'line 29'
+
+    def test_clear(self, qapp):
+        model = ChatLogModel(capacity=3)
+        model.add_lines(['a', 'b'])
+        model.flush()
+        model.add_lines(['c'])
+        model.clear()
+        model.flush()
+        assert model.rowCount() == 0
+        model.add_lines(['d'])
+        model.flush()
+        assert model.lines() == ['d']
+
+    def test_throughput(self, qapp):
+        """เติมแชท 2000 ข้อความ/วินาที เข้า QListView (offscreen) แล้ววัดเวลาที่ใช้ใน GUI thread"""
+        model = ChatLogModel(capacity=1000)
+        view = QListView()
+        view.setModel(model)
+        view.setUniformItemSizes(True)
+        view.resize(400, 150)
+        view.show()
+
+        rate, duration, batch_size = 2000, 2.0, 20
+        total = int(rate * duration)
+        busy = 0.0
+        start = time.perf_counter()
+        for i in range(0, total, batch_size):
+            # worker ส่งก้อนทุกๆ batch_size / rate วินาที
+            due = start + i / rate
+            while time.perf_counter() < due:
+                qapp.processEvents()
+            t0 = time.perf_counter()
+            model.add_lines([f'[00:00:00] viewer{j}: สวัสดีครับ hello {j}' for j in range(i, i + batch_size)])
+            qapp.processEvents()
+            busy += time.perf_counter() - t0
+        model.flush()
+        qapp.processEvents()
+        elapsed = time.perf_counter() - start
+
+        print(f"\n{'='*50}")
+        print("Chat view throughput (QListView + ring buffer)")
+        print(f"{'='*50}")
+        print(f"Messages:      {total} ({rate} msgs/s target)")
+        print(f"Elapsed:       {elapsed:.2f} s")
+        print(f"GUI busy:      {busy:.3f} s ({busy / elapsed * 100:.1f}%)")
+        print(f"Rows kept:     {model.rowCount()}")
+        print(f"{'='*50}")
+
+        assert model.rowCount() == 1000
+        assert model.lines()[0].endswith(f'hello {total - 1}')
+        # GUI thread ต้องว่างพอจะรับ input ได้ (ใช้เวลาไม่ถึงครึ่งของเวลาจริง)
+        assert busy < elapsed * 0.5
+        view.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s", "--tb=short"])
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+import pytest
+from badword_engine import BadWordDetector, wordsegment_model
+from detection_pool import DetectionPool
+
+MESSAGES = [
+    "สวัสดีครับ",
+    "ไอ้ควาย",
+    "hello everyone",
+    "fuck you",
+    "มึงมัน stupid",
+    "วันนี้อากาศดีมาก hello nice stream",
+    "alabama hot pocket",
+]
+
+
+@pytest.fixture(scope="module")
+def detector():
+    wordsegment_model.wait_until_ready()
+    return BadWordDetector()
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = DetectionPool(processes=2, max_batch=8)
+    yield pool
+    pool.close()
+
+
+class TestDetectionPool:
+    """ทดสอบการตรวจจับด้วยหลาย process"""
+
+    def test_results_match_in_process_detection(self, pool, detector):
+        messages = [f"{message} {i}" for i in range(20) for message in MESSAGES]
+        results = pool.detect_many(messages)
+        assert [sorted(r) for r in results] == [sorted(detector.detect(m)) for m in messages]
+
+    def test_verdicts_are_delivered_in_order_per_channel(self, pool, detector):
+        delivered = {'a': [], 'b': []}
+        finished = threading.Event()
+        expected_total = 2 * 200
+
+        def on_verdict(channel, index, found_words):
+            delivered[channel].append((index, sorted(found_words)))
+            if sum(len(v) for v in delivered.values()) == expected_total:
+                finished.set()
+
+        for index in range(200):
+            for channel in ('a', 'b'):
+                message = MESSAGES[index % len(MESSAGES)]
+                pool.submit(channel, message, lambda words, c=channel, i=index: on_verdict(c, i, words))
+
+        assert finished.wait(60)
+        for channel, verdicts in delivered.items():
+            assert [index for index, _ in verdicts] == list(range(200))
+            assert verdicts[1][1] == sorted(detector.detect(MESSAGES[1]))
+
+    def test_reload_under_load(self, pool, detector):
+        """reload() ระหว่างที่มีข้อความไหลเข้า ผลทุกข้อความต้องถูกต้อง (ไม่มีผลว่างจาก executor ที่ปิดไปแล้ว)"""
+        delivered = []
+        total = 600
+        finished = threading.Event()
+
+        def on_verdict(index, found_words):
+            delivered.append((index, sorted(found_words)))
+            if len(delivered) == total:
+                finished.set()
+
+        reloads = []
+        for index in range(total):
+            if index % 200 == 100:
+                reloads.append(pool.reload())
+            pool.submit('load', MESSAGES[index % len(MESSAGES)], lambda words, i=index: on_verdict(i, words))
+            if index % 20 == 0:
+                time.sleep(0.01)
+        for reload in reloads:
+            reload.result(60)
+
+        assert finished.wait(60)
+        expected = [sorted(detector.detect(message)) for message in MESSAGES]
+        assert [index for index, _ in delivered] == list(range(total))
+        assert all(words == expected[index % len(MESSAGES)] for index, words in delivered)
+
+    def test_broken_executor_falls_back_to_in_process_detection(self, detector):
+        pool = DetectionPool(processes=1, max_batch=4)
+        try:
+            pool._executor.shutdown()  # จำลอง process ลูกใช้ไม่ได้
+            delivered = []
+            finished = threading.Event()
+
+            def on_verdict(index, found_words):
+                delivered.append((index, sorted(found_words)))
+                if len(delivered) == len(MESSAGES):
+                    finished.set()
+
+            for index, message in enumerate(MESSAGES):
+                pool.submit('a', message, lambda words, i=index: on_verdict(i, words))
+            assert finished.wait(60)
+            assert delivered == [(i, sorted(detector.detect(message))) for i, message in enumerate(MESSAGES)]
+        finally:
+            pool.close()
+
+
+class TestDetectionPoolScaling:
+    """เทียบ throughput ของ 1 process กับทุก core"""
+
+    def test_scaling(self, detector):
+        messages = [f"{message} {i}" for i in range(1000) for message in MESSAGES]
+        cores = min(os.cpu_count() or 1, 8)
+
+        print("\n" + "="*50)
+        print("🧵 DETECTION POOL SCALING")
+        print("="*50)
+        baseline = None
+        for processes in sorted({1, 2, cores}):
+            pool = DetectionPool(processes=processes)
+            try:
+                pool.detect_many(MESSAGES * processes)  # รอให้ process ลูกโหลดเสร็จก่อนจับเวลา
+                start_time = time.perf_counter()
+                results = pool.detect_many(messages)
+                elapsed = time.perf_counter() - start_time
+            finally:
+                pool.close()
+            baseline = baseline or elapsed
+            print(f"{processes:2} processes: {len(messages) / elapsed:9,.0f} msgs/s  ({baseline / elapsed:.1f}x)")
+            assert len(results) == len(messages)
+        print("="*50)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s", "--tb=short"])
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+import pytest
+from ingestion_queue import IngestionQueue
+
+
+class TestIngestionQueue:
+    """ทดสอบคิวจำกัดขนาดและนโยบายเมื่อคิวเต็ม"""
+
+    def test_batches_and_lag(self):
+        queue = IngestionQueue(capacity=100)
+        for i in range(10):
+            assert queue.put(i)
+        time.sleep(0.01)
+        assert queue.get_batch(max_items=4) == [0, 1, 2, 3]
+        assert queue.get_batch() == [4, 5, 6, 7, 8, 9]
+        assert queue.get_batch(timeout=0.01) == []
+
+        metrics = queue.metrics()
+        assert (metrics['depth'], metrics['max_depth'], metrics['enqueued'], metrics['dropped']) == (0, 10, 10, 0)
+        assert metrics['lag']['count'] == 10
+        assert metrics['lag']['p50'] >= 0.005
+
+    def test_block_waits_for_consumer(self):
+        queue = IngestionQueue(capacity=2, policy='block')
+        queue.put('a')
+        queue.put('b')
+        done = threading.Event()
+        threading.Thread(target=lambda: (queue.put('c'), done.set()), daemon=True).start()
+        assert not done.wait(0.1)
+        assert queue.get_batch(max_items=1) == ['a']
+        assert done.wait(1)
+        assert queue.get_batch() == ['b', 'c']
+        assert queue.metrics()['dropped'] == 0
+
+    def test_event_loop_waits_without_blocking(self):
+        """ตัวอ่านบน event loop ไม่รอใน put() แต่ await wait_for_space() (loop ทำงานอื่นต่อได้)"""
+        queue = IngestionQueue(capacity=2, policy='block')
+
+        async def produce():
+            # ก้อนที่อ่านมาแล้วรับเกินความจุได้ ไม่ทิ้งข้อความ
+            for i in range(5):
+                assert queue.put(i, block=False)
+            waiter = asyncio.ensure_future(queue.wait_for_space())
+            await asyncio.sleep(0.05)
+            assert not waiter.done()
+            threading.Thread(target=queue.get_batch, kwargs={'max_items': 4}).start()
+            await asyncio.wait_for(waiter, 1)
+            # ยังไม่เต็มก็ไม่ต้องรอ
+            await asyncio.wait_for(queue.wait_for_space(), 0.1)
+            for i in range(5, 7):
+                queue.put(i, block=False)
+            waiter = asyncio.ensure_future(queue.wait_for_space())
+            await asyncio.sleep(0.01)
+            queue.close()
+            await asyncio.wait_for(waiter, 1)
+
+        asyncio.run(produce())
+        assert queue.metrics()['enqueued'] == 7
+        assert queue.metrics()['dropped'] == 0
+
+    def test_drop_oldest(self):
+        queue = IngestionQueue(capacity=3, policy='drop_oldest')
+        for i in range(10):
+            assert queue.put(i)
+        assert queue.get_batch() == [7, 8, 9]
+        assert queue.metrics()['dropped'] == 7
+
+    def test_sample_spreads_over_flood(self):
+        queue = IngestionQueue(capacity=100, policy='sample')
+        queue.random.seed(0)
+        accepted = [i for i in range(10000) if queue.put(i)]
+        # ครึ่งแรกของคิวรับทุกข้อความ ที่เหลือถูกสุ่มทิ้งจนคิวเต็ม
+        assert accepted[:50] == list(range(50))
+        assert len(queue) <= 100
+        assert queue.metrics()['dropped'] == 10000 - len(accepted)
+        # ระหว่างที่ consumer ดึงออกเรื่อยๆ ข้อความที่ได้ตรวจกระจายทั่วช่วงที่แชทท่วม ไม่ได้มาจากต้นหรือท้ายอย่างเดียว
+        queue = IngestionQueue(capacity=100, policy='sample')
+        queue.random.seed(0)
+        kept = []
+        for i in range(10000):
+            queue.put(i)
+            if i % 20 == 0:
+                kept.extend(queue.get_batch(max_items=5))
+        assert min(kept) < 1000 and max(kept) > 9000
+        assert len(kept) < 10000 * 0.5
+
+    def test_close_wakes_everyone(self):
+        queue = IngestionQueue(capacity=1, policy='block')
+        queue.put('a')
+        results = []
+        producer = threading.Thread(target=lambda: results.append(queue.put('b')))
+        producer.start()
+        time.sleep(0.05)
+        queue.close()
+        producer.join(1)
+        assert results == [False]
+        assert queue.get_batch() is None
+        assert not queue.put('c')
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            IngestionQueue(policy='drop_newest')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s", "--tb=short"])
@@ -0,0 +1,613 @@
+import asyncio
+import time
+import pytest
+from badword_engine import LatencyHistogram, wordsegment_model
+from fake_twitch_server import FakeTwitchServer
+from twitch_irc import (
+    EventLoopThread, LineFramer, TokenBucket, TwitchConnectionManager, TwitchIRCClient, decode_line,
+    parse_irc_message,
+)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def event_loop_thread():
+    loop_thread = EventLoopThread(name='test-irc')
+    loop_thread.start()
+    yield loop_thread
+    loop_thread.stop()
+
+
+@pytest.fixture
+def server(event_loop_thread):
+    server = event_loop_thread.submit(FakeTwitchServer().start()).result()
+    yield server
+    event_loop_thread.submit(server.close()).result()
+
+
+def split_privmsg(line):
+    """วิธีแยกข้อความแบบเดิม (split ที่คำว่า PRIVMSG) ใช้เทียบใน benchmark"""
+    parts = line.split('PRIVMSG')
+    if len(parts) < 2:
+        return None
+    username = parts[0].split('!')[0][1:]
+    target, separator, message = parts[1].partition(':')
+    if not separator:
+        return None
+    return username, target.strip().lstrip('#'), message.strip()
+
+
+class TestParseIRCMessage:
+    """ทดสอบการแยกบรรทัด IRC และ IRCv3 tags"""
+
+    TAGGED = ('@badge-info=;badges=broadcaster/1;display-name=Some\\sBody;emotes=25:0-4,12-16/1902:6-10;'
+              'id=b34ccfc7-4977-403a-8a94-33c6bac34fb8;user-id=1337 '
+              ':somebody!somebody@somebody.tmi.twitch.tv PRIVMSG #channel :Kappa Keepo Kappa')
+
+    def test_parse_plain(self):
+        message = parse_irc_message(':somebody!somebody@somebody.tmi.twitch.tv PRIVMSG #channel :สวัสดีครับ: hello')
+        assert (message.nick, message.command, message.channel, message.trailing) == (
+            'somebody', 'PRIVMSG', 'channel', 'สวัสดีครับ: hello')
+        assert message.tags == {}
+
+        message = parse_irc_message(':tmi.twitch.tv 001 justinfan123 :Welcome')
+        assert (message.command, message.params, message.channel) == ('001', ['justinfan123'], None)
+        assert parse_irc_message('PING :tmi.twitch.tv').trailing == 'tmi.twitch.tv'
+        assert parse_irc_message('') is None
+
+    def test_parse_tags(self):
+        message = parse_irc_message(self.TAGGED)
+        assert message.message_id == 'b34ccfc7-4977-403a-8a94-33c6bac34fb8'
+        assert message.user_id == '1337'
+        assert message.tags['display-name'] == 'Some Body'
+        assert message.tags['badge-info'] == ''
+        assert message.emotes == {'25': [(0, 4), (12, 16)], '1902': [(6, 10)]}
+        assert (message.nick, message.channel, message.trailing) == ('somebody', 'channel', 'Kappa Keepo Kappa')
+
+    def test_message_containing_privmsg(self):
+        line = ':troll!troll@troll.tmi.twitch.tv PRIVMSG #channel :why does PRIVMSG #other :x break'
+        message = parse_irc_message(line)
+        assert (message.nick, message.channel, message.trailing) == ('troll', 'channel', 'why does PRIVMSG #other :x break')
+        # วิธีเดิมตัดข้อความผิดที่
+        assert split_privmsg(line)[2] != message.trailing
+
+    def test_parse_speed(self):
+        plain = ':viewer!viewer@viewer.tmi.twitch.tv PRIVMSG #channel :วันนี้อากาศดีมาก hello nice stream'
+        lines = [plain, self.TAGGED] * 25000
+
+        start_time = time.perf_counter()
+        for line in lines:
+            split_privmsg(line)
+        old_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for line in lines:
+            message = parse_irc_message(line)
+            message.nick, message.channel
+        new_time = time.perf_counter() - start_time
+
+        print("\n" + "="*50)
+        print("🔎 IRC PARSER (50,000 lines, half with tags)")
+        print("="*50)
+        print(f"split('PRIVMSG'):  {len(lines) / old_time:12,.0f} lines/s")
+        print(f"parse_irc_message: {len(lines) / new_time:12,.0f} lines/s")
+        print("="*50)
+
+
+class TestLineFramer:
+    """ทดสอบการแยกบรรทัดระดับ bytes"""
+
+    @staticmethod
+    def feed_all(chunks):
+        framer, lines = LineFramer(), []
+        for chunk in chunks:
+            framer.feed(chunk, lambda buffer, start, end: lines.append(decode_line(buffer, start, end)))
+        return lines
+
+    def test_thai_split_across_chunks(self):
+        data = ':a!a@a.tmi.twitch.tv PRIVMSG #channel :ไอ้ควาย สวัสดี\r\nPING :tmi.twitch.tv\r\n'.encode('utf-8')
+        expected = [':a!a@a.tmi.twitch.tv PRIVMSG #channel :ไอ้ควาย สวัสดี', 'PING :tmi.twitch.tv']
+        # ตัดทุกตำแหน่ง รวมถึงกลางตัวอักษรไทย (3 bytes) และระหว่าง \r กับ \n
+        for cut in range(1, len(data)):
+            assert self.feed_all([data[:cut], data[cut:]]) == expected
+        assert self.feed_all([bytes([b]) for b in data]) == expected
+
+    def test_partial_and_empty_lines(self):
+        assert self.feed_all([b'first\n\r\n\nsec', b'ond\nthi']) == ['first', 'second']
+
+    def test_burst_throughput(self):
+        line = ':viewer!viewer@viewer.tmi.twitch.tv PRIVMSG #channel :วันนี้อากาศดีมาก hello nice stream'
+        data = f'{line}\r\n'.encode('utf-8') * 50000
+        chunks = [data[i:i + 64 * 1024] for i in range(0, len(data), 64 * 1024)]
+
+        # แบบเดิม: decode ทีละก้อน แล้ว split buffer ที่เป็น str ทีละบรรทัด
+        start_time = time.perf_counter()
+        buffer, old_intact = '', 0
+        for chunk in chunks:
+            buffer += chunk.decode('utf-8', errors='ignore')
+            while '\n' in buffer:
+                current, buffer = buffer.split('\n', 1)
+                old_intact += current.rstrip('\r') == line
+        old_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        intact = [0]
+        def on_line(buffer, start, end):
+            if buffer.find(b' PRIVMSG ', start, end) >= 0:
+                intact[0] += decode_line(buffer, start, end) == line
+        framer = LineFramer()
+        for chunk in chunks:
+            framer.feed(chunk, on_line)
+        new_time = time.perf_counter() - start_time
+
+        print("\n" + "="*50)
+        print("📦 LINE FRAMING (50,000 lines, 64 KiB reads)")
+        print("="*50)
+        print(f"str split:  {old_time * 1000:8.1f} ms  ({old_intact:,} intact lines)")
+        print(f"LineFramer: {new_time * 1000:8.1f} ms  ({intact[0]:,} intact lines)")
+        print(f"Speedup: {old_time / new_time:.1f}x")
+        print("="*50)
+        assert intact[0] == 50000
+
+
+class TestTwitchIRCClient:
+    """ทดสอบ client แบบ asyncio กับ server จำลอง"""
+
+    def test_join_ping_and_messages(self, event_loop_thread, server):
+        messages, statuses = [], []
+        client = TwitchIRCClient(['SomeChannel'], lambda *m: messages.append(m),
+                                 on_status=lambda *s: statuses.append(s), host='127.0.0.1', port=server.port)
+        client.start(event_loop_thread)
+
+        assert wait_for(lambda: 'JOIN #somechannel' in server.received)
+        assert server.received[0] == 'CAP REQ :twitch.tv/tags'
+        assert server.received[1].startswith('NICK justinfan')
+        assert statuses[0][0] is True
+
+        server.send('PING :tmi.twitch.tv',
+                    ':viewer!viewer@viewer.tmi.twitch.tv PRIVMSG #somechannel :ไอ้ควาย',
+                    '@id=abc;user-id=42 :fan!fan@fan.tmi.twitch.tv PRIVMSG #somechannel :hi')
+        assert wait_for(lambda: len(messages) == 2)
+        assert [m[:3] for m in messages] == [('viewer', 'somechannel', 'ไอ้ควาย'), ('fan', 'somechannel', 'hi')]
+        assert [m[3].tags for m in messages] == [{}, {'id': 'abc', 'user-id': '42'}]
+        assert 'PONG :tmi.twitch.tv' in server.received
+        client.stop()
+
+    def test_reconnect_after_drop(self, event_loop_thread, server):
+        client = TwitchIRCClient(['channel'], lambda *m: None, host='127.0.0.1', port=server.port,
+                                 initial_backoff=0.05)
+        future = client.start(event_loop_thread)
+        assert wait_for(lambda: server.connections == 1 and server.writers)
+
+        server.drop_clients()
+        assert wait_for(lambda: server.connections == 2)
+        assert wait_for(lambda: server.received.count('JOIN #channel') == 2)
+
+        client.stop()
+        future.result(timeout=5)
+        assert not client.connected
+
+    def test_gives_up_after_max_attempts(self, event_loop_thread):
+        errors = []
+        client = TwitchIRCClient(['channel'], lambda *m: None, on_error=errors.append,
+                                 host='127.0.0.1', port=1, max_reconnect_attempts=2, initial_backoff=0.01)
+        client.start(event_loop_thread).result(timeout=5)
+        assert errors[-1] == "Max reconnection attempts reached"
+
+
+class TestWorkerBridge:
+    """TwitchChatWorker ต้องส่ง signal เดิมได้เมื่อรับข้อความผ่าน asyncio client"""
+
+    def test_worker_detects_messages(self, event_loop_thread, server):
+        from main_gui import TwitchChatWorker
+
+        worker = TwitchChatWorker('channel', event_loop=event_loop_thread)
+        worker.start_listening(host='127.0.0.1', port=server.port)
+        assert wait_for(lambda: 'JOIN #channel' in server.received)
+
+        server.send(':a!a@a.tmi.twitch.tv PRIVMSG #channel :hello everyone',
+                    '@id=msg-1;user-id=7 :b!b@b.tmi.twitch.tv PRIVMSG #channel :fuck you')
+        assert wait_for(lambda: worker.total_messages == 2 and worker.bad_word_count == 1)
+        chat_messages = worker.get_chat_messages()
+        assert [(m['username'], m['message'], m['message_id'], m['user_id']) for m in chat_messages] == [
+            ('b', 'fuck you', 'msg-1', '7')]
+        worker.stop_listening()
+
+    def test_signals_are_batched(self, event_loop_thread, server):
+        from PyQt5.QtCore import Qt
+        from main_gui import SIGNAL_FLUSH_MAX_ITEMS, TwitchChatWorker
+
+        worker = TwitchChatWorker('channel', event_loop=event_loop_thread)
+        message_batches, bad_word_batches, stats = [], [], []
+        # ต่อแบบ direct ให้ได้รับในเทสที่ไม่มี Qt event loop
+        worker.messages_received.connect(message_batches.append, Qt.DirectConnection)
+        worker.bad_words_detected.connect(bad_word_batches.append, Qt.DirectConnection)
+        worker.chat_stats.connect(lambda *s: stats.append(s), Qt.DirectConnection)
+        worker.start_listening(host='127.0.0.1', port=server.port)
+        assert wait_for(lambda: 'JOIN #channel' in server.received)
+
+        count = SIGNAL_FLUSH_MAX_ITEMS * 2 + 100
+        messages = [f'{"fuck you" if i % 10 == 0 else "hello"} {i}' for i in range(count)]
+        offensive = sum(bool(worker.optimized_detect_bad_words(message)) for message in messages)
+        server.send(*(f':v!v@v.tmi.twitch.tv PRIVMSG #channel :{message}' for message in messages))
+        assert wait_for(lambda: worker.total_messages == count and worker.bad_word_count == offensive)
+        # ครบ max_items ส่งทันที ที่เหลือรอ flush (ปกติ timer เรียกทุก SIGNAL_FLUSH_INTERVAL_MS)
+        assert [len(batch) for batch in message_batches] == [SIGNAL_FLUSH_MAX_ITEMS] * 2
+        worker.flush_signals()
+        assert [len(batch) for batch in message_batches] == [SIGNAL_FLUSH_MAX_ITEMS] * 2 + [100]
+        assert [message for batch in message_batches for _, message in batch] == messages
+        assert sum(map(len, bad_word_batches)) == offensive and len(bad_word_batches) == 1
+        assert stats == [(count, offensive)]
+        worker.flush_signals()
+        assert stats == [(count, offensive)]
+        worker.stop_listening()
+
+    def test_slow_detection_does_not_stall_reader(self, event_loop_thread, server):
+        from main_gui import TwitchChatWorker
+
+        worker = TwitchChatWorker('channel', event_loop=event_loop_thread,
+                                  queue_capacity=10, overflow_policy='drop_oldest')
+        detect = worker.optimized_detect_bad_words
+        worker.optimized_detect_bad_words = lambda message: time.sleep(0.02) or detect(message)
+        worker.start_listening(host='127.0.0.1', port=server.port)
+        assert wait_for(lambda: 'JOIN #channel' in server.received)
+
+        server.send(*(f':v!v@v.tmi.twitch.tv PRIVMSG #channel :fuck you {i}' for i in range(200)))
+        # ตัวอ่านรับครบทันที ไม่ต้องรอตรวจทีละ 20 ms (200 ข้อความ = 4 วินาที)
+        assert wait_for(lambda: worker.total_messages == 200, timeout=1)
+        metrics = worker.get_queue_metrics()
+        assert metrics['dropped'] > 100
+        assert metrics['max_depth'] == 10
+        # ข้อความล่าสุดยังได้ตรวจเสมอ
+        assert wait_for(lambda: any(m['message'] == 'fuck you 199' for m in worker.get_chat_messages()))
+        worker.stop_listening()
+
+    def test_block_policy_keeps_loop_responsive(self, event_loop_thread, server):
+        from main_gui import TwitchChatWorker
+
+        worker = TwitchChatWorker('channel', event_loop=event_loop_thread,
+                                  queue_capacity=10, overflow_policy='block')
+        detect = worker.optimized_detect_bad_words
+        worker.optimized_detect_bad_words = lambda message: time.sleep(0.01) or detect(message)
+        other_messages = []
+        other = TwitchIRCClient(['other'], lambda *m: other_messages.append(m), host='127.0.0.1', port=server.port)
+        other.start(event_loop_thread)
+        worker.start_listening(host='127.0.0.1', port=server.port)
+        assert wait_for(lambda: 'JOIN #channel' in server.received and 'JOIN #other' in server.received)
+
+        server.send(*(f':v!v@v.tmi.twitch.tv PRIVMSG #channel :fuck you {i}' for i in range(100)))
+        assert wait_for(lambda: len(worker.ingestion_queue) >= 10, timeout=1)
+        # thread ตรวจยังตามไม่ทัน (100 ข้อความ x 10 ms) แต่ event loop ยังรับแชทของ connection อื่นได้ทันที
+        server.send(':o!o@o.tmi.twitch.tv PRIVMSG #other :hello')
+        assert wait_for(lambda: other_messages, timeout=0.3)
+        assert event_loop_thread.submit(asyncio.sleep(0)).result(timeout=0.3) is None
+        # นโยบาย block ไม่ทิ้งข้อความ
+        assert wait_for(lambda: worker.bad_word_count == 100)
+        assert worker.get_queue_metrics()['dropped'] == 0
+        other.stop()
+        worker.close()
+
+    def test_reconnect_does_not_leak_threads(self, event_loop_thread, server):
+        import threading
+        from main_gui import TwitchChatWorker
+
+        def reload_threads():
+            return sum(t.name.startswith('wordlist-reload') for t in threading.enumerate())
+
+        before = reload_threads()
+        for _ in range(3):
+            # เหมือนกดยกเลิกแล้วเชื่อมต่อใหม่: สร้าง worker ใหม่ทุกครั้ง (สลับ fuzzy ให้ reload_executor เริ่ม thread)
+            worker = TwitchChatWorker('channel', event_loop=event_loop_thread)
+            worker.set_fuzzy_matching(False).result()
+            worker.start_listening(host='127.0.0.1', port=server.port)
+            worker.close()
+        assert wait_for(lambda: reload_threads() == before)
+
+
+class TestMultiChannel:
+    """หลาย channel บน connection เดียว ใช้ตัวตรวจจับร่วมกัน"""
+
+    def test_messages_are_routed_per_channel(self, event_loop_thread, server):
+        from main_gui import TwitchChatWorker
+
+        worker = TwitchChatWorker(['alpha', '#Beta'], event_loop=event_loop_thread)
+        worker.start_listening(host='127.0.0.1', port=server.port)
+        assert wait_for(lambda: 'JOIN #beta' in server.received)
+        worker.add_channels(['gamma'])
+        assert wait_for(lambda: 'JOIN #gamma' in server.received)
+        assert server.connections == 1
+
+        server.send(':a!a@a.tmi.twitch.tv PRIVMSG #alpha :hello',
+                    ':b!b@b.tmi.twitch.tv PRIVMSG #beta :fuck you',
+                    ':c!c@c.tmi.twitch.tv PRIVMSG #gamma :ไอ้ควาย',
+                    ':d!d@d.tmi.twitch.tv PRIVMSG #gamma :nice stream')
+        assert wait_for(lambda: worker.total_messages == 4 and worker.bad_word_count == 2)
+        assert worker.get_channel_stats() == {
+            'alpha': {'total_messages': 1, 'bad_word_count': 0},
+            'beta': {'total_messages': 1, 'bad_word_count': 1},
+            'gamma': {'total_messages': 2, 'bad_word_count': 1},
+        }
+        assert [m['channel'] for m in worker.get_chat_messages()] == ['beta', 'gamma']
+
+        worker.remove_channels(['alpha'])
+        assert wait_for(lambda: 'PART #alpha' in server.received)
+        worker.stop_listening()
+
+    def test_clear_during_traffic_keeps_counters_consistent(self):
+        """ล้างสถิติ (thread GUI) ระหว่างที่ตัวอ่านและตัวตรวจยังนับอยู่ ตัวนับรวมต้องตรงกับผลรวมของทุก channel"""
+        import sys
+        import threading
+        from main_gui import TwitchChatWorker
+
+        worker = TwitchChatWorker(['alpha', 'beta'])
+        stop = threading.Event()
+
+        def clear_repeatedly():
+            while not stop.is_set():
+                worker.clear_memory_messages()
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        clearer = threading.Thread(target=clear_repeatedly)
+        clearer.start()
+        try:
+            # ยังไม่เริ่มฟัง on_chat_message จึงตรวจทันทีใน thread เดียวกัน (นับทั้งข้อความและคำหยาบ)
+            for i in range(3000):
+                worker.on_chat_message('v', ('alpha', 'beta')[i % 2], 'fuck you' if i % 3 == 0 else 'hello')
+        finally:
+            stop.set()
+            clearer.join()
+            sys.setswitchinterval(switch_interval)
+
+        stats = worker.get_channel_stats()
+        assert worker.total_messages == sum(s['total_messages'] for s in stats.values())
+        assert worker.bad_word_count == sum(s['bad_word_count'] for s in stats.values())
+        assert worker.bad_word_count == len(worker.get_chat_messages())
+
+    def test_threads_stay_flat(self, event_loop_thread, server):
+        import threading
+        from main_gui import TwitchChatWorker
+
+        thread_counts = {}
+        for count in (1, 200):
+            channels = [f'channel{i:03d}' for i in range(count)]
+            worker = TwitchChatWorker(channels, event_loop=event_loop_thread)
+            worker.start_listening(host='127.0.0.1', port=server.port, join_rate=10000, join_burst=200)
+            assert wait_for(lambda: all(f'JOIN #{channel}' in server.received for channel in channels))
+            thread_counts[count] = threading.active_count()
+            worker.stop_listening()
+        assert thread_counts[200] == thread_counts[1]
+
+
+
+class TestConnectionManager:
+    """กระจาย channel หลาย connection, จำกัดอัตรา JOIN และย้าย channel เมื่อ connection ขาด"""
+
+    def test_token_bucket(self, event_loop_thread):
+        async def acquire_all():
+            bucket = TokenBucket(rate=100, capacity=5)
+            start_time = asyncio.get_running_loop().time()
+            for _ in range(15):
+                await bucket.acquire()
+            return asyncio.get_running_loop().time() - start_time
+
+        # 5 ครั้งแรกได้ทันที อีก 10 ครั้งต้องรอเติม token ที่ 100 ต่อวินาที
+        assert 0.09 <= event_loop_thread.submit(acquire_all()).result() < 1
+
+    def test_shards_and_join_rate(self, event_loop_thread, server):
+        channels = [f'channel{i}' for i in range(10)]
+        manager = TwitchConnectionManager(channels, lambda *m: None, channels_per_connection=4,
+                                          join_rate=20, join_burst=2, host='127.0.0.1', port=server.port)
+        start_time = time.monotonic()
+        manager.start(event_loop_thread)
+        assert wait_for(lambda: all(f'JOIN #{channel}' in server.received for channel in channels))
+        elapsed = time.monotonic() - start_time
+
+        assert server.connections == 3
+        assert sorted(len(joined) for joined in server.joined.values()) == [3, 3, 4]
+        # ได้ JOIN 2 ครั้งทันที ที่เหลือ 8 ครั้งที่ 20 ครั้งต่อวินาที ไม่ว่าจะกี่ connection
+        assert elapsed >= 0.35
+        manager.stop()
+
+    def test_rebalance_on_drop(self, event_loop_thread, server):
+        messages, statuses = [], []
+        channels = ['alpha', 'beta', 'gamma', 'delta']
+        manager = TwitchConnectionManager(channels, lambda *m: messages.append(m[:3]), connections=2,
+                                          on_status=lambda *s: statuses.append(s),
+                                          join_rate=1000, host='127.0.0.1', port=server.port,
+                                          initial_backoff=0.05)
+        future = manager.start(event_loop_thread)
+        assert wait_for(lambda: all(server.connection_of(channel) for channel in channels))
+        assert server.connections == 2
+
+        dropped = server.connection_of('alpha')
+        moved = sorted(server.joined[dropped])
+        statuses.clear()
+        server.drop_clients([dropped])
+        # สถานะเป็นของ connection ที่ขาด ไม่ใช่ภาพรวม (อีก connection ยังต่ออยู่)
+        assert wait_for(lambda: statuses)
+        assert statuses[0][0] is False and manager.connected
+        # channel ของ connection ที่ขาดถูก JOIN บน connection ที่เหลือ
+        assert wait_for(lambda: all(server.connection_of(channel) not in (None, dropped) for channel in moved))
+        survivor = server.connection_of('alpha')
+        assert sorted(server.joined[survivor]) == sorted(channels)
+        # connection ที่ขาดต่อกลับมาได้แต่ไม่มี channel ค้าง จึงไม่ได้ข้อความซ้ำ
+        assert wait_for(lambda: server.connections == 3)
+
+        server.send(*(f':v!v@v.tmi.twitch.tv PRIVMSG #{channel} :hi' for channel in channels))
+        assert wait_for(lambda: len(messages) == 4)
+        time.sleep(0.2)
+        assert sorted(channel for _, channel, _ in messages) == sorted(channels)
+
+        manager.stop()
+        future.result(5)
+
+
+    def test_gives_up_when_server_stays_down(self, event_loop_thread):
+        """server ล่มถาวร: connection ที่เปิดแทนตัวที่เลิกพยายามต้องมีจำนวนจำกัด และ manager ต้องจบ"""
+        server = event_loop_thread.submit(FakeTwitchServer().start()).result()
+        errors = []
+        channels = [f'channel{i}' for i in range(6)]
+        manager = TwitchConnectionManager(channels, lambda *m: None, on_error=errors.append,
+                                          channels_per_connection=1, join_rate=1000,
+                                          host='127.0.0.1', port=server.port,
+                                          initial_backoff=0.01, max_reconnect_attempts=2)
+        future = manager.start(event_loop_thread)
+        assert wait_for(lambda: server.connections == len(channels))
+        event_loop_thread.submit(server.close()).result()
+
+        future.result(timeout=10)
+        assert errors[-1] == "All IRC connections failed"
+        assert not manager.clients
+        # เปิด connection แทนครบ max_respawns แล้ว channel ที่เหลือรอแทนการเปิด connection ใหม่
+        assert sum(error.startswith('Reconnect limit reached') for error in errors) >= 1
+
+
+class TestFakeTwitchServer:
+    """server จำลองส่งแชทตามอัตราที่กำหนด พร้อม burst และการตัด connection"""
+
+    @staticmethod
+    def start_server(event_loop_thread, **options):
+        return event_loop_thread.submit(FakeTwitchServer(**options).start()).result()
+
+    def test_streams_at_rate(self, event_loop_thread):
+        server = self.start_server(event_loop_thread, rate=2000, seed=1)
+        messages = []
+        manager = TwitchConnectionManager(['alpha', 'beta'], lambda *m: messages.append(m),
+                                          host='127.0.0.1', port=server.port)
+        manager.start(event_loop_thread)
+        try:
+            assert wait_for(lambda: messages)
+            start_count, start_time = len(messages), time.monotonic()
+            time.sleep(1)
+            rate = (len(messages) - start_count) / (time.monotonic() - start_time)
+        finally:
+            manager.stop()
+            event_loop_thread.submit(server.close()).result()
+
+        assert 1000 < rate < 3000
+        assert {channel for _, channel, _, _ in messages} == {'alpha', 'beta'}
+        assert all('tmi-sent-ts' in irc_message.tags for *_, irc_message in messages[:100])
+
+    def test_unparseable_lines_do_not_break_delivery(self, event_loop_thread, server):
+        messages = []
+        client = TwitchIRCClient(['channel'], lambda *m: messages.append(m[:3]), host='127.0.0.1', port=server.port)
+        client.start(event_loop_thread)
+        assert wait_for(lambda: 'JOIN #channel' in server.received)
+
+        # บรรทัดเสียอยู่ก้อนเดียวกับแชทปกติ ต้องไม่ทำให้ทั้งก้อนหาย
+        server.send('', '@tags-only', ':prefix-only', ':v!v@v.tmi.twitch.tv PRIVMSG #channel :still here')
+        assert wait_for(lambda: messages == [('v', 'channel', 'still here')])
+        client.stop()
+
+    def test_burst_and_disconnect_injection(self, event_loop_thread):
+        server = self.start_server(event_loop_thread, rate=200, burst_every=0.5, burst_duration=0.25,
+                                   burst_multiplier=10, disconnect_every=0.4, ping_interval=0.1, seed=2)
+        messages = []
+        manager = TwitchConnectionManager(['channel'], lambda *m: messages.append(m),
+                                          host='127.0.0.1', port=server.port, initial_backoff=0.05)
+        manager.start(event_loop_thread)
+        try:
+            assert wait_for(lambda: server.disconnects >= 2 and server.connections >= 3)
+            count = len(messages)
+            # ต่อกลับมาแล้วยังได้รับแชทต่อ
+            assert wait_for(lambda: len(messages) > count + 50)
+            # connection ที่ถูกตัดไม่ค้างอยู่ใน joined
+            assert wait_for(lambda: set(server.joined) <= set(server.writers))
+        finally:
+            manager.stop()
+            event_loop_thread.submit(server.close()).result()
+        assert server.pongs > 0
+        # 0.25 วินาทีท้ายของทุกรอบ 0.5 วินาทีเป็นช่วง burst
+        assert server.current_rate(0.3) == 2000 and server.current_rate(0.1) == 200
+
+
+class StampedTwitchServer(FakeTwitchServer):
+    """ชื่อผู้ส่งคือเวลาที่ server ส่ง (ms) วัด lag จาก payload ของ signal ของ worker ได้โดยไม่ต้องมี tag"""
+
+    def _chat_line(self, channel, text, sent_ms):
+        user = f'v{sent_ms}'
+        return (f'@id={self.sent:x};tmi-sent-ts={sent_ms} '
+                f':{user}!{user}@{user}.tmi.twitch.tv PRIVMSG #{channel} :{text}\r\n')
+
+
+class TestLoadBenchmark:
+    """วัด throughput และ lag ของ TwitchChatWorker ทั้ง pipeline กับ server จำลอง (ไม่ต้องต่อเน็ต)
+
+    server -> IRC client -> คิว -> thread ตรวจจับ (หรือ DetectionPool) -> SignalBatch -> signal
+    """
+
+    def test_throughput_and_lag(self, event_loop_thread):
+        import threading
+        from PyQt5.QtCore import Qt
+        from detection_pool import DetectionPool
+        from main_gui import SIGNAL_FLUSH_INTERVAL_MS, TwitchChatWorker
+
+        wordsegment_model.wait_until_ready()
+        pool = DetectionPool(processes=2)
+        pool.detect_many(['warm up'] * 4)  # รอ process ลูกโหลดเสร็จก่อนจับเวลา
+
+        print("\n" + "="*50)
+        print("🚦 END-TO-END LOAD (fake server -> TwitchChatWorker -> signals)")
+        print("="*50)
+        try:
+            for mode, detection_pool in (('thread', None), ('pool', pool)):
+                for rate in (1000, 10000, 50000):
+                    server = event_loop_thread.submit(StampedTwitchServer(rate=rate, seed=3).start()).result()
+                    worker = TwitchChatWorker('channel', detection_pool, event_loop=event_loop_thread)
+                    lock = threading.Lock()
+                    lag = LatencyHistogram()
+                    counts = {'messages': 0, 'offensive': 0}
+
+                    def on_messages(batch):
+                        with lock:
+                            counts['messages'] += len(batch)
+
+                    def on_bad_words(batch):
+                        now_ms = time.time() * 1000
+                        with lock:
+                            counts['offensive'] += len(batch)
+                            for username, _, _ in batch:
+                                lag.record(max(now_ms - int(username[1:]), 0) / 1000)
+
+                    # ต่อแบบ direct (ไม่มี Qt event loop ใน test) และเรียก flush_signals แทน timer ของ GUI
+                    worker.messages_received.connect(on_messages, Qt.DirectConnection)
+                    worker.bad_words_detected.connect(on_bad_words, Qt.DirectConnection)
+                    worker.start_listening(host='127.0.0.1', port=server.port)
+                    try:
+                        assert wait_for(lambda: counts['offensive'])
+                        with lock:
+                            start_counts, start_time = dict(counts), time.monotonic()
+                            lag.reset()
+                        while time.monotonic() - start_time < 1.5:
+                            worker.flush_signals()
+                            time.sleep(SIGNAL_FLUSH_INTERVAL_MS / 1000)
+                        with lock:
+                            elapsed = time.monotonic() - start_time
+                            delivered = (counts['messages'] - start_counts['messages']) / elapsed
+                            detected = (counts['offensive'] - start_counts['offensive']) / elapsed
+                        queue_metrics = worker.get_queue_metrics()
+                    finally:
+                        worker.close()
+                        event_loop_thread.submit(server.close()).result()
+
+                    print(f"{mode:6} target {rate:6,} msgs/s: delivered {delivered:8,.0f} msgs/s | "
+                          f"offensive {detected:7,.0f}/s | lag p50 {lag.percentile(50) * 1000:6.1f} ms  "
+                          f"p99 {lag.percentile(99) * 1000:6.1f} ms | queue max {queue_metrics['max_depth']}")
+                    assert detected > 0
+                    assert queue_metrics['dropped'] == 0  # ค่าเริ่มต้นคือ block ไม่ทิ้งข้อความ
+        finally:
+            pool.close()
+        print("="*50)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s", "--tb=short"])
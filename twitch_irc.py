@@ -0,0 +1,689 @@
+import asyncio
+import functools
+import logging
+import os
+import random
+import threading
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# ตั้ง TWITCH_IRC_HOST=127.0.0.1 เพื่อต่อกับ fake_twitch_server.py แทน Twitch จริง (ทดสอบ load แบบ offline)
+TWITCH_IRC_HOST = os.environ.get('TWITCH_IRC_HOST', 'irc.chat.twitch.tv')
+TWITCH_IRC_PORT = int(os.environ.get('TWITCH_IRC_PORT', 6667))
+
+# อ่านทีละก้อนใหญ่ ตอน raid จะได้หลายร้อยบรรทัดต่อการ read ครั้งเดียว
+READ_SIZE = 64 * 1024
+# บรรทัดของ Twitch ยาวไม่เกินไม่กี่ KB ถ้าเกินนี้แล้วยังไม่เจอ \n ถือว่า stream เสีย
+MAX_LINE_LENGTH = 64 * 1024
+
+# Twitch จำกัด JOIN ได้ 20 ครั้งต่อ 10 วินาที
+JOIN_RATE = 2.0
+JOIN_BURST = 20
+# จำนวน channel สูงสุดต่อหนึ่ง connection ก่อนเปิด connection ใหม่
+CHANNELS_PER_CONNECTION = 50
+# จำนวน connection ใหม่ที่เปิดแทนตัวที่เลิกพยายามได้ ก่อนที่จะมี connection ไหนต่อสำเร็จอีกครั้ง
+MAX_RESPAWNS = 3
+
+
+class EventLoopThread:
+    """asyncio event loop ตัวเดียวใน background thread ให้ทุก connection ใช้ร่วมกัน
+
+    แทนการมี thread + socket.recv แบบ block ต่อ channel
+    start() เรียกซ้ำได้ (สร้าง thread แค่ครั้งแรก)
+    """
+
+    def __init__(self, name='twitch-irc'):
+        self.name = name
+        self.loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self.loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            return self.loop
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """รัน coroutine บน loop นี้จาก thread ไหนก็ได้ คืนค่า concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.start())
+
+    def call_soon(self, callback, *args):
+        self.start().call_soon_threadsafe(callback, *args)
+
+    async def _cancel_tasks(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self, timeout=5):
+        """ยกเลิกทุกงานบน loop (ปิด connection ให้เรียบร้อย) แล้วหยุด thread"""
+        with self._lock:
+            if self._thread is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self.loop).result(timeout)
+            except Exception as e:
+                logger.warning(f"Error cancelling event loop tasks: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+
+
+# event loop ที่ทุก client ใน process ใช้ร่วมกัน
+shared_event_loop = EventLoopThread()
+
+
+def normalize_channel(channel):
+    """ชื่อ channel ในรูปที่ IRC ใช้ (ตัวเล็ก ไม่มี #)"""
+    return channel.strip().lower().lstrip('#')
+
+
+def describe_channels(channels, limit=3):
+    """ชื่อ channel สำหรับแสดงผล (ถ้าเยอะจะย่อเป็นจำนวน)"""
+    if len(channels) <= limit:
+        return ', '.join(channels)
+    return f"{', '.join(channels[:limit])} และอีก {len(channels) - limit} channel"
+
+
+# escape ของค่า tag ตาม IRCv3 (\: = ; , \s = space, ...)
+_TAG_ESCAPES = {':': ';', 's': ' ', '\\': '\\', 'r': '\r', 'n': '\n'}
+
+
+def unescape_tag_value(value):
+    if '\\' not in value:
+        return value
+    result = []
+    position = 0
+    while True:
+        backslash = value.find('\\', position)
+        if backslash < 0:
+            result.append(value[position:])
+            return ''.join(result)
+        result.append(value[position:backslash])
+        escaped = value[backslash + 1:backslash + 2]
+        result.append(_TAG_ESCAPES.get(escaped, escaped))
+        position = backslash + 2
+
+
+def parse_tags(raw_tags):
+    """แยก tags ของ IRCv3 ('key=value;key2=value2') เป็น dict"""
+    tags = {}
+    for tag in raw_tags.split(';'):
+        key, _, value = tag.partition('=')
+        if key:
+            tags[key] = unescape_tag_value(value)
+    return tags
+
+
+class IRCMessage(namedtuple('IRCMessage', 'raw_tags prefix command params trailing')):
+    """ข้อความ IRC หนึ่งบรรทัดที่แยกส่วนแล้ว
+
+    @raw_tags :prefix COMMAND param1 param2 :trailing
+
+    เป็น tuple เพื่อให้สร้างได้เร็ว (สร้างทุกบรรทัดที่อ่านได้)
+    tags แยกเป็น dict ทุกครั้งที่อ่าน ข้อความส่วนใหญ่ไม่ได้ใช้ tags จึงไม่เสียเวลาแยกล่วงหน้า
+    """
+
+    __slots__ = ()
+
+    @property
+    def tags(self):
+        return parse_tags(self.raw_tags) if self.raw_tags else {}
+
+    @property
+    def nick(self):
+        """ชื่อผู้ใช้จาก prefix (nick!user@host)"""
+        return self.prefix.partition('!')[0]
+
+    @property
+    def channel(self):
+        """channel เป้าหมาย (ไม่มี #) หรือ None"""
+        if self.params and self.params[0].startswith('#'):
+            return self.params[0][1:]
+        return None
+
+    @property
+    def message_id(self):
+        return self.tags.get('id')
+
+    @property
+    def user_id(self):
+        return self.tags.get('user-id')
+
+    @property
+    def emotes(self):
+        """emote ในข้อความ {emote_id: [(start, end), ...]} (ตำแหน่งนับเป็นตัวอักษร รวมตัวท้าย)"""
+        emotes = {}
+        for emote in filter(None, self.tags.get('emotes', '').split('/')):
+            emote_id, _, ranges = emote.partition(':')
+            positions = []
+            for position in ranges.split(','):
+                start, _, end = position.partition('-')
+                if start.isdigit() and end.isdigit():
+                    positions.append((int(start), int(end)))
+            emotes[emote_id] = positions
+        return emotes
+
+
+_new_message = tuple.__new__
+
+
+def parse_irc_message(line):
+    """แยกบรรทัด IRC (รองรับ IRCv3 tags) ในรอบเดียวด้วย str.find คืนค่า IRCMessage หรือ None
+
+    ตัวอย่าง: @id=abc;user-id=123 :username!username@username.tmi.twitch.tv PRIVMSG #channel :message
+    ข้อความแชทที่มีคำว่า PRIVMSG หรือ : อยู่ข้างในไม่กระทบ เพราะ trailing เริ่มที่ ' :' ตัวแรกหลัง prefix
+    """
+    position = 0
+    raw_tags = ''
+    if line.startswith('@'):
+        position = line.find(' ')
+        if position < 0:
+            return None
+        raw_tags = line[1:position]
+        position += 1
+        while line.startswith(' ', position):
+            position += 1
+
+    prefix = ''
+    if line.startswith(':', position):
+        end = line.find(' ', position)
+        if end < 0:
+            return None
+        prefix = line[position + 1:end]
+        position = end + 1
+
+    trailing_start = line.find(' :', position)
+    if trailing_start >= 0:
+        params = line[position:trailing_start].split()
+        trailing = line[trailing_start + 2:]
+    else:
+        params = line[position:].split()
+        trailing = None
+    if not params:
+        return None
+    return _new_message(IRCMessage, (raw_tags, prefix, params.pop(0), params, trailing))
+
+
+class LineFramer:
+    """แยกบรรทัด IRC จาก stream ของ bytes โดยไม่ decode และไม่ copy ทีละบรรทัด
+
+    ข้อมูลที่อ่านได้ต่อท้าย bytearray เดียว แล้วหา \n ด้วย bytearray.find
+    on_line(buffer, start, end) ได้แค่ตำแหน่งของบรรทัด (ไม่รวม \r\n) ใน buffer
+    ผู้เรียกเลือกเองว่าจะ decode บรรทัดไหน buffer ใช้ได้ถึงแค่ตอน on_line คืนค่า
+    หลังจบแต่ละก้อนจะตัดส่วนที่ใช้แล้วทิ้งครั้งเดียว (เหลือแค่บรรทัดที่ยังมาไม่ครบ)
+
+    \n (0x0A) ไม่เคยอยู่กลางตัวอักษร UTF-8 หลาย byte
+    ตัวอักษรไทยที่ถูกตัดคร่อมสองก้อนจึงรออยู่ใน buffer จนบรรทัดครบ ไม่หายเหมือน decode ทีละก้อน
+    """
+
+    def __init__(self, max_line_length=MAX_LINE_LENGTH):
+        self.max_line_length = max_line_length
+        self._buffer = bytearray()
+
+    def feed(self, data, on_line):
+        buffer = self._buffer
+        buffer += data
+        start = 0
+        try:
+            while True:
+                newline = buffer.find(b'\n', start)
+                if newline < 0:
+                    break
+                end = newline - 1 if newline > start and buffer[newline - 1] == 0x0D else newline
+                if end > start:
+                    on_line(buffer, start, end)
+                start = newline + 1
+        finally:
+            del buffer[:start]
+        if len(buffer) > self.max_line_length:
+            logger.warning(f"Dropping {len(buffer)} bytes without a line break")
+            buffer.clear()
+
+
+def decode_line(buffer, start, end):
+    """decode บรรทัดจาก buffer ของ LineFramer (decode จาก memoryview โดยตรง ไม่ copy bytes ก่อน)"""
+    with memoryview(buffer)[start:end] as line:
+        return str(line, 'utf-8', 'replace')
+
+
+class TokenBucket:
+    """จำกัดอัตราแบบ token bucket สำหรับ asyncio
+
+    เก็บ token ได้สูงสุด capacity และเติม rate token ต่อวินาที
+    acquire() รอ (ด้วย asyncio.sleep) จนมี token ใช้ได้ ใช้ได้เฉพาะใน event loop เดียวกัน
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = None
+
+    def _refill(self, now):
+        if self._updated is not None:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._refill(loop.time())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class TwitchIRCClient:
+    """client IRC ของ Twitch แบบ asyncio (anonymous, อ่านแชทอย่างเดียว)
+
+    ทำงานบน event loop ร่วม จึงเปิดได้หลาย connection โดยไม่ต้องมี thread ต่อ channel
+    ตอบ PING ทันทีที่อ่านเจอ และเชื่อมต่อใหม่เองแบบ exponential backoff (ใช้ asyncio.sleep ไม่ block loop)
+    JOIN ถูกส่งจาก task แยก ถ้ามี join_limiter (TokenBucket) จะรอ token ก่อนทุก JOIN
+    ระหว่างนั้นยังอ่านแชทและตอบ PING ได้ตามปกติ
+    ถ้ามี backpressure (coroutine function) จะ await หลังส่งทุกก้อนที่อ่านได้ให้ on_message ก่อนอ่านก้อนถัดไป
+    เช่น รอคิวตรวจจับว่าง ระหว่างรอหยุดอ่านเฉพาะ connection นี้ (TCP ทำให้ server ส่งช้าลงเอง) ส่วนอื่นของ loop ทำงานต่อ
+
+    callback ทั้งหมดถูกเรียกใน thread ของ event loop:
+      on_message(username, channel, message, irc_message)  (irc_message คือ IRCMessage ของบรรทัดนั้น)
+      on_status(connected, status_message)
+      on_error(error_message)
+    """
+
+    def __init__(self, channels, on_message, on_status=None, on_error=None,
+                 host=TWITCH_IRC_HOST, port=TWITCH_IRC_PORT, connect_timeout=10,
+                 max_reconnect_attempts=5, initial_backoff=5, max_backoff=30, join_limiter=None,
+                 backpressure=None):
+        self.channels = []
+        for channel in channels:
+            channel = normalize_channel(channel)
+            if channel not in self.channels:
+                self.channels.append(channel)
+        self.on_message = on_message
+        self.on_status = on_status
+        self.on_error = on_error
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.join_limiter = join_limiter
+        self.backpressure = backpressure
+        self.connected = False
+        self._writer = None
+        self._pending_joins = deque()  # channel ที่รอส่ง JOIN บน connection ปัจจุบัน
+        self._joiner = None
+        self._stopping = False
+        self._task = None
+        self._loop = None
+
+    def _report_status(self, connected, message):
+        self.connected = connected
+        if self.on_status is not None:
+            self.on_status(connected, message)
+
+    def _report_error(self, message):
+        logger.error(message)
+        if self.on_error is not None:
+            self.on_error(message)
+
+    def start(self, event_loop=None):
+        """เริ่ม client บน event loop (ค่าเริ่มต้นคือ shared_event_loop) คืนค่า Future ของงาน"""
+        event_loop = event_loop or shared_event_loop
+        return event_loop.submit(self.run())
+
+    def stop(self):
+        """หยุด client (เรียกจาก thread ไหนก็ได้)"""
+        self._stopping = True
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+
+    def join(self, channels):
+        """JOIN channel เพิ่มบน connection เดิม (เรียกจาก thread ไหนก็ได้)"""
+        channels = [normalize_channel(channel) for channel in channels]
+        self._call_in_loop(self._join, channels)
+
+    def part(self, channels):
+        """ออกจาก channel (เรียกจาก thread ไหนก็ได้)"""
+        channels = [normalize_channel(channel) for channel in channels]
+        self._call_in_loop(self._part, channels)
+
+    def _call_in_loop(self, callback, *args):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(callback, *args)
+        else:
+            callback(*args)  # ยังไม่เริ่ม: แค่แก้รายชื่อ channel แล้ว JOIN ตอนเชื่อมต่อ
+
+    def _join(self, channels):
+        new_channels = [channel for channel in channels if channel not in self.channels]
+        self.channels.extend(new_channels)
+        if self._writer is not None:
+            self._queue_joins(new_channels)
+
+    def _part(self, channels):
+        for channel in channels:
+            if channel in self.channels:
+                self.channels.remove(channel)
+                if channel in self._pending_joins:
+                    self._pending_joins.remove(channel)  # ยังไม่ได้ JOIN ก็ไม่ต้อง PART
+                elif self._writer is not None:
+                    self._writer.write(f'PART #{channel}\r\n'.encode('utf-8'))
+
+    def _queue_joins(self, channels):
+        self._pending_joins.extend(channels)
+        if self._pending_joins and (self._joiner is None or self._joiner.done()):
+            self._joiner = asyncio.get_running_loop().create_task(self._send_joins())
+
+    async def _send_joins(self):
+        while self._pending_joins:
+            if self.join_limiter is not None:
+                await self.join_limiter.acquire()
+            if not self._pending_joins or self._writer is None:
+                return
+            channel = self._pending_joins.popleft()
+            self._writer.write(f'JOIN #{channel}\r\n'.encode('utf-8'))
+
+    async def run(self):
+        """เชื่อมต่อและอ่านแชทจนกว่าจะ stop() หรือเชื่อมต่อใหม่ไม่สำเร็จครบจำนวนครั้ง"""
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._stopping = False
+        attempts = 0
+        try:
+            while not self._stopping:
+                try:
+                    reader = await self._connect()
+                    attempts = 0
+                    await self._read_loop(reader)
+                    reason = "Connection closed by server"
+                except asyncio.TimeoutError:
+                    reason = "Connection timeout"
+                except ConnectionRefusedError:
+                    reason = "Connection refused by server"
+                except OSError as e:
+                    reason = f"Socket error: {e}"
+                finally:
+                    await self._close()
+
+                if self._stopping:
+                    break
+                self._report_status(False, f"การเชื่อมต่อขาด: {reason}")
+                self._report_error(reason)
+                if attempts >= self.max_reconnect_attempts:
+                    self._report_error("Max reconnection attempts reached")
+                    break
+
+                # รอก่อนลองใหม่ (exponential backoff) 5, 10, 20, 30 วินาที
+                attempts += 1
+                wait_time = min(self.initial_backoff * (2 ** (attempts - 1)), self.max_backoff)
+                retry_message = f"กำลังลองเชื่อมต่อใหม่... ({attempts}/{self.max_reconnect_attempts})"
+                logger.info(retry_message)
+                self._report_status(False, retry_message)
+                await asyncio.sleep(wait_time)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self._close()
+            self._task = None
+
+    async def _connect(self):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.connect_timeout
+        )
+        self._writer = writer
+        # ขอ IRCv3 tags (message id, user id, emotes) มากับทุกข้อความ
+        writer.write(b'CAP REQ :twitch.tv/tags\r\n')
+        # ใช้ anonymous user (justinfan + random number)
+        writer.write(f'NICK justinfan{random.randint(10000, 99999)}\r\n'.encode('utf-8'))
+        await writer.drain()
+        self._queue_joins(self.channels)
+
+        self._report_status(True, f"เชื่อมต่อกับ {describe_channels(self.channels)} สำเร็จ")
+        logger.info(f"Successfully connected to {describe_channels(self.channels)}")
+        return reader
+
+    async def _read_loop(self, reader):
+        framer = LineFramer()
+        while True:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                return
+            framer.feed(data, self._handle_line)
+            if self.backpressure is not None:
+                await self.backpressure()
+
+    def _handle_line(self, buffer, start, end):
+        # จัดการ PING/PONG
+        if buffer.startswith(b'PING', start, end):
+            self._writer.write(b'PONG' + buffer[start + 4:end] + b'\r\n')
+            return
+
+        # ตรวจที่ระดับ bytes ก่อน บรรทัดที่ไม่ใช่แชท (JOIN, 353, 366, ...) ไม่ต้อง decode
+        if buffer.find(b' PRIVMSG ', start, end) < 0:
+            return
+
+        # แยกข้อความ chat
+        message = parse_irc_message(decode_line(buffer, start, end))
+        if message is None or message.command != 'PRIVMSG' or message.channel is None:
+            return
+        try:
+            self.on_message(message.nick, message.channel, (message.trailing or '').strip(), message)
+        except Exception as e:
+            logger.error(f"Error processing chat message: {e}")
+
+    async def _close(self):
+        writer, self._writer = self._writer, None
+        self.connected = False
+        self._pending_joins.clear()
+        if self._joiner is not None:
+            self._joiner.cancel()
+            self._joiner = None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, asyncio.CancelledError):
+                pass
+
+
+class TwitchConnectionManager:
+    """กระจาย channel จำนวนมากไปหลาย connection (shard) บน event loop เดียวกัน
+
+    แต่ละ connection ดู channel ได้ไม่เกิน channels_per_connection ถ้าเกินจะเปิด connection ใหม่
+    ทุก connection ใช้ TokenBucket ตัวเดียวกันส่ง JOIN ไม่ให้เกินอัตราที่ Twitch กำหนด (JOIN_RATE, JOIN_BURST)
+    เมื่อ connection ไหนขาด channel ของมันจะย้ายไป JOIN ที่ connection อื่นที่ยังต่ออยู่และมีที่ว่าง
+    (ที่เหลือจะ JOIN ใหม่ตอน connection นั้นต่อกลับมา) ถ้า connection เลิกพยายามต่อใหม่
+    channel ที่ค้างจะย้ายไป connection อื่นหรือเปิด connection ใหม่ให้
+    เปิด connection ใหม่แทนได้ไม่เกิน max_respawns ครั้งจนกว่าจะมี connection ไหนต่อสำเร็จ (server ล่มทั้งหมด
+    manager จึงจบได้) channel ที่เกินจากนั้นรอ JOIN ตอนมี connection ต่อสำเร็จ
+
+    callback และ option อื่นเหมือน TwitchIRCClient on_status(connected, message) เป็นสถานะของ connection ที่ส่งข้อความนั้น
+    (connection หนึ่งขาดขณะที่ตัวอื่นยังต่ออยู่ได้ connected=False) ภาพรวมดูจาก connected ของ manager
+    manager ยังทำงานอยู่จนกว่า Future ที่ start() คืนมาจะจบ
+    """
+
+    def __init__(self, channels, on_message, on_status=None, on_error=None,
+                 channels_per_connection=CHANNELS_PER_CONNECTION, connections=None,
+                 join_rate=JOIN_RATE, join_burst=JOIN_BURST, max_respawns=MAX_RESPAWNS, **client_options):
+        self.channels = []
+        for channel in channels:
+            channel = normalize_channel(channel)
+            if channel not in self.channels:
+                self.channels.append(channel)
+        self.on_message = on_message
+        self.on_status = on_status
+        self.on_error = on_error
+        self.channels_per_connection = channels_per_connection
+        # จำนวน connection ตอนเริ่ม (ค่าเริ่มต้นคือน้อยที่สุดที่พอสำหรับทุก channel)
+        self.connections = connections
+        self.join_limiter = TokenBucket(join_rate, join_burst)
+        self.max_respawns = max_respawns
+        self.client_options = client_options
+        self._respawns = 0  # connection ที่เปิดแทนตัวที่เลิกพยายาม นับตั้งแต่ต่อสำเร็จครั้งล่าสุด
+        self._unassigned = []  # channel ที่ยังไม่มี connection (รอจนมี connection ต่อสำเร็จ)
+        self.clients = []
+        self._tasks = {}
+        self._stopping = False
+        self._loop = None
+        self._finished = None
+
+    @property
+    def connected(self):
+        return any(client.connected for client in self.clients)
+
+    def start(self, event_loop=None):
+        """เริ่มทุก connection บน event loop (ค่าเริ่มต้นคือ shared_event_loop) คืนค่า Future ที่จบเมื่อหยุดทั้งหมด"""
+        event_loop = event_loop or shared_event_loop
+        return event_loop.submit(self.run())
+
+    def stop(self):
+        """หยุดทุก connection (เรียกจาก thread ไหนก็ได้)"""
+        self._stopping = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._finish)
+
+    def join(self, channels):
+        """JOIN channel เพิ่ม ลง connection ที่ว่างที่สุด (เรียกจาก thread ไหนก็ได้)"""
+        channels = [normalize_channel(channel) for channel in channels]
+        self._call_in_loop(self._join, channels)
+
+    def part(self, channels):
+        """ออกจาก channel (เรียกจาก thread ไหนก็ได้)"""
+        channels = [normalize_channel(channel) for channel in channels]
+        self._call_in_loop(self._part, channels)
+
+    def _call_in_loop(self, callback, *args):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(callback, *args)
+        else:
+            callback(*args)
+
+    async def run(self):
+        if self._stopping:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._finished = self._loop.create_future()
+        connections = self.connections or -(-len(self.channels) // self.channels_per_connection) or 1
+        # แบ่งแบบวนรอบ ให้ทุก connection มี channel ใกล้เคียงกัน
+        for index in range(connections):
+            self._add_client(self.channels[index::connections])
+        try:
+            await self._finished
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._stopping = True
+            for client in self.clients:
+                client.stop()
+            for task in self._tasks.values():
+                task.cancel()  # รวมถึง client ที่ยังไม่ทันเริ่มทำงาน
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self.clients.clear()
+            self._tasks.clear()
+            self._loop = None
+
+    def _finish(self):
+        if self._finished is not None and not self._finished.done():
+            self._finished.set_result(None)
+
+    def _add_client(self, channels):
+        client = TwitchIRCClient(channels, self.on_message, on_error=self.on_error,
+                                 join_limiter=self.join_limiter, **self.client_options)
+        client.on_status = functools.partial(self._on_client_status, client)
+        self.clients.append(client)
+        task = self._loop.create_task(client.run())
+        task.add_done_callback(functools.partial(self._on_client_done, client))
+        self._tasks[client] = task
+        return client
+
+    def _on_client_status(self, client, connected, message):
+        if connected:
+            self._respawns = 0
+            if self._unassigned:
+                channels, self._unassigned = self._unassigned, []
+                self._assign(channels)
+        elif not self._stopping:
+            self._rebalance(client)
+        if self.on_status is not None:
+            self.on_status(connected, message)
+
+    def _on_client_done(self, client, _task):
+        self._tasks.pop(client, None)
+        if client in self.clients:
+            self.clients.remove(client)
+        if self._stopping:
+            return
+        if not self.clients:
+            self._report_error("All IRC connections failed")
+            self._finish()
+            return
+        # connection นี้เลิกพยายามแล้ว ย้าย channel ที่ค้างไปที่อื่น
+        orphaned = [channel for channel in client.channels if channel in self.channels]
+        self._assign(orphaned, respawn=True)
+
+    def _report_error(self, message):
+        logger.error(message)
+        if self.on_error is not None:
+            self.on_error(message)
+
+    def _rebalance(self, dropped):
+        """ย้าย channel ของ connection ที่ขาดไปยัง connection ที่ยังต่ออยู่และมีที่ว่าง"""
+        targets = [client for client in self.clients if client is not dropped and client.connected]
+        moved = []
+        for channel in list(dropped.channels):
+            target = min(targets, key=lambda client: len(client.channels), default=None)
+            if target is None or len(target.channels) >= self.channels_per_connection:
+                break
+            target._join([channel])
+            moved.append(channel)
+        if moved:
+            dropped._part(moved)
+            logger.info(f"Moved {len(moved)} channel(s) off a dropped connection")
+
+    def _assign(self, channels, respawn=False):
+        """ลง channel ใน connection ที่มีที่ว่าง ถ้าไม่มีเปิด connection ใหม่
+
+        respawn=True คือ channel ของ connection ที่เลิกพยายามแล้ว ใช้โควตา max_respawns
+        """
+        waiting = []
+        for channel in channels:
+            candidates = [client for client in self.clients if len(client.channels) < self.channels_per_connection]
+            if candidates:
+                # เลือก connection ที่ต่ออยู่ก่อน แล้วค่อยดูจำนวน channel
+                target = min(candidates, key=lambda client: (not client.connected, len(client.channels)))
+                target._join([channel])
+            elif respawn and self._respawns >= self.max_respawns:
+                waiting.append(channel)
+            else:
+                if respawn:
+                    self._respawns += 1
+                self._add_client([channel])
+        if waiting:
+            self._unassigned.extend(waiting)
+            self._report_error(f"Reconnect limit reached, {describe_channels(waiting)} waiting for a working connection")
+
+    def _join(self, channels):
+        new_channels = [channel for channel in channels if channel not in self.channels]
+        self.channels.extend(new_channels)
+        if self._loop is not None:
+            self._assign(new_channels)
+
+    def _part(self, channels):
+        for channel in channels:
+            if channel in self.channels:
+                self.channels.remove(channel)
+                if channel in self._unassigned:
+                    self._unassigned.remove(channel)
+                for client in self.clients:
+                    client._part([channel])